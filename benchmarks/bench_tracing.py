@@ -0,0 +1,246 @@
+from pythonalgos.graph.directed_graph import DirectedGraph
+from pythonalgos.graph.algorithm_ordering import AlgorithmOrdering
+from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonvizalgos.graph.viz_tracing_graphviz import VizTracingGraphviz
+from pythonvizalgos.graph.viz_tracing_networkx import VizTracingNetworkx
+from pythonvizalgos.graph.viz_cyclic_tracing import VizCyclicTracing, \
+    VizCyclicTracingAdvisor
+from pythonvizalgos.graph.viz_scc_kosaraju_tracing import \
+    VizSccsKosarajuTracingAdvisor
+from pythonvizalgos.util import video_tools as vt
+from typing import Any, Callable, Dict, List, Mapping
+import argparse
+import contextlib
+import json
+import networkx as nx
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+""" Module that benchmarks the throughput of the tracing of the algorithms on
+synthetic directed graphs, for the graphviz and the networkx backends. Every
+benchmark case is reported as a JSON line.
+
+Usage:
+    python -m benchmarks.bench_tracing --sizes 10 100 1000 \
+        --output bench_output.txt
+"""
+
+
+GRAPHVIZ: str = "graphviz"
+NETWORKX: str = "networkx"
+BACKENDS: List[str] = [GRAPHVIZ, NETWORKX]
+
+CYCLIC: str = "cyclic"
+SCC_KOSARAJU: str = "scc-kosaraju"
+ALGORITHMS: List[str] = [CYCLIC, SCC_KOSARAJU]
+# Without a create_sccs_kosaraju_dfs that takes an advisor, as in
+# python-algos 0.16, only the resulting SCCs are traced, which says little
+# about the throughput, so the Kosaraju tracing is only run on demand
+DEFAULT_ALGORITHMS: List[str] = [CYCLIC]
+
+SIZES: List[int] = [10, 100, 1000]
+
+THREAD_STACK_SIZE: int = 512 * 1024 * 1024
+
+
+def create_chain(size: int, rnd: random.Random) -> Mapping[int, List[int]]:
+    """ A chain of vertices, the deepest possible traversal """
+
+    return {v: [v + 1] if v + 1 < size else [] for v in range(size)}
+
+
+def create_random_dag(size: int, rnd: random.Random) ->\
+        Mapping[int, List[int]]:
+    """ A random acyclic graph with on average two successors per vertex """
+
+    return {v: sorted({rnd.randrange(v + 1, size)
+                       for _ in range(min(2, size - v - 1))})
+            for v in range(size)}
+
+
+def create_dense_cyclic(size: int, rnd: random.Random) ->\
+        Mapping[int, List[int]]:
+    """ A cyclic graph with eight random successors per vertex """
+
+    return {v: sorted({rnd.randrange(size) for _ in range(8)})
+            for v in range(size)}
+
+
+def create_many_sccs(size: int, rnd: random.Random) ->\
+        Mapping[int, List[int]]:
+    """ Cycles of five vertices, linked to the next cycle """
+
+    vertices: Dict[int, List[int]] = {}
+    for v in range(size):
+        first = v - v % 5
+        successor = v + 1 if v + 1 < min(first + 5, size) else first
+        vertices[v] = [successor]
+        if v == first and first + 5 < size:
+            vertices[v].append(first + 5)
+    return vertices
+
+
+GRAPHS: Mapping[str, Callable[[int, random.Random],
+                              Mapping[int, List[int]]]] = {
+    "chain": create_chain,
+    "random_dag": create_random_dag,
+    "dense_cyclic": create_dense_cyclic,
+    "many_sccs": create_many_sccs}
+
+
+def create_tracing(backend: str, path: str, directed_graph: DirectedGraph) \
+        -> VizTracing:
+    """ Creates the tracing of the backend in recording mode, so that the
+    algorithm and the rendering can be timed separately """
+
+    if backend == GRAPHVIZ:
+        return VizTracingGraphviz(
+            path=path, directed_graph=directed_graph,
+            vertex_states=[
+                {VizTracing.ACTIVATED:
+                    {"fillcolor": "red", "style": "filled"}},
+                {VizCyclicTracing.IN_CYCLE:
+                    {"fillcolor": "blue", "style": "filled"}},
+                {VizTracing.VISITED:
+                    {"fillcolor": "gray", "style": "filled"}}],
+            edge_states=[{VizTracing.DISABLED: {"style": "dashed"}}],
+            record=True)
+    else:
+        return VizTracingNetworkx(
+            path=path, directed_graph=directed_graph,
+            vertex_states={
+                VizTracing.ACTIVATED: {"fillcolor": "red"},
+                VizTracing.VISITED: {"fillcolor": "gray"},
+                VizTracing.DEFAULT: {"fillcolor": "white"}},
+            edge_states={}, record=True)
+
+
+def run_algorithm(algorithm: str, viz_tracing: VizTracing):
+    """ Runs the traced algorithm on the directed graph of the tracing """
+
+    directed_graph = viz_tracing.get_directed_graph()
+    if algorithm == CYCLIC:
+        directed_graph.is_cyclic(VizCyclicTracingAdvisor(viz_tracing))
+    else:
+        VizSccsKosarajuTracingAdvisor(viz_tracing).create_sccs(
+            directed_graph, True)
+
+
+def run_case(graph: str, size: int, algorithm: str, backend: str,
+             seed: int, video: bool, trace_memory: bool) -> Mapping[str, Any]:
+    """ Runs one benchmark case and measures the time per phase, the frame
+    throughput and the peak of the Python allocations of the case """
+
+    result: Dict[str, Any] = {
+        "graph": graph, "vertices": size, "algorithm": algorithm,
+        "backend": backend}
+    path = tempfile.mkdtemp()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        vertices = GRAPHS[graph](size, random.Random(seed))
+        directed_graph = DirectedGraph(
+            vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+        result["edges"] = sum(len(heads) for heads in vertices.values())
+        viz_tracing = create_tracing(backend, path, directed_graph)
+        result["build_seconds"] = time.perf_counter() - start
+        # A non-planar graph is laid out with a spring layout by the
+        # networkx backend, which takes longer than the planar layout
+        result["planar"] = nx.check_planarity(nx.DiGraph(
+            [(tail, head) for tail, heads in vertices.items()
+             for head in heads]))[0]
+
+        start = time.perf_counter()
+        run_algorithm(algorithm, viz_tracing)
+        result["trace_seconds"] = time.perf_counter() - start
+        result["events"] = len(viz_tracing.events)
+
+        start = time.perf_counter()
+        viz_tracing.replay()
+        viz_tracing.flush()
+        result["render_seconds"] = time.perf_counter() - start
+        result["frames"] = len(viz_tracing.get_frame_durations())
+        result["frames_per_second"] = \
+            result["frames"] / result["render_seconds"] \
+            if result["render_seconds"] else None
+
+        if video and result["frames"]:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(sys.stderr):
+                result["video_stats"] = vt.convert_images_to_video(
+                    path, instrumentation=viz_tracing.instrumentation)
+            result["video_seconds"] = time.perf_counter() - start
+        result["metrics"] = viz_tracing.get_metrics()
+    except Exception as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+    finally:
+        if trace_memory:
+            result["peak_python_bytes"] = \
+                tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        shutil.rmtree(path, ignore_errors=True)
+    return result
+
+
+def run_benchmarks(args: argparse.Namespace):
+    """ Runs every combination of graph, size, algorithm and backend and
+    writes a JSON line per case """
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for graph in args.graphs:
+            for size in args.sizes:
+                for algorithm in args.algorithms:
+                    for backend in args.backends:
+                        result = run_case(graph, size, algorithm, backend,
+                                          args.seed, args.video,
+                                          args.trace_memory)
+                        output.write(json.dumps(result) + "\n")
+                        output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the tracing of algorithms on directed "
+                    "graphs")
+    parser.add_argument("--graphs", nargs="+", choices=sorted(GRAPHS),
+                        default=sorted(GRAPHS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS,
+                        default=DEFAULT_ALGORITHMS,
+                        help="the traced algorithms, scc-kosaraju only "
+                             "traces the resulting SCCs with a python-algos "
+                             "whose Kosaraju takes no advisor")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=BACKENDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--video", action="store_true",
+                        help="also convert the frames to a video")
+    parser.add_argument("--no-trace-memory", dest="trace_memory",
+                        action="store_false",
+                        help="don't report the peak of the Python "
+                             "allocations, which slows the run down")
+    parser.add_argument("--output", help="the file for the JSON lines, "
+                                         "defaults to stdout")
+    args = parser.parse_args(argv)
+
+    # The algorithms are recursive, deep graphs need a deep stack
+    sys.setrecursionlimit(max(sys.getrecursionlimit(),
+                              4 * max(args.sizes) + 1000))
+    threading.stack_size(THREAD_STACK_SIZE)
+    thread = threading.Thread(target=run_benchmarks, args=(args,))
+    thread.start()
+    thread.join()
+
+
+if __name__ == "__main__":
+    main()
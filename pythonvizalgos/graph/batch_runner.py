@@ -0,0 +1,522 @@
+from pythonalgos.graph.directed_graph import DirectedGraph
+from pythonalgos.graph.algorithm_ordering import AlgorithmOrdering
+from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonvizalgos.graph.viz_cyclic_tracing import VizCyclicTracing
+from pythonvizalgos.graph.viz_scc_kosaraju_tracing import \
+    VizSccsKosarajuTracing
+from pythonvizalgos.util.frame_cache import FrameCache
+from pythonvizalgos.util import video_tools as vt
+from collections import deque
+from multiprocessing import connection
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+
+""" Module that traces an algorithm on many directed graphs in parallel, one
+process per graph, and reports the failures and the timings.
+
+A graph definition is a JSON file with the adjacency list of the directed
+graph, e.g. {"1": [2], "2": [3, 1], "3": []}. Labels that are integers are
+read as integers. The graphs are either all JSON files of a directory, or
+listed in a manifest: a JSON file with a list of entries, each the path of
+a graph definition (relative to the manifest) or an object with a "name"
+and either a "path" or the "vertices" themselves.
+
+With --split-components, every graph is split into its weakly connected
+components, which are traced in parallel, each with its own layout and
+frames. The clips of the components are joined into the video of the graph,
+each after a title card, unless --separate-videos keeps a video per
+component.
+
+Usage:
+    python -m pythonvizalgos.graph.batch_runner graphs/ --algorithm cyclic \
+        --output videos/ --workers 8 --timeout 600 --report report.json
+"""
+
+CYCLIC: str = "cyclic"
+SCC_KOSARAJU: str = "scc-kosaraju"
+ALGORITHMS: List[str] = [CYCLIC, SCC_KOSARAJU]
+
+STATUS_OK: str = "ok"
+STATUS_FAILED: str = "failed"
+STATUS_TIMEOUT: str = "timeout"
+
+GRAPH_EXTENSION: str = ".json"
+COMPONENT_NAME: str = "component_{:03d}"
+COMPONENT_TITLE: str = "Component {} of {}: {} vertices"
+THREAD_STACK_SIZE: int = 512 * 1024 * 1024
+
+CYCLIC_VERTEX_STATES: List[Mapping[str, Mapping[str, str]]] = [
+    {VizTracing.ACTIVATED: {"fillcolor": "red", "style": "filled"}},
+    {VizCyclicTracing.IN_CYCLE: {"fillcolor": "blue", "style": "filled"}},
+    {VizTracing.VISITED: {"fillcolor": "gray", "style": "filled"}}]
+CYCLIC_EDGE_STATES: List[Mapping[str, Mapping[str, str]]] = [
+    {VizTracing.DISABLED: {"style": "dashed"}}]
+SCC_KOSARAJU_VERTEX_STATES: Mapping[str, Mapping[str, str]] = {
+    VizTracing.ACTIVATED: {"fillcolor": "red", "style": "filled"},
+    VizTracing.VISITED: {"fillcolor": "gray", "style": "filled"},
+    VizTracing.DEFAULT: {"fillcolor": "white", "style": "filled"}}
+
+
+class TraceJob(NamedTuple):
+    """ A graph to be traced, with the directory of its resources """
+
+    name: str
+    vertices: Mapping[Any, List[Any]]
+    output_path: str
+
+
+def load_vertices(file_path: str) -> Dict[Any, List[Any]]:
+    """ Function that reads a graph definition
+
+    Args:
+        file_path(str): the path of the JSON file with the adjacency list
+
+    Returns:
+        The vertices with their heads
+    """
+
+    with open(file_path, encoding="utf-8") as graph_file:
+        return to_vertices(json.load(graph_file), file_path)
+
+
+def to_vertices(definition: Any, source: str) -> Dict[Any, List[Any]]:
+    """ Function that converts the adjacency list of a graph definition.
+    JSON keys are strings, so keys that are integers are converted
+
+    Args:
+        definition: the parsed adjacency list
+        source(str): where the definition comes from, for the error message
+    """
+
+    if not isinstance(definition, dict) or \
+            not all(isinstance(heads, list) for heads in definition.values()):
+        raise Exception(source + " is not an adjacency list")
+    return {int(label) if re.fullmatch(r"-?\d+", label) else label: heads
+            for label, heads in definition.items()}
+
+
+def load_jobs(source: str, output_path: str) -> List[TraceJob]:
+    """ Function that reads the graphs of a directory or a manifest
+
+    Args:
+        source(str): a directory with graph definitions or a manifest
+        output_path(str): the directory that gets a directory per job
+
+    Returns:
+        The jobs, in the order of the manifest or of the file names
+    """
+
+    if os.path.isdir(source):
+        entries: List[Any] = sorted(
+            name for name in os.listdir(source)
+            if name.endswith(GRAPH_EXTENSION))
+        base_path = source
+    else:
+        with open(source, encoding="utf-8") as manifest_file:
+            entries = json.load(manifest_file)
+        if not isinstance(entries, list):
+            raise Exception(source + " is not a list of graphs")
+        base_path = os.path.dirname(source)
+
+    jobs: List[TraceJob] = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        graph_path = os.path.join(base_path, entry["path"]) \
+            if "path" in entry else None
+        name = entry.get("name") or os.path.splitext(
+            os.path.basename(graph_path or ""))[0]
+        if not name:
+            raise Exception("A graph in " + source + " has no name")
+        vertices = load_vertices(graph_path) if graph_path is not None \
+            else to_vertices(entry.get("vertices"), source + ": " + name)
+        jobs.append(TraceJob(name, vertices, os.path.join(output_path, name)))
+    names = [job.name for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise Exception("Duplicate graph names: " + ", ".join(duplicates))
+    return jobs
+
+
+def create_tracing(job: TraceJob, options: Mapping[str, Any]) -> VizTracing:
+    """ Function that creates the tracing of the algorithm for a job
+
+    Args:
+        job(TraceJob): the job
+        options(dict): the options of the run, see run_job
+    """
+
+    directed_graph = DirectedGraph(
+        job.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+    kwargs: Dict[str, Any] = {"deduplicate": options.get("deduplicate",
+                                                         False)}
+    if options.get("frame_cache"):
+        kwargs["frame_cache"] = FrameCache(options["frame_cache"])
+    if options.get("video_encoder"):
+        kwargs["video_encoder"] = options["video_encoder"]
+    if options["algorithm"] == CYCLIC:
+        return VizCyclicTracing(
+            path=job.output_path, directed_graph=directed_graph,
+            vertex_states=CYCLIC_VERTEX_STATES,
+            edge_states=CYCLIC_EDGE_STATES, **kwargs)
+    return VizSccsKosarajuTracing(
+        path=job.output_path, directed_graph=directed_graph,
+        vertex_states=SCC_KOSARAJU_VERTEX_STATES, edge_states={}, **kwargs)
+
+
+def run_job(job: TraceJob, options: Mapping[str, Any]) -> Dict[str, Any]:
+    """ Function that traces the algorithm on the graph of a job and
+    generates its video. It runs in the process of the job
+
+    Args:
+        job(TraceJob): the job
+        options(dict): the algorithm, "nontrivial" for the SCCs, and
+            optionally "deduplicate", the path of a "frame_cache" and the
+            EncoderSettings of the "video_encoder"
+
+    Returns:
+        The number of frames and the metrics of the tracing
+    """
+
+    viz_tracing = create_tracing(job, options)
+    if options["algorithm"] == CYCLIC:
+        viz_tracing.execute(resource_path=job.output_path)
+    else:
+        viz_tracing.execute(resource_path=job.output_path,
+                            nontrivial=options.get("nontrivial", True))
+        viz_tracing.create_video(job.output_path)
+    return {"frames": len(viz_tracing.get_frame_durations()),
+            "metrics": viz_tracing.get_metrics()}
+
+
+def run_job_process(job: TraceJob, options: Mapping[str, Any],
+                    run: Callable[[TraceJob, Mapping[str, Any]],
+                                  Dict[str, Any]],
+                    sender: connection.Connection):
+    """ Function that runs a job in its process and sends the result. The
+    algorithms are recursive, so the job runs on a thread with a deep
+    stack
+
+    Args:
+        job(TraceJob): the job
+        options(dict): the options of the run
+        run: the function that runs the job
+        sender(Connection): the connection to the runner
+    """
+
+    result: Dict[str, Any] = {}
+
+    def target():
+        try:
+            result.update(run(job, options))
+            result["status"] = STATUS_OK
+        except BaseException as exception:
+            result["status"] = STATUS_FAILED
+            result["error"] = "{}: {}".format(type(exception).__name__,
+                                              exception)
+            result["traceback"] = traceback.format_exc()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(),
+                              4 * len(job.vertices) + 1000))
+    threading.stack_size(THREAD_STACK_SIZE)
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    sender.send(result)
+    sender.close()
+
+
+def run_jobs(jobs: List[TraceJob], options: Mapping[str, Any],
+             workers: int = None, timeout: float = None,
+             run: Callable[[TraceJob, Mapping[str, Any]],
+                           Dict[str, Any]] = run_job) -> List[Dict[str, Any]]:
+    """ Function that runs the jobs on a pool of processes, a process per
+    job, so that a job that exceeds the timeout can be stopped
+
+    Args:
+        jobs(list): the jobs
+        options(dict): the options of the run, see run_job
+        workers(int): the number of jobs that run at the same time,
+            defaults to the number of cores
+        timeout(float): the maximum number of seconds per job
+        run: the function that runs a job, run_job by default
+
+    Returns:
+        The result of every job, in the order of the jobs, with its name,
+        status ("ok", "failed" or "timeout") and seconds
+    """
+
+    workers = workers or os.cpu_count() or 1
+    pending = deque(enumerate(jobs))
+    running: Dict[connection.Connection, Any] = {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    while pending or running:
+        while pending and len(running) < workers:
+            idx, job = pending.popleft()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=run_job_process, args=(job, options, run, sender),
+                daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (idx, job, process, time.monotonic())
+
+        wait_seconds = None
+        if timeout is not None:
+            wait_seconds = max(0.0, min(
+                start + timeout for _, _, _, start in running.values()) -
+                time.monotonic())
+        ready = connection.wait(list(running), wait_seconds)
+        for receiver in list(running):
+            idx, job, process, start = running[receiver]
+            seconds = time.monotonic() - start
+            if receiver in ready:
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    result = {"status": STATUS_FAILED,
+                              "error": "The process of the job exited"}
+                process.join()
+                if process.exitcode and result["status"] == STATUS_OK:
+                    result = {"status": STATUS_FAILED,
+                              "error": "The process of the job exited "
+                                       "with " + str(process.exitcode)}
+            elif timeout is not None and seconds >= timeout:
+                process.terminate()
+                process.join()
+                result = {"status": STATUS_TIMEOUT,
+                          "error": "Timed out after " + str(timeout) + "s"}
+            else:
+                continue
+            receiver.close()
+            del running[receiver]
+            results[idx] = dict(result, name=job.name, seconds=seconds)
+    return [result for result in results if result is not None]
+
+
+def split_components(vertices: Mapping[Any, List[Any]]) ->\
+        List[Dict[Any, List[Any]]]:
+    """ Function that splits the adjacency list of a directed graph into the
+    adjacency lists of its weakly connected components, that is the parts
+    that are connected when the direction of the edges is ignored
+
+    Args:
+        vertices(dict): the vertices with their heads
+
+    Returns:
+        The components, ordered by their first vertex in the adjacency list
+    """
+
+    parents: Dict[Any, Any] = {}
+
+    def find(label: Any) -> Any:
+        root = parents.setdefault(label, label)
+        while root != parents[root]:
+            root = parents[root]
+        while label != root:
+            parents[label], label = root, parents[label]
+        return root
+
+    for tail, heads in vertices.items():
+        for head in heads:
+            parents[find(head)] = find(tail)
+        find(tail)
+    components: Dict[Any, Dict[Any, List[Any]]] = {}
+    for tail, heads in vertices.items():
+        components.setdefault(find(tail), {})[tail] = heads
+    return list(components.values())
+
+
+def trace_components(job: TraceJob, options: Mapping[str, Any],
+                     workers: int = None, timeout: float = None,
+                     separate: bool = False,
+                     run: Callable[[TraceJob, Mapping[str, Any]],
+                                   Dict[str, Any]] = run_job) ->\
+        Dict[str, Any]:
+    """ Function that traces the weakly connected components of the graph of
+    a job in parallel, each as a job of its own in a directory of the job.
+    When all components succeeded, their videos are joined into the video
+    of the job, each after a title card. The directory of the job is
+    created, a tracing only creates the directory of its component in it
+
+    Args:
+        job(TraceJob): the job
+        options(dict): the options of the run, see run_job
+        workers(int): the number of components that are traced at the same
+            time, defaults to the number of cores
+        timeout(float): the maximum number of seconds per component
+        separate(bool): if True, the videos of the components are not
+            joined
+        run: the function that runs a job, run_job by default
+
+    Returns:
+        The results of the components (see run_jobs) and the path of the
+        joined video, None if the videos were not joined
+    """
+
+    components = split_components(job.vertices)
+    jobs = [TraceJob(job.name + "/" + COMPONENT_NAME.format(idx + 1),
+                     component,
+                     os.path.join(job.output_path,
+                                  COMPONENT_NAME.format(idx + 1)))
+            for idx, component in enumerate(components)]
+    os.makedirs(job.output_path, exist_ok=True)
+    results = run_jobs(jobs, options, workers, timeout, run)
+    video = None
+    if not separate and jobs and \
+            all(result["status"] == STATUS_OK for result in results):
+        video_name = vt.get_video_name(VizTracing.VIDEO_NAME,
+                                       options.get("video_encoder"))
+        video = os.path.join(job.output_path, video_name)
+        vt.concatenate_videos(
+            [os.path.join(component_job.output_path, video_name)
+             for component_job in jobs], video,
+            titles=[COMPONENT_TITLE.format(idx + 1, len(jobs),
+                                           len(component_job.vertices))
+                    for idx, component_job in enumerate(jobs)],
+            encoder=options.get("video_encoder"))
+    return {"results": results, "video": video}
+
+
+def create_report(results: List[Dict[str, Any]],
+                  wall_seconds: float) -> Dict[str, Any]:
+    """ Function that aggregates the results of the jobs: the number of jobs
+    per status, the failures, the times of the jobs and the total time per
+    metric of the tracings
+
+    Args:
+        results(list): the results of the jobs, see run_jobs
+        wall_seconds(float): the duration of the whole run
+    """
+
+    statuses: Dict[str, int] = {STATUS_OK: 0, STATUS_FAILED: 0,
+                                STATUS_TIMEOUT: 0}
+    timers: Dict[str, float] = {}
+    for result in results:
+        statuses[result["status"]] += 1
+        for name, seconds in result.get("metrics", {}).get(
+                "timers", {}).items():
+            timers[name] = timers.get(name, 0.0) + seconds
+    seconds = [result["seconds"] for result in results]
+    return {
+        "jobs": len(results),
+        "statuses": statuses,
+        "wall_seconds": wall_seconds,
+        "job_seconds": {
+            "total": sum(seconds),
+            "mean": sum(seconds) / len(seconds) if seconds else 0.0,
+            "max": max(seconds, default=0.0)},
+        "frames": sum(result.get("frames", 0) for result in results),
+        "timers": dict(sorted(timers.items())),
+        "failures": [{"name": result["name"], "status": result["status"],
+                      "error": result.get("error")}
+                     for result in results
+                     if result["status"] != STATUS_OK],
+        "results": results}
+
+
+def format_summary(report: Mapping[str, Any]) -> str:
+    """ Function that returns the summary of a report for the console """
+
+    statuses = report["statuses"]
+    lines = ["{} jobs: {} ok, {} failed, {} timed out in {:.1f}s".format(
+        report["jobs"], statuses[STATUS_OK], statuses[STATUS_FAILED],
+        statuses[STATUS_TIMEOUT], report["wall_seconds"]),
+        "job seconds: total {total:.1f}, mean {mean:.1f}, "
+        "max {max:.1f}".format(**report["job_seconds"])]
+    lines.extend("  {}: {:.1f}s".format(name, seconds)
+                 for name, seconds in report["timers"].items()
+                 if name.startswith("execute."))
+    lines.extend("FAILED {name} ({status}): {error}".format(**failure)
+                 for failure in report["failures"])
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Traces an algorithm on many directed graphs in "
+                    "parallel")
+    parser.add_argument("source", help="a directory with graph definitions "
+                                       "or a manifest")
+    parser.add_argument("--algorithm", required=True, choices=ALGORITHMS)
+    parser.add_argument("--output", required=True,
+                        help="the directory that gets a directory per graph")
+    parser.add_argument("--workers", type=int,
+                        help="the number of graphs traced at the same time, "
+                             "defaults to the number of cores")
+    parser.add_argument("--timeout", type=float,
+                        help="the maximum number of seconds per graph")
+    parser.add_argument("--trivial", action="store_true",
+                        help="also report the SCCs of a single vertex")
+    parser.add_argument("--deduplicate", action="store_true",
+                        help="hold unchanged frames instead of rendering "
+                             "them again")
+    parser.add_argument("--frame-cache",
+                        help="the directory of a frame cache that is shared "
+                             "by the jobs and the runs")
+    parser.add_argument("--split-components", action="store_true",
+                        help="trace the weakly connected components of every "
+                             "graph in parallel and join their videos")
+    parser.add_argument("--separate-videos", action="store_true",
+                        help="with --split-components, keep a video per "
+                             "component")
+    parser.add_argument("--ffmpeg-codec",
+                        help="encode the videos with ffmpeg and this codec, "
+                             "e.g. libx264, instead of OpenCV")
+    parser.add_argument("--crf", type=int,
+                        help="with --ffmpeg-codec, the constant quality")
+    parser.add_argument("--bitrate",
+                        help="with --ffmpeg-codec, the target bitrate, e.g. "
+                             "500k, instead of a constant quality")
+    parser.add_argument("--gop", type=int,
+                        help="with --ffmpeg-codec, the frames between "
+                             "keyframes")
+    parser.add_argument("--vfr", action="store_true",
+                        help="with --ffmpeg-codec, store held frames once")
+    parser.add_argument("--container", choices=["mp4", "mkv"],
+                        default=vt.EncoderSettings().container,
+                        help="with --ffmpeg-codec, the container of the "
+                             "videos")
+    parser.add_argument("--report", help="the file for the JSON report")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.source, os.path.abspath(args.output))
+    os.makedirs(args.output, exist_ok=True)
+    options = {"algorithm": args.algorithm, "nontrivial": not args.trivial,
+               "deduplicate": args.deduplicate,
+               "frame_cache": args.frame_cache and
+               os.path.abspath(args.frame_cache)}
+    if args.ffmpeg_codec:
+        defaults = vt.EncoderSettings()
+        options["video_encoder"] = vt.EncoderSettings(
+            codec=args.ffmpeg_codec,
+            crf=defaults.crf if args.crf is None else args.crf,
+            bitrate=args.bitrate,
+            gop=defaults.gop if args.gop is None else args.gop,
+            vfr=args.vfr, container=args.container)
+    start = time.monotonic()
+    if args.split_components:
+        results = [result for job in jobs
+                   for result in trace_components(
+                       job, options, args.workers, args.timeout,
+                       args.separate_videos)["results"]]
+    else:
+        results = run_jobs(jobs, options, args.workers, args.timeout)
+    report = create_report(results, time.monotonic() - start)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+    print(format_summary(report))
+    return 0 if not report["failures"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
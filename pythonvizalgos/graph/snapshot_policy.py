@@ -0,0 +1,137 @@
+from typing import Optional, Set
+import time
+
+""" Module that defines the policies that decide which snapshots of a tracing
+become frames, so that the render cost of very long traces is bounded """
+
+
+class SnapshotPolicy:
+    """ Base class of the snapshot policies. A tracing asks every policy
+    whether it accepts a snapshot and takes the snapshot only when all of
+    them accept it. A snapshot that is not taken still keeps the state
+    changes before it, they show in the next frame.
+
+    A milestone marks a snapshot as a semantic keyframe of the algorithm,
+    e.g. VizTracing.MILESTONE_CYCLE_FOUND. The sampling policies always
+    accept milestones, unless keep_milestones is False """
+
+    def __init__(self, keep_milestones: bool = True):
+        """ Initialises the policy
+
+        Args:
+            keep_milestones(bool): if True, milestones are always accepted
+        """
+
+        self.keep_milestones = keep_milestones
+
+    def accept(self, milestone: Optional[str]) -> bool:
+        """ Decides whether the snapshot becomes a frame. It's called for
+        every snapshot, also when another policy rejects it
+
+        Args:
+            milestone(str): the milestone of the snapshot, if any
+
+        Returns:
+            True if the policy accepts the snapshot
+        """
+
+        return True
+
+    def taken(self, milestone: Optional[str]):
+        """ Called when the snapshot was accepted by all policies
+
+        Args:
+            milestone(str): the milestone of the snapshot, if any
+        """
+
+        pass
+
+
+class MaxFramesSnapshotPolicy(SnapshotPolicy):
+    """ Policy that takes at most a number of frames, milestones included.
+    Later snapshots are dropped """
+
+    def __init__(self, max_frames: int):
+        """ Initialises the policy
+
+        Args:
+            max_frames(int): the maximum number of frames
+        """
+
+        super().__init__(keep_milestones=False)
+        self.max_frames = max_frames
+        self.frames = 0
+
+    def accept(self, milestone: Optional[str]) -> bool:
+        return self.frames < self.max_frames
+
+    def taken(self, milestone: Optional[str]):
+        self.frames += 1
+
+
+class EveryNthSnapshotPolicy(SnapshotPolicy):
+    """ Policy that takes every nth snapshot, starting with the first one """
+
+    def __init__(self, n: int, keep_milestones: bool = True):
+        """ Initialises the policy
+
+        Args:
+            n(int): the interval in snapshots
+            keep_milestones(bool): if True, milestones are always accepted
+        """
+
+        super().__init__(keep_milestones)
+        if n < 1:
+            raise Exception("The interval must be at least 1, not " + str(n))
+        self.n = n
+        self.snapshots = 0
+
+    def accept(self, milestone: Optional[str]) -> bool:
+        accepted = self.snapshots % self.n == 0 or \
+            self.keep_milestones and milestone is not None
+        self.snapshots += 1
+        return accepted
+
+
+class MilestoneSnapshotPolicy(SnapshotPolicy):
+    """ Policy that only takes the snapshots at milestones """
+
+    def __init__(self, milestones: Set[str] = None):
+        """ Initialises the policy
+
+        Args:
+            milestones(set): the milestones that are taken, all milestones
+                by default
+        """
+
+        super().__init__()
+        self.milestones = milestones
+
+    def accept(self, milestone: Optional[str]) -> bool:
+        return milestone is not None and \
+            (self.milestones is None or milestone in self.milestones)
+
+
+class TimeSamplingSnapshotPolicy(SnapshotPolicy):
+    """ Policy that takes a snapshot only when an interval of time passed
+    since the previous frame. The first snapshot is always taken """
+
+    def __init__(self, interval: float, keep_milestones: bool = True):
+        """ Initialises the policy
+
+        Args:
+            interval(float): the interval in seconds
+            keep_milestones(bool): if True, milestones are always accepted
+        """
+
+        super().__init__(keep_milestones)
+        self.interval = interval
+        self.previous_frame_time: Optional[float] = None
+
+    def accept(self, milestone: Optional[str]) -> bool:
+        return self.previous_frame_time is None or \
+            self.keep_milestones and milestone is not None or \
+            time.monotonic() - self.previous_frame_time >= self.interval
+
+    def taken(self, milestone: Optional[str]):
+        self.previous_frame_time = time.monotonic()
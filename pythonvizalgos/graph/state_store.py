@@ -0,0 +1,274 @@
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Set
+import numpy as np
+
+""" Module that contains the compact store in which a tracing keeps the
+statuses of the vertices and edges of a directed graph """
+
+
+class StateStore:
+    """ Class that keeps the statuses of vertices and edges apart from their
+    attributes. Every element is mapped to a dense integer id the first time
+    it gets a status. Its statuses are bits in an array of flags, so that an
+    element takes a few bytes and the statuses of many elements can be read
+    at once (see get_codes). A status that holds a value other than True,
+    e.g. the index of a vertex in a stack, keeps its values in a column,
+    indexed by the id. A column is typed after its values: integers and
+    floats are kept in a numeric column, any other value turns the column
+    into an object column.
+
+    A status is active from set until reset, whatever its value """
+
+    CAPACITY: int = 64
+    MAX_STATUSES: int = 64
+    INT_MIN: int = -2 ** 63
+    INT_MAX: int = 2 ** 63 - 1
+
+    def __init__(self, capacity: int = CAPACITY):
+        """ Creates an empty store
+
+        Args:
+            capacity(int): the number of elements that fit in the store
+                before its arrays are grown
+        """
+
+        self.ids: Dict[Hashable, int] = {}
+        self.elements: List[Hashable] = []
+        self.flags = np.zeros(max(capacity, 1), dtype=np.uint64)
+        self.bits: Dict[str, np.uint64] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def get_id(self, element: Hashable) -> int:
+        """ Returns the id of the element, which is assigned the first time
+        the element is seen
+
+        Args:
+            element: the vertex or edge
+        """
+
+        element_id = self.ids.get(element)
+        if element_id is None:
+            element_id = len(self.elements)
+            if element_id == len(self.flags):
+                self.grow()
+            self.ids[element] = element_id
+            self.elements.append(element)
+        return element_id
+
+    def grow(self):
+        """ Doubles the capacity of the flags and the columns """
+
+        capacity = 2 * len(self.flags)
+        self.flags = resize(self.flags, capacity)
+        self.columns = {status: resize(column, capacity)
+                        for status, column in self.columns.items()}
+
+    def get_bit(self, status: str) -> np.uint64:
+        """ Returns the bit of the status, which is assigned the first time
+        the status is seen
+
+        Args:
+            status(str): the status
+
+        Raises:
+            Exception: if there are more statuses than bits
+        """
+
+        bit = self.bits.get(status)
+        if bit is None:
+            if len(self.bits) == StateStore.MAX_STATUSES:
+                raise Exception("A state store can't hold more than " +
+                                str(StateStore.MAX_STATUSES) + " statuses")
+            bit = np.uint64(1) << np.uint64(len(self.bits))
+            self.bits[status] = bit
+        return bit
+
+    def get_column(self, status: str, value: Any) -> np.ndarray:
+        """ Returns the column of the status, creating it or turning it
+        into an object column when the value doesn't fit its type. The
+        elements that had the status before the column existed hold True
+
+        Args:
+            status(str): the status
+            value: the value to be kept in the column
+        """
+
+        dtype = get_dtype(value)
+        column = self.columns.get(status)
+        if column is None:
+            active = np.flatnonzero(self.flags & self.bits[status])
+            if active.size:
+                column = np.empty(len(self.flags), dtype=object)
+                column[active] = True
+            else:
+                column = np.zeros(len(self.flags), dtype=dtype)
+        elif column.dtype != dtype and column.dtype != object:
+            column = column.astype(object)
+        else:
+            return column
+        self.columns[status] = column
+        return column
+
+    def set(self, element: Hashable, status: str, value: Any = True):
+        """ Sets the status of the element
+
+        Args:
+            element: the vertex or edge
+            status(str): the status
+            value: the value of the status
+        """
+
+        element_id = self.get_id(element)
+        bit = self.get_bit(status)
+        if value is not True or status in self.columns:
+            self.get_column(status, value)[element_id] = value
+        self.flags[element_id] |= bit
+
+    def reset(self, element: Hashable, status: str):
+        """ Resets the status of the element
+
+        Args:
+            element: the vertex or edge
+            status(str): the status
+        """
+
+        element_id = self.ids.get(element)
+        bit = self.bits.get(status)
+        if element_id is not None and bit is not None:
+            self.flags[element_id] &= ~bit
+
+    def has(self, element: Hashable, status: str) -> bool:
+        """ Checks whether the element has the status
+
+        Args:
+            element: the vertex or edge
+            status(str): the status
+        """
+
+        element_id = self.ids.get(element)
+        bit = self.bits.get(status)
+        return element_id is not None and bit is not None and \
+            bool(self.flags[element_id] & bit)
+
+    def get(self, element: Hashable, status: str) -> Any:
+        """ Returns the value of the status of the element
+
+        Args:
+            element: the vertex or edge
+            status(str): the status
+
+        Returns:
+            The value, or False if the element doesn't have the status
+        """
+
+        if not self.has(element, status):
+            return False
+        column = self.columns.get(status)
+        return True if column is None else column.item(self.ids[element])
+
+    def get_elements(self, status: str) -> Set[Hashable]:
+        """ Returns the elements that have the status
+
+        Args:
+            status(str): the status
+        """
+
+        bit = self.bits.get(status)
+        if bit is None:
+            return set()
+        flags = self.flags[:len(self.elements)]
+        return {self.elements[element_id]
+                for element_id in np.flatnonzero(flags & bit)}
+
+    def get_members(self) -> Dict[str, Set[Hashable]]:
+        """ Returns, for every status, the elements that have it """
+
+        return {status: self.get_elements(status) for status in self.bits}
+
+    def copy(self) -> "StateStore":
+        """ Returns a copy of the store that changes apart from it. The
+        elements themselves are shared """
+
+        state_store = StateStore(capacity=len(self.flags))
+        state_store.ids = dict(self.ids)
+        state_store.elements = list(self.elements)
+        state_store.flags = self.flags.copy()
+        state_store.bits = dict(self.bits)
+        state_store.columns = {status: column.copy()
+                               for status, column in self.columns.items()}
+        return state_store
+
+    def get_flags(self, elements: Iterable[Hashable]) -> np.ndarray:
+        """ Returns the flags of the elements, no flags for an element that
+        never had a status
+
+        Args:
+            elements: the vertices or edges
+        """
+
+        ids = np.fromiter((self.ids.get(element, -1) for element in elements),
+                          dtype=np.intp)
+        flags = np.zeros(len(ids), dtype=np.uint64)
+        known = ids >= 0
+        flags[known] = self.flags[ids[known]]
+        return flags
+
+    def get_codes(self, elements: Iterable[Hashable],
+                  statuses: Sequence[str]) -> np.ndarray:
+        """ Returns, for every element, the index of the first of the
+        statuses that the element has, or the number of statuses if it has
+        none of them. The statuses are thus ordered by precedence
+
+        Args:
+            elements: the vertices or edges
+            statuses(list): the statuses, by precedence
+        """
+
+        flags = self.get_flags(elements)
+        codes = np.full(len(flags), len(statuses), dtype=np.intp)
+        for code in range(len(statuses) - 1, -1, -1):
+            bit = self.bits.get(statuses[code])
+            if bit is not None:
+                codes[(flags & bit) != 0] = code
+        return codes
+
+    def get_code(self, element: Hashable, statuses: Sequence[str]) -> int:
+        """ Returns the code of a single element (see get_codes)
+
+        Args:
+            element: the vertex or edge
+            statuses(list): the statuses, by precedence
+        """
+
+        return next((code for code, status in enumerate(statuses)
+                     if self.has(element, status)), len(statuses))
+
+
+def get_dtype(value: Any) -> np.dtype:
+    """ Function that returns the type of the column that can hold the value
+
+    Args:
+        value: the value of a status
+    """
+
+    if isinstance(value, bool):
+        return np.dtype(object)
+    if isinstance(value, int) and \
+            StateStore.INT_MIN <= value <= StateStore.INT_MAX:
+        return np.dtype(np.int64)
+    if isinstance(value, float):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def resize(array: np.ndarray, capacity: int) -> np.ndarray:
+    """ Function that returns a copy of the array with a larger capacity,
+    the new entries being empty
+
+    Args:
+        array(ndarray): the flags or a column
+        capacity(int): the new capacity
+    """
+
+    resized = np.zeros(capacity, dtype=array.dtype)
+    resized[:len(array)] = array
+    return resized
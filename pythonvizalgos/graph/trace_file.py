@@ -0,0 +1,326 @@
+from pythonalgos.graph.directed_graph import DirectedGraph
+from pythonalgos.graph.vertex import Vertex
+from pythonalgos.graph.edge import Edge
+from pythonvizalgos.graph.viz_tracing import VizTracing, TraceEvent
+from bisect import bisect_right
+from typing import Any, BinaryIO, Dict, List, Mapping, Tuple, \
+    Union
+import json
+import struct
+
+""" Module that saves a recorded tracing to a trace file and reads it back.
+
+A trace file starts with the topology of the directed graph, followed by a
+record per frame with the status changes since the previous frame. Every
+KEYFRAME_INTERVAL frames, a keyframe holds the complete state, so that the
+state at any frame is rebuilt from the nearest keyframe instead of from the
+start. An index of the frames and the keyframes closes the file.
+
+Every record is a type byte and a length, followed by compact JSON. Vertices
+are referred to by their label, edges by the labels of their tail and head,
+so the labels must be numbers or strings.
+
+Usage:
+    write_trace(viz_tracing, "trace.pvt")
+    with TraceReader("trace.pvt") as reader:
+        reader.replay(viz_tracing, first=100, last=200)
+"""
+
+MAGIC = b"PVATRACE"
+VERSION = 1
+KEYFRAME_INTERVAL = 100
+
+RECORD_TOPOLOGY = b"T"
+RECORD_FRAME = b"F"
+RECORD_KEYFRAME = b"K"
+RECORD_INDEX = b"I"
+
+RECORD_HEADER = struct.Struct(">cI")
+VERSION_HEADER = struct.Struct(">I")
+FOOTER = struct.Struct(">Q")
+
+DELTA_SET = 0
+DELTA_RESET = 1
+
+ElementRef = Union[Any, List[Any], None]
+
+
+def write_trace(viz_tracing: VizTracing, file_path: str,
+                keyframe_interval: int = KEYFRAME_INTERVAL):
+    """ Function that writes the recorded events of a tracing to a trace
+    file. The status changes after the last snapshot are left out, they
+    don't show in any frame
+
+    Args:
+        viz_tracing(VizTracing): the tracing, recorded (see record)
+        file_path(str): the path of the trace file
+        keyframe_interval(int): the number of frames between keyframes
+    """
+
+    state: Dict[Tuple[Any, str], Any] = {}
+    deltas: List[List[Any]] = []
+    frame_offsets: List[int] = []
+    keyframes: List[List[int]] = []
+    with open(file_path, "wb") as trace_file:
+        trace_file.write(MAGIC + VERSION_HEADER.pack(VERSION))
+        write_record(trace_file, RECORD_TOPOLOGY, {"vertices": [
+            [vertex.get_label(),
+             [edge.get_head().get_label() for edge in vertex.get_edges()]]
+            for vertex in viz_tracing.get_directed_graph().get_vertices()]})
+
+        for event in viz_tracing.events:
+            if event.kind == VizTracing.EVENT_SNAPSHOT:
+                activated = get_element_ref(event.element)
+                frame_offsets.append(trace_file.tell())
+                write_record(trace_file, RECORD_FRAME, {
+                    "deltas": deltas, "activated": activated,
+                    "milestone": event.value})
+                deltas = []
+                if len(frame_offsets) % keyframe_interval == 0:
+                    keyframes.append([len(frame_offsets), trace_file.tell()])
+                    write_record(trace_file, RECORD_KEYFRAME, {
+                        "state": [[element_ref, status, value]
+                                  for (element_ref, status), value
+                                  in state.items()],
+                        "activated": activated})
+            else:
+                element_ref = get_element_ref(event.element)
+                key = (get_state_key(element_ref), event.status)
+                if event.kind == VizTracing.EVENT_SET_STATUS:
+                    deltas.append([DELTA_SET, element_ref, event.status,
+                                   event.value])
+                    state[key] = event.value
+                else:
+                    deltas.append([DELTA_RESET, element_ref, event.status,
+                                   event.value])
+                    state.pop(key, None)
+
+        index_offset = trace_file.tell()
+        write_record(trace_file, RECORD_INDEX, {"frames": frame_offsets,
+                                                "keyframes": keyframes})
+        trace_file.write(FOOTER.pack(index_offset))
+
+
+def write_record(trace_file: BinaryIO, record_type: bytes, record: Any):
+    """ Function that writes a length-prefixed record
+
+    Args:
+        trace_file: the trace file
+        record_type(bytes): the type of the record
+        record: the content of the record, a JSON value
+    """
+
+    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    trace_file.write(RECORD_HEADER.pack(record_type, len(payload)))
+    trace_file.write(payload)
+
+
+def get_element_ref(element: Union[Vertex, Edge, None]) -> ElementRef:
+    """ Function that returns the reference of a vertex or an edge in a
+    trace file: the label of a vertex, the labels of the tail and the head
+    of an edge
+
+    Args:
+        element: the vertex or the edge
+    """
+
+    if element is None:
+        return None
+    if isinstance(element, Edge):
+        return [element.get_tail().get_label(),
+                element.get_head().get_label()]
+    return element.get_label()
+
+
+def get_state_key(element_ref: ElementRef) -> Any:
+    return tuple(element_ref) if isinstance(element_ref, list) \
+        else element_ref
+
+
+class TraceReader:
+    """ Class that reads a trace file. It rebuilds the state at any frame
+    from the nearest keyframe and replays ranges of frames on a tracing """
+
+    def __init__(self, file_path: str):
+        """ Opens the trace file and reads its topology and index
+
+        Args:
+            file_path(str): the path of the trace file
+
+        Raises:
+            Exception: if the file is not a trace file of this version
+        """
+
+        self.file_path = file_path
+        self.trace_file = open(file_path, "rb")
+        try:
+            header = self.trace_file.read(len(MAGIC) + VERSION_HEADER.size)
+            if header[:len(MAGIC)] != MAGIC:
+                raise Exception(file_path + " is not a trace file")
+            version = VERSION_HEADER.unpack(header[len(MAGIC):])[0]
+            if version != VERSION:
+                raise Exception("Unsupported trace file version " +
+                                str(version) + " of " + file_path)
+            self.topology: List[List[Any]] = \
+                self.read_record(RECORD_TOPOLOGY)["vertices"]
+
+            self.trace_file.seek(-FOOTER.size, 2)
+            index = self.read_record(
+                RECORD_INDEX, FOOTER.unpack(self.trace_file.read())[0])
+        except Exception:
+            self.trace_file.close()
+            raise
+        self.frame_offsets: List[int] = index["frames"]
+        self.keyframe_nos: List[int] = [no for no, _ in index["keyframes"]]
+        self.keyframe_offsets: List[int] = \
+            [offset for _, offset in index["keyframes"]]
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+    def close(self):
+        self.trace_file.close()
+
+    def read_record(self, record_type: bytes, offset: int = None) -> Any:
+        """ Reads a record, at the offset or at the current position
+
+        Args:
+            record_type(bytes): the expected type of the record
+            offset(int): the offset of the record in the file
+
+        Raises:
+            Exception: if the record has another type
+        """
+
+        if offset is not None:
+            self.trace_file.seek(offset)
+        found_type, length = RECORD_HEADER.unpack(
+            self.trace_file.read(RECORD_HEADER.size))
+        if found_type != record_type:
+            raise Exception("Corrupt trace file " + self.file_path +
+                            ": expected a " + record_type.decode() +
+                            " record, found " + found_type.decode())
+        return json.loads(self.trace_file.read(length).decode("utf-8"))
+
+    def get_frame_count(self) -> int:
+        """ Returns the number of frames in the trace """
+
+        return len(self.frame_offsets)
+
+    def create_directed_graph(self) -> DirectedGraph:
+        """ Creates a directed graph with the topology of the trace,
+        without any statuses """
+
+        return DirectedGraph({label: heads for label, heads in self.topology})
+
+    def get_state(self, frame_no: int) -> \
+            Tuple[Mapping[Tuple[Any, str], Any], ElementRef]:
+        """ Rebuilds the state at a frame from the nearest keyframe before
+        it. Frame 0 is the state before the first frame
+
+        Args:
+            frame_no(int): the number of the frame, from 1
+
+        Returns:
+            The statuses, keyed on the reference of the vertex or edge and
+            the status, and the reference of the activated vertex
+        """
+
+        if not 0 <= frame_no <= self.get_frame_count():
+            raise Exception("Frame " + str(frame_no) + " is not in " +
+                            self.file_path)
+        state: Dict[Tuple[Any, str], Any] = {}
+        activated = None
+        first = 1
+        idx = bisect_right(self.keyframe_nos, frame_no) - 1
+        if idx >= 0:
+            keyframe = self.read_record(RECORD_KEYFRAME,
+                                        self.keyframe_offsets[idx])
+            for element_ref, status, value in keyframe["state"]:
+                state[(get_state_key(element_ref), status)] = value
+            activated = keyframe["activated"]
+            first = self.keyframe_nos[idx] + 1
+
+        for no in range(first, frame_no + 1):
+            frame = self.read_record(RECORD_FRAME, self.frame_offsets[no - 1])
+            for kind, element_ref, status, value in frame["deltas"]:
+                key = (get_state_key(element_ref), status)
+                if kind == DELTA_SET:
+                    state[key] = value
+                else:
+                    state.pop(key, None)
+            activated = frame["activated"]
+        return state, activated
+
+    def read_events(self, directed_graph: DirectedGraph, first: int = 1,
+                    last: int = None) -> List[TraceEvent]:
+        """ Returns the events of a range of frames. The events start with
+        the state before the first frame of the range
+
+        Args:
+            directed_graph(DirectedGraph): the directed graph that the
+                events refer to, with the topology of the trace
+            first(int): the first frame, from 1
+            last(int): the last frame, by default the last of the trace
+
+        Returns:
+            The events, with a snapshot event per frame
+        """
+
+        last = self.get_frame_count() if last is None else last
+        if not 1 <= first <= last + 1 or last > self.get_frame_count():
+            raise Exception("Frames " + str(first) + " to " + str(last) +
+                            " are not in " + self.file_path)
+        vertices = {vertex.get_label(): vertex
+                    for vertex in directed_graph.get_vertices()}
+        edges = {(edge.get_tail().get_label(), edge.get_head().get_label()):
+                 edge
+                 for vertex in vertices.values()
+                 for edge in vertex.get_edges()}
+
+        def resolve(element_ref: ElementRef) -> Union[Vertex, Edge, None]:
+            if element_ref is None:
+                return None
+            element = edges.get(tuple(element_ref)) \
+                if isinstance(element_ref, (list, tuple)) \
+                else vertices.get(element_ref)
+            if element is None:
+                raise Exception("Element " + str(element_ref) +
+                                " of the trace is not in the directed graph")
+            return element
+
+        state, _ = self.get_state(first - 1)
+        events = [TraceEvent(VizTracing.EVENT_SET_STATUS,
+                             resolve(element_ref), status, value)
+                  for (element_ref, status), value in state.items()]
+        for no in range(first, last + 1):
+            frame = self.read_record(RECORD_FRAME, self.frame_offsets[no - 1])
+            for kind, element_ref, status, value in frame["deltas"]:
+                events.append(TraceEvent(
+                    VizTracing.EVENT_SET_STATUS if kind == DELTA_SET
+                    else VizTracing.EVENT_RESET_STATUS,
+                    resolve(element_ref), status, value))
+            events.append(TraceEvent(VizTracing.EVENT_SNAPSHOT,
+                                     resolve(frame["activated"]),
+                                     value=frame["milestone"]))
+        return events
+
+    def replay(self, viz_tracing: VizTracing, first: int = 1,
+               last: int = None):
+        """ Renders a range of frames of the trace with a tracing. The
+        frames of the range are numbered from 1
+
+        Args:
+            viz_tracing(VizTracing): the tracing, on a directed graph with
+                the topology of the trace and without statuses (see
+                create_directed_graph)
+            first(int): the first frame, from 1
+            last(int): the last frame, by default the last of the trace
+        """
+
+        viz_tracing.events = self.read_events(
+            viz_tracing.get_directed_graph(), first, last)
+        viz_tracing.replay()
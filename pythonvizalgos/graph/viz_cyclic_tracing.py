@@ -1,5 +1,5 @@
-from pythonvizalgos.graph.viz_tracing import VizTracingAdvisor
-from typing import List, Mapping
+from pythonvizalgos.graph.viz_tracing import VizTracing, VizTracingAdvisor
+from typing import List, Mapping, Any
 from pythonalgos.graph.vertex import Vertex
 from pythonalgos.util import path_tools as pt
 from pythonvizalgos.util import video_tools as vt
@@ -39,10 +39,11 @@ class VizCyclicTracing(VizTracingGraphviz):
 
     def __init__(self, path: str, directed_graph: DirectedGraph,
                  vertex_states: List[Mapping[str, Mapping[str, str]]] = None,
-                 edge_states: List[Mapping[str, Mapping[str, str]]] = None) \
-            -> None:
+                 edge_states: List[Mapping[str, Mapping[str, str]]] = None,
+                 **kwargs: Any) -> None:
         super().__init__(path=path, directed_graph=directed_graph,
-                         vertex_states=vertex_states, edge_states=edge_states)
+                         vertex_states=vertex_states, edge_states=edge_states,
+                         **kwargs)
 
     def execute(self, resource_path: str):
         """ Main function that takes a number of vertices
@@ -57,8 +58,15 @@ class VizCyclicTracing(VizTracingGraphviz):
         """
 
         super().execute(resource_path)
-        self.get_directed_graph().is_cyclic(VizCyclicTracingAdvisor(self))
-        vt.convert_images_to_video(pt.get_dir_in_user_home(resource_path))
+        with self.instrumentation.time(VizTracing.METRIC_EXECUTE_ALGORITHM):
+            self.get_directed_graph().is_cyclic(VizCyclicTracingAdvisor(self))
+        if self.recording:
+            with self.instrumentation.time(VizTracing.METRIC_EXECUTE_REPLAY):
+                self.replay()
+        with self.instrumentation.time(VizTracing.METRIC_EXECUTE_FLUSH):
+            self.flush()
+        with self.instrumentation.time(VizTracing.METRIC_EXECUTE_VIDEO):
+            self.create_video(resource_path)
 
 
 class VizCyclicTracingAdvisor(VizTracingAdvisor):
@@ -96,7 +104,8 @@ class VizCyclicTracingAdvisor(VizTracingAdvisor):
 
         self.viz_tracing.set_status(head, VizCyclicTracing.IN_CYCLE)
         self.viz_tracing.change_activated_vertex(directed_graph, head)
-        self.viz_tracing.snapshot(directed_graph)
+        self.viz_tracing.snapshot(directed_graph,
+                                  VizTracing.MILESTONE_CYCLE_FOUND)
 
     def no_cycle_reported_recursive(self, directed_graph: DirectedGraph,
                                     vertex: Vertex) -> None:
@@ -1,5 +1,6 @@
-from typing import List, Mapping, Set
+from typing import List, Mapping, Set, Any, Union
 from pythonalgos.graph.vertex import Vertex
+from pythonalgos.graph.edge import Edge
 from pythonalgos.util import path_tools as pt
 from pythonvizalgos.util import video_tools as vt
 from pythonalgos.graph.directed_graph import DirectedGraph
@@ -8,6 +9,9 @@ from pythonvizalgos.graph.viz_tracing_networkx import\
 from pythonvizalgos.graph.viz_tracing import\
     VizTracingAdvisor
 from pythonvizalgos.graph.viz_tracing import VizTracing
+from matplotlib.colors import to_rgba_array
+import inspect
+import numpy as np
 
 
 """ Module that defines a tracing class to be used for tracing of kosoraju
@@ -40,6 +44,10 @@ class VizSccsKosarajuTracing(VizTracingNetworkx):
 
     LABEL_ATTRIBUTES = [STACK_IDX, SCC_IDX]
 
+    SCC_COLORS: List[str] = [
+        "tab:blue", "tab:orange", "tab:green", "tab:red", "tab:purple",
+        "tab:brown", "tab:pink", "tab:olive", "tab:cyan", "tab:gray"]
+
     def get_vertex_label_attributes(self) -> List[str]:
         """ This classmethod retrieves the list of vertex label attributes
         of this class.
@@ -50,9 +58,42 @@ class VizSccsKosarajuTracing(VizTracingNetworkx):
 
     def __init__(self, path: str, directed_graph: DirectedGraph,
                  vertex_states: Mapping[str, Mapping[str, str]],
-                 edge_states: Mapping[str, Mapping[str, str]]) -> None:
+                 edge_states: Mapping[str, Mapping[str, str]],
+                 condense_sccs: bool = False, reveal_sccs: bool = False,
+                 vertex_detail: bool = True, **kwargs: Any) -> None:
+        """ Method that initialises the tracing functionality
+
+        Args:
+            path: the path that will contain the generated trace images
+            directed_graph(DirectedGraph): the directed graph
+            vertex_states(list): a list of stated definitions (see class) for
+                the vertices
+            edge_states(list): a list of stated definitions (see class) for
+                the edges
+            condense_sccs(bool): if True, the vertices of a completed SCC
+                are drawn as one supernode, labelled with the size of the
+                SCC, so the frames show the condensation of the directed
+                graph as it's found
+            reveal_sccs(bool): if True, the pass over the reversed directed
+                graph only takes a frame per completed SCC, in which all
+                vertices of the SCC appear at once in a color of their own
+                (see SCC_COLORS), instead of a frame per visited vertex
+            vertex_detail(bool): if False, no frame is taken per vertex in
+                either pass, so that the frames only show the milestones.
+                With a Kosaraju algorithm that has no join points, as in
+                python-algos 0.16, the SCCs are only known once it has
+                finished: they are condensed or revealed one by one after
+                the reversal of the directed graph, and there are no frames
+                per vertex (see VizSccsKosarajuTracingAdvisor.create_sccs)
+            **kwargs: the tracing options of VizTracing"""
+
+        self.condense_sccs = condense_sccs
+        self.reveal_sccs = reveal_sccs
+        self.vertex_detail = vertex_detail
+        self.graph_reversed = False
         super().__init__(path=path, directed_graph=directed_graph,
-                         vertex_states=vertex_states, edge_states=edge_states)
+                         vertex_states=vertex_states, edge_states=edge_states,
+                         **kwargs)
         self.check_states(vertex_states, edge_states)
 
     def check_states(self,
@@ -73,6 +114,96 @@ class VizSccsKosarajuTracing(VizTracingNetworkx):
             raise Exception(
                 VizTracing.DEFAULT + " not found in vertex states")
 
+    def get_condensation(self, directed_graph: DirectedGraph) ->\
+            Mapping[Vertex, Any]:
+        """ Returns the vertices of the completed SCCs with the key of the
+        supernode of their SCC, if the SCCs are condensed. The completed
+        SCCs are known from the state store
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
+
+        if not self.condense_sccs:
+            return {}
+        return {vertex: (VizSccsKosarajuTracing.SCC_IDX,
+                         self.get_status(vertex,
+                                         VizSccsKosarajuTracing.SCC_IDX))
+                for vertex in self.get_status_members(
+                    VizSccsKosarajuTracing.SCC_IDX)}
+
+    def is_vertex_detail(self) -> bool:
+        """ Checks whether the current pass of the algorithm takes a frame
+        per vertex """
+
+        return self.vertex_detail and \
+            not (self.reveal_sccs and self.graph_reversed)
+
+    def create_style_lookups(self):
+        """ Extends the fill colors of the vertex states with the colors
+        of the SCCs, when the SCCs are revealed """
+
+        super().create_style_lookups()
+        self.scc_code_offset = len(self.vertex_color_lookup)
+        if self.reveal_sccs:
+            self.vertex_color_lookup = np.concatenate(
+                [self.vertex_color_lookup,
+                 to_rgba_array(VizSccsKosarajuTracing.SCC_COLORS)])
+
+    def get_state_code(self, element: Union[Vertex, Edge]) -> int:
+        """ Returns the code of the color of the SCC of a vertex whose SCC
+        has been revealed, otherwise the code of its state
+
+        Args:
+            element: the vertex or edge
+        """
+
+        if self.reveal_sccs and isinstance(element, Vertex):
+            scc_idx = self.get_status(element,
+                                      VizSccsKosarajuTracing.SCC_IDX)
+            if scc_idx is not False:
+                return self.get_scc_code(scc_idx)
+        return super().get_state_code(element)
+
+    def get_vertex_codes(self, vertices: List[Vertex]) -> np.ndarray:
+        """ Returns the codes of the vertices at once, the vertices of a
+        revealed SCC get the code of the color of their SCC
+
+        Args:
+            vertices(list): the vertices
+        """
+
+        codes = super().get_vertex_codes(vertices)
+        if self.reveal_sccs:
+            for idx, vertex in enumerate(vertices):
+                scc_idx = self.get_status(vertex,
+                                          VizSccsKosarajuTracing.SCC_IDX)
+                if scc_idx is not False:
+                    codes[idx] = self.get_scc_code(scc_idx)
+        return codes
+
+    def get_scc_code(self, scc_idx: int) -> int:
+        """ Returns the code of the color of an SCC. The colors repeat when
+        there are more SCCs than colors
+
+        Args:
+            scc_idx(int): the index of the SCC
+        """
+
+        return self.scc_code_offset + \
+            scc_idx % len(VizSccsKosarajuTracing.SCC_COLORS)
+
+    def get_supernode_label(self, key: Any, size: int) -> str:
+        """ Returns the label of the supernode of an SCC: its index and
+        its size
+
+        Args:
+            key: the key of the supernode
+            size(int): the number of vertices in the SCC
+        """
+
+        return key[0] + str(key[1]) + " (" + str(size) + ")"
+
     def execute(self, resource_path: str, nontrivial: bool):
         """ Method that takes a number of vertices
         (of a directed graph), invokes the kosaraju sccs functionality
@@ -86,16 +217,75 @@ class VizSccsKosarajuTracing(VizTracingNetworkx):
         """
 
         super().execute(resource_path)
-        self.get_directed_graph().\
-            create_sccs_kosaraju_dfs(
-                nontrivial, VizSccsKosarajuTracingAdvisor(self))
+        self.graph_reversed = False
+        with self.instrumentation.time(VizTracing.METRIC_EXECUTE_ALGORITHM):
+            VizSccsKosarajuTracingAdvisor(self).create_sccs(
+                self.get_directed_graph(), nontrivial)
+        if self.recording:
+            with self.instrumentation.time(VizTracing.METRIC_EXECUTE_REPLAY):
+                self.replay()
+        with self.instrumentation.time(VizTracing.METRIC_EXECUTE_FLUSH):
+            self.flush()
 
 
 class VizSccsKosarajuTracingAdvisor(VizTracingAdvisor):
     """ Module that contains the logic for inserting advice at join points for
-    visualization of the sccs kosaraju algorithm
+    visualization of the sccs kosaraju algorithm. The advice that takes a
+    frame per vertex is left out in a pass without vertex detail (see
+    VizSccsKosarajuTracing.is_vertex_detail)
     """
 
+    def create_sccs(self, directed_graph: DirectedGraph,
+                    nontrivial: bool) -> List[Set[Vertex]]:
+        """ Runs Kosaraju's algorithm on the directed graph with this
+        advisor. A create_sccs_kosaraju_dfs that takes no advisor, as in
+        python-algos 0.16, has no join points: the frames then show the
+        directed graph, its reversal and the SCCs of the result, one by
+        one, as if each SCC had just been completed. No frame is taken
+        per vertex and the stack is not shown
+
+        Args:
+            directed_graph(DirectedGraph): The directed graph
+            nontrivial(bool): if True, only the nontrivial SCCs are found
+
+        Returns:
+            The SCCs
+        """
+
+        if takes_advisor(directed_graph):
+            return directed_graph.create_sccs_kosaraju_dfs(nontrivial, self)
+        self.viz_tracing.snapshot(directed_graph)
+        sccs = directed_graph.create_sccs_kosaraju_dfs(nontrivial)
+        self.reverse_directed_graph(directed_graph)
+        for idx, scc in enumerate(sccs):
+            self.scc_completed(directed_graph, scc, idx)
+        return sccs
+
+    def visit_vertex(self, directed_graph: DirectedGraph, vertex: Vertex):
+        """ Advice that activates a visited vertex, in a pass with vertex
+        detail
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+            vertex: the vertex that should get the status "visited"
+        """
+
+        if self.viz_tracing.is_vertex_detail():
+            super().visit_vertex(directed_graph, vertex)
+
+    def vertex_already_visited(self, directed_graph: DirectedGraph,
+                               edge: Edge):
+        """ Advice that disables an edge to a visited vertex for a frame, in
+        a pass with vertex detail
+
+        Args:
+            directed_graph(DirectedGraph): The directed graph
+            edge(Edge): the edge to be disabled
+        """
+
+        if self.viz_tracing.is_vertex_detail():
+            super().vertex_already_visited(directed_graph, edge)
+
     def add_vertex_to_stack(self, directed_graph: DirectedGraph,
                             vertex: Vertex,
                             idx: int) -> None:
@@ -109,7 +299,26 @@ class VizSccsKosarajuTracingAdvisor(VizTracingAdvisor):
 
         self.viz_tracing.set_status(vertex, VizSccsKosarajuTracing.STACK_IDX,
                                     idx)
-        self.viz_tracing.snapshot(directed_graph)
+        if self.viz_tracing.is_vertex_detail():
+            self.viz_tracing.snapshot(directed_graph)
+
+    def scc_completed(self, directed_graph: DirectedGraph,
+                      scc: Set[Vertex], idx: int) -> None:
+        """ Advice that tags the vertices of an SCC, once the SCC has been
+        completed, with the index of the SCC. Without the join point, it's
+        called for the SCCs of the result (see create_sccs)
+
+        Args:
+            directed_graph(DirectedGraph): The directed graph
+            scc(set): the vertices of the SCC
+            idx: the index of the SCC
+        """
+
+        for vertex in scc:
+            self.viz_tracing.set_status(vertex, VizSccsKosarajuTracing.SCC_IDX,
+                                        idx)
+        self.viz_tracing.snapshot(directed_graph,
+                                  VizTracing.MILESTONE_SCC_COMPLETED)
 
     def reverse_directed_graph(self, directed_graph: DirectedGraph) -> None:
         """ Advice that handles the reversing of the directed graph.
@@ -119,8 +328,23 @@ class VizSccsKosarajuTracingAdvisor(VizTracingAdvisor):
             directed_graph(DirectedGraph): The directed graph
         """
 
+        self.viz_tracing.graph_reversed = True
+        self.viz_tracing.reset_rendering(topology=True)
         self.viz_tracing.reset_attrs(directed_graph)
         self.viz_tracing.activate_graph(directed_graph)
-        self.viz_tracing.snapshot(directed_graph)
+        self.viz_tracing.snapshot(directed_graph,
+                                  VizTracing.MILESTONE_GRAPH_REVERSED)
         self.viz_tracing.deactivate_graph(directed_graph)
         self.viz_tracing.snapshot(directed_graph)
+
+
+def takes_advisor(directed_graph: DirectedGraph) -> bool:
+    """ Function that checks whether the Kosaraju algorithm of the directed
+    graph has join points, i.e. takes an advisor
+
+    Args:
+        directed_graph(DirectedGraph): The directed graph
+    """
+
+    return len(inspect.signature(
+        directed_graph.create_sccs_kosaraju_dfs).parameters) > 1
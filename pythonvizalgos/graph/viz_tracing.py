@@ -2,13 +2,47 @@ from pythonalgos.graph.vertex import Vertex
 from pythonalgos.graph.edge import Edge
 from pythonalgos.util.advisor import Advisor
 from pythonalgos.util import path_tools as pt
+from pythonvizalgos.util import video_tools as vt
+from pythonvizalgos.util.instrumentation import Instrumentation
+from pythonvizalgos.util.frame_cache import FrameCache, remove_target
+from pythonvizalgos.graph.snapshot_policy import SnapshotPolicy
+from pythonvizalgos.graph.state_store import StateStore
 from pythonalgos.graph.directed_graph import DirectedGraph
-from typing import List, Mapping, Union, Any
+from os import path
+import os
+from collections import deque
+from concurrent.futures import Future
+from queue import Queue
+from threading import Thread
+import copy
+from typing import List, Mapping, Union, Any, NamedTuple, Optional, Set, \
+    Dict, FrozenSet, Tuple
 
 """ Module that defines a tracing class to be used for tracing of all sorts
 of algorithms in relation to directed graphs """
 
 
+class TraceEvent(NamedTuple):
+    """ A compact state delta that is logged while a tracing is recorded.
+    The element is the vertex or edge that changed. A snapshot event holds
+    the activated vertex as its element and the milestone as its value """
+
+    kind: str
+    element: Union[Vertex, Edge, None] = None
+    status: Optional[str] = None
+    value: Any = None
+
+
+class RenderTask(NamedTuple):
+    """ The immutable description of the frames that a tracing hands over to
+    its render worker when it renders asynchronously: the state deltas since
+    the previous task, each snapshot being a snapshot event. The topology
+    is reset first, if it changed since the previous task """
+
+    events: Tuple[TraceEvent, ...]
+    topology_changed: bool = False
+
+
 class VizTracing:
 
     ACTIVATED: str = "activated"
@@ -18,12 +52,60 @@ class VizTracing:
     DEFAULT: str = "default"
     DEFAULT_STATE = None
 
+    EVENT_SET_STATUS: str = "set_status"
+    EVENT_RESET_STATUS: str = "reset_status"
+    EVENT_SNAPSHOT: str = "snapshot"
+
+    MILESTONE_CYCLE_FOUND: str = "cycle_found"
+    MILESTONE_SCC_COMPLETED: str = "scc_completed"
+    MILESTONE_GRAPH_REVERSED: str = "graph_reversed"
+
+    IMAGE_NAME_PREFIX: str = "VIZ_TRACING_"
+    IMAGE_TYPE: str = "png"
+    VIDEO_NAME: str = vt.VIDEO_NAME
+    VIDEO_FPS: float = 2.0
+    OVERVIEW_PATH: str = "overview"
+
+    FOCUS_SUMMARY: str = "__focus_summary__"
+
+    METRIC_ADVICE_PREFIX: str = "advice."
+    METRIC_SNAPSHOT_RECORDED: str = "snapshot.recorded"
+    METRIC_SNAPSHOT_QUEUED: str = "snapshot.queued"
+    METRIC_SNAPSHOT_QUEUE_WAIT: str = "snapshot.queue_wait"
+    METRIC_SNAPSHOT_DUPLICATE: str = "snapshot.duplicate"
+    METRIC_SNAPSHOT_SKIPPED: str = "snapshot.skipped"
+    METRIC_SNAPSHOT_RENDER: str = "snapshot.render"
+    METRIC_SNAPSHOT_BUILD: str = "snapshot.build"
+    METRIC_SNAPSHOT_LAYOUT: str = "snapshot.layout"
+    METRIC_SNAPSHOT_RASTERIZE: str = "snapshot.rasterize"
+    METRIC_SNAPSHOT_WRITE: str = "snapshot.write"
+    METRIC_IMAGE_BYTES: str = "images"
+    METRIC_EXECUTE_ALGORITHM: str = "execute.algorithm"
+    METRIC_EXECUTE_REPLAY: str = "execute.replay"
+    METRIC_EXECUTE_FLUSH: str = "execute.flush"
+    METRIC_EXECUTE_VIDEO: str = "execute.video"
+    METRIC_FRAME_CACHE_HIT: str = "frame_cache.hit"
+    METRIC_FRAME_CACHE_MISS: str = "frame_cache.miss"
+
+    RENDER_QUEUE_SIZE: int = 16
+
     def get_vertex_label_attributes(self) -> List[str]:
         return []
 
     def __init__(self, path: str, directed_graph: DirectedGraph,
                  vertex_states: Mapping[str, Mapping[str, str]],
-                 edge_states: Mapping[str, Mapping[str, str]]) -> None:
+                 edge_states: Mapping[str, Mapping[str, str]],
+                 record: bool = False, deduplicate: bool = False,
+                 stream_video: bool = False, write_images: bool = True,
+                 instrumentation: Instrumentation = None,
+                 snapshot_policies: List[SnapshotPolicy] = None,
+                 focus_hops: int = None, focus_overview: bool = False,
+                 render_async: bool = False,
+                 render_queue_size: int = RENDER_QUEUE_SIZE,
+                 frame_cache: FrameCache = None,
+                 video_fps: float = VIDEO_FPS,
+                 video_encoder: vt.EncoderSettings = None,
+                 video_size: Tuple[int, int] = None) -> None:
         """ Method that initialises the tracing functionality
 
         Args:
@@ -32,26 +114,138 @@ class VizTracing:
             vertex_states(list): a list of stated definitions (see class) for
                 the vertices
             edge_states(list): a list of stated definitions (see class) for
-                the edges"""
+                the edges
+            record(bool): if True, the advices only log state deltas and
+                snapshots, the frames are rendered afterwards by replay()
+            deduplicate(bool): if True, a snapshot that has the same state
+                as the previous frame is not rendered, the previous frame is
+                held longer instead (see get_frame_durations)
+            stream_video(bool): if True, the rendered frames are passed in
+                memory to a video writer, instead of converting the images
+                to a video afterwards
+            write_images(bool): if False, no image files are written. Only
+                applies when the video is streamed
+            instrumentation(Instrumentation): the instrumentation that
+                collects the metrics of the tracing, a new one by default
+                (see get_metrics)
+            snapshot_policies(list): the policies that decide which
+                snapshots become frames, e.g. a maximum number of frames or
+                only the milestones. A snapshot is taken when all policies
+                accept it (see SnapshotPolicy)
+            focus_hops(int): if given, a frame only shows the vertices
+                within this number of hops of the activated vertex, in
+                either direction, and a summary node for the rest of the
+                directed graph
+            focus_overview(bool): if True, in focus mode a small overview
+                image of the whole directed graph with the focus highlighted
+                is written per frame (see get_overview_image_name)
+            render_async(bool): if True, the frames are rendered by a
+                background worker while the algorithm goes on. A snapshot
+                only hands the state deltas over to the worker, through a
+                bounded queue. It can't be combined with recording
+            render_queue_size(int): the number of snapshots that can wait
+                for the worker, before a snapshot blocks the algorithm
+            frame_cache(FrameCache): if given, a frame that is in the cache,
+                e.g. from a previous run, is taken from it instead of being
+                rendered, and rendered frames are added to it
+            video_fps(float): the frame rate of the video
+            video_encoder(EncoderSettings): if given, the video is encoded
+                by an ffmpeg process with these settings, e.g. a modern
+                codec with a long GOP, instead of the OpenCV writer, which
+                remains the fallback when ffmpeg is not found
+            video_size(tuple): the width and height of a streamed video,
+                every frame is centered on it. By default, the size of the
+                first frame, onto which larger frames are scaled down"""
+
+        if record and render_async:
+            raise Exception(
+                "A recorded tracing can't be rendered asynchronously")
 
         self.path = path
         self.directed_graph = directed_graph
         self.vertex_states = vertex_states
         self.edge_states = edge_states
+        self.recording = record
+        self.events: List[TraceEvent] = []
+        self.snapshot_no = 1
+        self.changed_elements: Set[Union[Vertex, Edge]] = set()
+        self.state_store = StateStore()
+        self.extended_labels: Dict[Vertex, str] = {}
+        self.changed_labels: Set[Vertex] = set()
+        self.activated_vertex: Optional[Vertex] = None
+        self.deduplicate = deduplicate
+        self.frame_durations: List[int] = []
+        self.previous_frame_state: Optional[FrozenSet[Tuple]] = None
+        self.stream_video = stream_video
+        self.write_images = write_images or not stream_video
+        self.video_stream: Optional[vt.VideoStream] = None
+        self.streamed_frames: deque = deque()
+        self.instrumentation = instrumentation or Instrumentation()
+        self.snapshot_policies = list(snapshot_policies or [])
+        self.focus_hops = focus_hops
+        self.focus_overview = focus_overview and focus_hops is not None
+        self.focus_vertex: Optional[Vertex] = None
+        self.predecessors: Optional[Dict[Vertex, List[Vertex]]] = None
+        self.render_async = render_async
+        self.render_queue: Queue = Queue(maxsize=render_queue_size)
+        self.render_thread: Optional[Thread] = None
+        self.renderer: Optional[VizTracing] = None
+        self.render_exception: Optional[BaseException] = None
+        self.topology_changed = False
+        self.frame_cache = frame_cache
+        self.video_fps = video_fps
+        self.video_encoder = video_encoder
+        self.video_size = video_size
 
     def get_directed_graph(self) -> DirectedGraph:
         return self.directed_graph
 
+    def get_image_name(self, snapshot_no: int) -> str:
+        """ Returns the path of the image of the snapshot, without the
+        extension
+
+        Args:
+            snapshot_no(int): the number of the snapshot
+        """
+
+        return path.join(
+            self.path, VizTracing.IMAGE_NAME_PREFIX +
+            ("{:04d}".format(snapshot_no)))
+
+    def get_overview_image_name(self, snapshot_no: int) -> str:
+        """ Returns the path of the overview image of the snapshot, without
+        the extension. The overview images are kept apart from the frames
+
+        Args:
+            snapshot_no(int): the number of the snapshot
+        """
+
+        overview_path = path.join(self.path, VizTracing.OVERVIEW_PATH)
+        os.makedirs(overview_path, exist_ok=True)
+        return path.join(
+            overview_path, VizTracing.IMAGE_NAME_PREFIX +
+            ("{:04d}".format(snapshot_no)))
+
     def set_status(self, object: Union[Vertex, Edge], status: str,
                    value: Any = True):
-        """ Method that tags the vertex with the provided status
+        """ Method that tags the vertex with the provided status. The status
+        is kept in the state store of the tracing, not in the attributes of
+        the vertex or edge. When recording or rendering asynchronously, the
+        change is logged as well, to be rendered later
 
         Args:
             object: the vertex or edge for which the status must be set
             status(str): the status to be set
+            value: the value of the status, e.g. an index
         """
 
-        object.set_attr(status, value)
+        self.state_store.set(object, status, value)
+        if self.recording or self.render_async:
+            self.events.append(TraceEvent(
+                VizTracing.EVENT_SET_STATUS, object, status, value))
+        else:
+            self.changed_elements.add(object)
+            self.invalidate_label(object, status)
 
     def reset_status(self, object: Union[Vertex, Edge], status: str,
                      value: Any = False):
@@ -62,33 +256,86 @@ class VizTracing:
             status(str): the status to be reset
         """
 
-        object.set_attr(status, value)
+        self.state_store.reset(object, status)
+        if self.recording or self.render_async:
+            self.events.append(TraceEvent(
+                VizTracing.EVENT_RESET_STATUS, object, status, value))
+        else:
+            self.changed_elements.add(object)
+            self.invalidate_label(object, status)
+
+    def get_status(self, element: Union[Vertex, Edge], status: str) -> Any:
+        """ Returns the value of the status of the vertex or edge
+
+        Args:
+            element: the vertex or edge
+            status(str): the status
+
+        Returns:
+            The value, or False if the vertex or edge doesn't have the status
+        """
+
+        return self.state_store.get(element, status)
+
+    def invalidate_label(self, element: Union[Vertex, Edge], status: str):
+        """ Drops the cached extended label of a vertex when one of its
+        label attributes changed, and tracks the vertex as one whose label
+        changed (see pop_changed_labels)
+
+        Args:
+            element: the vertex or edge whose status changed
+            status(str): the status that changed
+        """
+
+        if status in self.get_vertex_label_attributes():
+            self.extended_labels.pop(element, None)
+            self.changed_labels.add(element)
+
+    def get_activated_vertex(self) -> Optional[Vertex]:
+        """ Returns the vertex that was activated last, if any """
+
+        return self.activated_vertex
+
+    def get_status_members(self, status: str) -> Set[Union[Vertex, Edge]]:
+        """ Returns the vertices and edges that currently have the status,
+        as kept in the state store
+
+        Args:
+            status(str): the status
+        """
+
+        return self.state_store.get_elements(status)
 
     def reset_attrs(self, directed_graph: DirectedGraph):
-        """ Method that resets all attributes of a vertex
+        """ Method that resets all statuses of the vertices. Only the vertices
+        that have a status are touched
 
         Args:
             directed_graph (DirectedGraph): The directed graph
-            vertex(Vertex): the vertex to be activated
         """
 
-        for v in directed_graph.get_vertices():
-            v.reset_attrs()
+        for status, members in self.state_store.get_members().items():
+            for v in [v for v in members if isinstance(v, Vertex)]:
+                self.reset_status(v, status)
+        self.activated_vertex = None
 
     def change_activated_vertex(self, directed_graph: DirectedGraph,
                                 vertex: Vertex):
         """ Method that sets the attribute "active" of the vertex to true.
-        It deactivates all other vertices
+        It deactivates all other vertices, which are known from the state
+        store, so the graph is not scanned
 
         Args:
             directed_graph (DirectedGraph): The directed graph
             vertex(Vertex): the vertex to be activated
         """
 
-        self.set_status(vertex, VizTracing.ACTIVATED)
-        for v in directed_graph.get_vertices():
-            if str(v.get_label()) != str(vertex.get_label()):
+        if not self.state_store.has(vertex, VizTracing.ACTIVATED):
+            self.set_status(vertex, VizTracing.ACTIVATED)
+        for v in self.get_status_members(VizTracing.ACTIVATED):
+            if v is not vertex:
                 self.reset_status(v, VizTracing.ACTIVATED)
+        self.activated_vertex = vertex
 
     def deactivate_graph(self, directed_graph: DirectedGraph):
         """ Method that resets the whole graph
@@ -97,8 +344,9 @@ class VizTracing:
             directed_graph (DirectedGraph): The directed graph
         """
 
-        for v in directed_graph.get_vertices():
+        for v in self.get_status_members(VizTracing.ACTIVATED):
             self.reset_status(v, VizTracing.ACTIVATED)
+        self.activated_vertex = None
 
     def activate_graph(self, directed_graph: DirectedGraph):
         """ Method that sets the attribute "active" of all vertices to
@@ -110,15 +358,564 @@ class VizTracing:
 
         for v in directed_graph.get_vertices():
             self.set_status(v, VizTracing.ACTIVATED)
+        self.activated_vertex = None
+
+    def snapshot(self, directed_graph: DirectedGraph,
+                 milestone: Optional[str] = None):
+        """ Take a snapshot of the current directed graph, if the snapshot
+        policies accept it. When recording, only the snapshot event is
+        logged. When rendering asynchronously, the snapshot is handed over
+        to the render worker
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+            milestone(str): if given, the snapshot is a keyframe of the
+                algorithm, e.g. VizTracing.MILESTONE_CYCLE_FOUND
+        """
+
+        if not self.accept_snapshot(milestone):
+            self.instrumentation.count(VizTracing.METRIC_SNAPSHOT_SKIPPED)
+        elif self.recording:
+            self.events.append(TraceEvent(VizTracing.EVENT_SNAPSHOT,
+                                          self.activated_vertex,
+                                          value=milestone))
+            self.instrumentation.count(VizTracing.METRIC_SNAPSHOT_RECORDED)
+        elif self.render_async:
+            self.events.append(TraceEvent(VizTracing.EVENT_SNAPSHOT,
+                                          self.activated_vertex,
+                                          value=milestone))
+            self.submit_render_task()
+            self.instrumentation.count(VizTracing.METRIC_SNAPSHOT_QUEUED)
+        else:
+            self.take_snapshot(directed_graph)
+
+    def accept_snapshot(self, milestone: Optional[str]) -> bool:
+        """ Asks every snapshot policy whether the snapshot becomes a frame
+
+        Args:
+            milestone(str): the milestone of the snapshot, if any
+
+        Returns:
+            True if all policies accept the snapshot
+        """
+
+        if not all([policy.accept(milestone)
+                    for policy in self.snapshot_policies]):
+            return False
+        for policy in self.snapshot_policies:
+            policy.taken(milestone)
+        return True
+
+    def take_snapshot(self, directed_graph: DirectedGraph):
+        """ Renders the frame of a snapshot, or holds the previous frame
+        longer when deduplicating and nothing changed
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
+
+        if self.deduplicate and self.is_duplicate_frame():
+            self.frame_durations[-1] += 1
+            self.instrumentation.count(VizTracing.METRIC_SNAPSHOT_DUPLICATE)
+        else:
+            with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_RENDER):
+                self.render_snapshot(directed_graph)
+            self.frame_durations.append(1)
+            self.drain_frames()
+
+    def get_frame_state(self) -> FrozenSet[Tuple]:
+        """ Returns the logical state of the current frame: every status
+        together with the vertex or edge that has it and its value """
+
+        return frozenset((status, element, self.get_status(element, status))
+                         for status, members in
+                         self.state_store.get_members().items()
+                         for element in members)
+
+    def is_duplicate_frame(self) -> bool:
+        """ Checks whether the current frame has the same logical state as
+        the previous one. When nothing changed since the previous frame, the
+        state is not even computed """
+
+        if self.previous_frame_state is not None and \
+                not self.changed_elements:
+            return True
+        frame_state = self.get_frame_state()
+        duplicate = frame_state == self.previous_frame_state
+        self.previous_frame_state = frame_state
+        return duplicate
+
+    def get_frame_durations(self) -> List[int]:
+        """ Returns, for every rendered frame, the number of snapshots it
+        stands for. A frame that was duplicated is held for longer """
+
+        return self.frame_durations
+
+    def render_snapshot(self, directed_graph: DirectedGraph):
+        """ Render a frame of the current directed graph. It's implemented
+        by the child classes of this class.
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
+
+        pass
+
+    def write_image(self, snapshot_no: int, image: bytes):
+        """ Writes the encoded image of a snapshot to its image file
+
+        Args:
+            snapshot_no(int): the number of the snapshot
+            image(bytes): the encoded image
+        """
+
+        image_name = self.get_image_name(snapshot_no) + "." + \
+            VizTracing.IMAGE_TYPE
+        self.remove_cached_image(image_name)
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_WRITE):
+            with open(image_name, "wb") as image_file:
+                image_file.write(image)
+        self.instrumentation.add_bytes(VizTracing.METRIC_IMAGE_BYTES,
+                                       len(image))
+
+    def restore_cached_frame(self, key: str) -> bool:
+        """ Takes the frame of the current snapshot from the frame cache,
+        instead of rendering it. The image is linked or copied and, when
+        the video is streamed, handed over to the video stream
+
+        Args:
+            key(str): the key of the frame (see FrameCache.create_key)
+
+        Returns:
+            True if the frame was cached
+        """
+
+        if self.frame_cache is None:
+            return False
+        image: Optional[bytes] = None
+        if self.write_images:
+            image_name = self.get_image_name(self.snapshot_no) + "." + \
+                VizTracing.IMAGE_TYPE
+            cached = self.frame_cache.get(key, image_name)
+            if cached and self.stream_video:
+                with open(image_name, "rb") as image_file:
+                    image = image_file.read()
+        else:
+            image = self.frame_cache.read(key)
+            cached = image is not None
+        if not cached:
+            self.instrumentation.count(VizTracing.METRIC_FRAME_CACHE_MISS)
+            return False
+        self.instrumentation.count(VizTracing.METRIC_FRAME_CACHE_HIT)
+        if self.stream_video:
+            self.stream_frame(self.snapshot_no, image)
+        return True
+
+    def cache_frame(self, key: str, image: Union[bytes, str]):
+        """ Adds a rendered frame to the frame cache, if any
+
+        Args:
+            key(str): the key of the frame
+            image: the encoded image, or the path of the image file
+        """
+
+        if self.frame_cache is not None:
+            self.frame_cache.put(key, image)
+
+    def remove_cached_image(self, image_name: str):
+        """ Removes an image of a previous run before another image is
+        written to its path, as it may be linked to a cached frame
+
+        Args:
+            image_name(str): the path of the image
+        """
+
+        if self.frame_cache is not None and self.frame_cache.link:
+            remove_target(image_name)
+
+    def stream_frame(self, snapshot_no: int, frame: Any):
+        """ Hands a rendered frame over to the video stream. The frame is
+        held back until its duration is final, that is until the next frame
+        is rendered or the tracing is flushed
+
+        Args:
+            snapshot_no(int): the number of the snapshot
+            frame: the encoded image, the decoded frame or a future of either
+        """
+
+        self.streamed_frames.append((snapshot_no, frame))
+
+    def drain_frames(self, final: bool = False):
+        """ Writes the frames whose duration is final to the video stream,
+        in the order of the snapshots
+
+        Args:
+            final(bool): if True, all frames are written, waiting for the
+                frames that are still being rendered
+        """
+
+        while self.streamed_frames:
+            snapshot_no, frame = self.streamed_frames[0]
+            if not final and (
+                    snapshot_no >= self.snapshot_no - 1 or
+                    isinstance(frame, Future) and not frame.done()):
+                break
+            self.streamed_frames.popleft()
+            if isinstance(frame, Future):
+                if frame.exception() is not None:
+                    continue
+                frame = frame.result()
+            if self.video_stream is None:
+                self.video_stream = vt.VideoStream(
+                    path.join(self.path, self.get_video_name()),
+                    fps=self.video_fps, instrumentation=self.instrumentation,
+                    encoder=self.video_encoder, size=self.video_size)
+            self.video_stream.write(frame,
+                                    self.frame_durations[snapshot_no - 1])
+
+    def get_video_name(self) -> str:
+        """ Returns the name of the video, with the extension of the
+        container of the video encoder if there is one """
+
+        return vt.get_video_name(VizTracing.VIDEO_NAME, self.video_encoder)
+
+    def create_video(self, resource_path: str):
+        """ Finishes the video of the tracing. A streamed video is closed,
+        otherwise the images are converted to a video
+
+        Args:
+            resource_path: the path that contains the generated resources
+        """
+
+        if self.stream_video:
+            if self.video_stream is not None:
+                self.video_stream.close()
+                self.video_stream = None
+        else:
+            vt.convert_images_to_video(
+                pt.get_dir_in_user_home(resource_path),
+                video_name=self.get_video_name(), fps=self.video_fps,
+                durations=self.get_frame_durations(),
+                instrumentation=self.instrumentation,
+                encoder=self.video_encoder)
+
+    def pop_changed_elements(self) -> Set[Union[Vertex, Edge]]:
+        """ Returns the vertices and edges whose status changed since the
+        previous call and starts tracking anew """
+
+        changed_elements = self.changed_elements
+        self.changed_elements = set()
+        return changed_elements
+
+    def pop_changed_labels(self) -> Set[Vertex]:
+        """ Returns the vertices whose extended label changed since the
+        previous call and starts tracking anew. A label only changes when a
+        label attribute of its vertex is set or reset """
+
+        changed_labels = self.changed_labels
+        self.changed_labels = set()
+        return changed_labels
+
+    def reset_rendering(self, topology: bool = False):
+        """ Drops everything a child class keeps between frames. It's called
+        when the styling or the topology of the directed graph changes
+
+        Args:
+            topology(bool): True if the topology of the directed graph
+                changed
+        """
+
+        self.previous_frame_state = None
+        if topology:
+            self.predecessors = None
+            self.extended_labels = {}
+            self.topology_changed = self.render_async
+
+    def get_focus(self, directed_graph: DirectedGraph) ->\
+            Optional[Dict[Vertex, int]]:
+        """ Returns the vertices in focus, that is within focus_hops of the
+        activated vertex, in the order in which they're reached. Without an
+        activated vertex the focus stays where it was. Only the neighborhood
+        is visited, not the whole directed graph
 
-    def snapshot(self, directed_graph: DirectedGraph):
-        """ Take a snapshot of the current directed graph
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+
+        Returns:
+            The vertices in focus with their distance in hops, or None when
+            the focus mode is off
+        """
+
+        if self.focus_hops is None:
+            return None
+        if self.activated_vertex is not None:
+            self.focus_vertex = self.activated_vertex
+        elif self.focus_vertex is None:
+            self.focus_vertex = next(iter(directed_graph.get_vertices()),
+                                     None)
+        if self.focus_vertex is None:
+            return {}
+
+        focus = {self.focus_vertex: 0}
+        frontier = [self.focus_vertex]
+        for hops in range(1, self.focus_hops + 1):
+            next_frontier = []
+            for vertex in frontier:
+                for neighbor in self.get_neighbors(directed_graph, vertex):
+                    if neighbor not in focus:
+                        focus[neighbor] = hops
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return focus
+
+    def get_neighbors(self, directed_graph: DirectedGraph,
+                      vertex: Vertex) -> List[Vertex]:
+        """ Returns the successors and the predecessors of the vertex. The
+        predecessors are indexed once per topology
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+            vertex(Vertex): the vertex
+        """
+
+        return [edge.get_head() for edge in vertex.get_edges()] + \
+            self.get_predecessors(directed_graph, vertex)
+
+    def get_predecessors(self, directed_graph: DirectedGraph,
+                         vertex: Vertex) -> List[Vertex]:
+        """ Returns the vertices that have an edge to the vertex
 
         Args:
             directed_graph (DirectedGraph): The directed graph
+            vertex(Vertex): the vertex
         """
 
-    pass
+        if self.predecessors is None:
+            self.predecessors = {}
+            for tail in directed_graph.get_vertices():
+                for edge in tail.get_edges():
+                    self.predecessors.setdefault(
+                        edge.get_head(), []).append(tail)
+        return self.predecessors.get(vertex, [])
+
+    def get_focus_boundary(self, directed_graph: DirectedGraph,
+                           focus: Mapping[Vertex, int]) ->\
+            Tuple[List[Vertex], List[Vertex]]:
+        """ Returns the vertices in focus that have an edge to a vertex
+        outside the focus and those that have an edge from outside. These
+        edges are drawn to and from the summary node
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+            focus(dict): the vertices in focus
+        """
+
+        outgoing = [vertex for vertex in focus
+                    if any(edge.get_head() not in focus
+                           for edge in vertex.get_edges())]
+        incoming = [vertex for vertex in focus
+                    if any(tail not in focus for tail in
+                           self.get_predecessors(directed_graph, vertex))]
+        return outgoing, incoming
+
+    def get_focus_summary_label(self, directed_graph: DirectedGraph,
+                                focus: Mapping[Vertex, int]) ->\
+            Optional[str]:
+        """ Returns the label of the summary node, which stands for the
+        vertices outside the focus, or None if all vertices are in focus
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+            focus(dict): the vertices in focus
+        """
+
+        hidden = directed_graph.get_vertices_count() - len(focus)
+        return "+" + str(hidden) if hidden > 0 else None
+
+    def submit_render_task(self):
+        """ Hands the state deltas since the previous task over to the
+        render worker, which is started at the first task. It blocks while
+        the queue of the worker is full """
+
+        if self.renderer is None:
+            self.start_renderer()
+        task = RenderTask(tuple(self.events), self.topology_changed)
+        self.events = []
+        self.topology_changed = False
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_QUEUE_WAIT):
+            self.render_queue.put(task)
+
+    def start_renderer(self):
+        """ Starts the render worker, which renders with a renderer (see
+        create_renderer) """
+
+        self.renderer = self.create_renderer()
+        self.render_exception = None
+        self.render_thread = Thread(target=self.render_tasks,
+                                    args=(self.renderer,), daemon=True)
+        self.render_thread.start()
+
+    def create_renderer(self) -> "VizTracing":
+        """ Creates the tracing that renders for the render worker. It shares
+        the configuration of this tracing, e.g. the styling and the
+        instrumentation. It renders from a copy of the state store, which
+        it updates from the logged events, while the algorithm keeps
+        updating the state store of the tracing itself. The render
+        state (see get_render_fields) is handed over to the renderer until
+        it's joined, everything else that is kept between frames is created
+        anew """
+
+        renderer = copy.copy(self)
+        renderer.render_async = False
+        renderer.renderer = None
+        renderer.render_thread = None
+        renderer.events = []
+        renderer.state_store = self.state_store.copy()
+        renderer.activated_vertex = None
+        renderer.set_render_state(self.get_render_state())
+        self.set_render_state(dict.fromkeys(self.get_render_fields()))
+        renderer.reset_rendering()
+        return renderer
+
+    def get_render_fields(self) -> List[str]:
+        """ Returns the names of the fields that make up the render state:
+        the fields that rendering changes and that are still needed once
+        the frames are rendered, e.g. the numbering and the durations of
+        the frames. A child class adds its own fields """
+
+        return ["snapshot_no", "frame_durations", "changed_elements",
+                "changed_labels", "extended_labels", "focus_vertex",
+                "predecessors", "video_stream", "streamed_frames"]
+
+    def get_render_state(self) -> Dict[str, Any]:
+        """ Returns the render state, by field name (see get_render_fields)
+        """
+
+        return {name: getattr(self, name)
+                for name in self.get_render_fields()}
+
+    def set_render_state(self, render_state: Mapping[str, Any]):
+        """ Takes a render state over
+
+        Args:
+            render_state(dict): the values of the render fields, by name
+        """
+
+        for name in self.get_render_fields():
+            setattr(self, name, render_state[name])
+
+    def render_tasks(self, renderer: "VizTracing"):
+        """ The loop of the render worker. After a failure, the remaining
+        tasks are only taken from the queue, so that the algorithm is not
+        blocked, and the failure is raised by flush
+
+        Args:
+            renderer(VizTracing): the tracing that renders (see
+                create_renderer)
+        """
+
+        while True:
+            task = self.render_queue.get()
+            try:
+                if task is None:
+                    return
+                if self.render_exception is None:
+                    if task.topology_changed:
+                        renderer.reset_rendering(topology=True)
+                    for event in task.events:
+                        renderer.apply_event(event)
+            except BaseException as exception:
+                self.render_exception = exception
+            finally:
+                self.render_queue.task_done()
+
+    def join_renderer(self):
+        """ Waits until the render worker has rendered all snapshots and
+        takes the render state back, as if the tracing had rendered them
+        itself. The status changes after the last snapshot are applied as
+        well
+
+        Raises:
+            Exception: if the render worker failed
+        """
+
+        if self.renderer is None:
+            return
+        self.submit_render_task()
+        self.render_queue.put(None)
+        self.render_thread.join()
+        self.set_render_state(self.renderer.get_render_state())
+        self.renderer = None
+        self.render_thread = None
+        if self.render_exception is not None:
+            raise self.render_exception
+
+    def flush(self):
+        """ Waits until all frames that have been snapshotted are rendered
+        and hands the remaining frames over to the video stream. It's
+        extended by child classes that render asynchronously """
+
+        self.join_renderer()
+        self.drain_frames(final=True)
+
+    def replay(self,
+               vertex_states: Mapping[str, Mapping[str, str]] = None,
+               edge_states: Mapping[str, Mapping[str, str]] = None):
+        """ Method that renders the frames of a recorded tracing by
+        replaying the logged events on the directed graph. It can be called
+        more than once, e.g. with different styling, without running the
+        algorithm again. The frames are rendered against the current
+        topology of the directed graph.
+
+        Args:
+            vertex_states(list): optional new state definitions for the
+                vertices
+            edge_states(list): optional new state definitions for the edges
+        """
+
+        if vertex_states is not None:
+            self.vertex_states = vertex_states
+        if edge_states is not None:
+            self.edge_states = edge_states
+        self.reset_rendering()
+
+        recording, self.recording = self.recording, False
+        try:
+            self.clear_recorded_statuses()
+            self.snapshot_no = 1
+            self.frame_durations = []
+            self.streamed_frames.clear()
+            if self.video_stream is not None:
+                self.video_stream.close()
+                self.video_stream = None
+            for event in self.events:
+                self.apply_event(event)
+        finally:
+            self.recording = recording
+
+    def clear_recorded_statuses(self):
+        """ Method that resets the statuses that are touched by the recorded
+        events, so that a replay starts from a clean directed graph """
+
+        for event in self.events:
+            if event.kind != VizTracing.EVENT_SNAPSHOT:
+                self.reset_status(event.element, event.status)
+        self.activated_vertex = None
+
+    def apply_event(self, event: TraceEvent):
+        """ Method that applies a recorded event to the directed graph
+
+        Args:
+            event(TraceEvent): the event to be applied
+        """
+
+        if event.kind == VizTracing.EVENT_SET_STATUS:
+            self.set_status(event.element, event.status, event.value)
+        elif event.kind == VizTracing.EVENT_RESET_STATUS:
+            self.reset_status(event.element, event.status, event.value)
+        elif event.kind == VizTracing.EVENT_SNAPSHOT:
+            self.activated_vertex = event.element
+            self.take_snapshot(self.directed_graph)
 
     def execute(self, resource_path: str):
         """ Template method that prepares the generation of the tracing.
@@ -130,18 +927,39 @@ class VizTracing:
 
         pt.create_dir_in_user_home(resource_path)
 
+    def get_metrics(self) -> Mapping[str, Mapping[str, float]]:
+        """ Returns the metrics that were collected by the instrumentation
+        of the tracing: the counters, the cumulative timers in seconds and
+        the bytes written. See Instrumentation.to_json for the JSON """
+
+        return self.instrumentation.as_dict()
+
     def get_extended_label(self, vertex: Vertex) -> str:
         """ This method, possibly, extends the passed label by
         adding more information, if available, dependending on the
-        visualizer class
+        visualizer class. Label attributes that have been reset are left out.
+        The label is cached until a label attribute of the vertex changes
+        """
+
+        extended_label = self.extended_labels.get(vertex)
+        if extended_label is None:
+            extended_label = self.create_extended_label(vertex)
+            self.extended_labels[vertex] = extended_label
+        return extended_label
+
+    def create_extended_label(self, vertex: Vertex) -> str:
+        """ Builds the extended label of a vertex from its label attributes
+
+        Args:
+            vertex(Vertex): the vertex
         """
 
         label = vertex.get_label()
 
-        l: List[str] =\
-            [label + str(vertex.get_attrs()[label])
-             for label in self.get_vertex_label_attributes()
-             if label in vertex.get_attrs()]
+        values = [(attribute, self.get_status(vertex, attribute))
+                  for attribute in self.get_vertex_label_attributes()]
+        l: List[str] = [attribute + str(value) for attribute, value in values
+                        if value is not False]
         if l:
             return str(label) + " " + ",".join(l)
         else:
@@ -163,6 +981,21 @@ class VizTracingAdvisor(Advisor):
         super().__init__()
         self.viz_tracing = viz_tracing
 
+    def advise(self, advice: str, *args: Any, **kwargs: Any):
+        """ Method that executes the advice and times it per advice type.
+        The time of an advice includes the rendering of its snapshots,
+        unless the tracing is recorded
+
+        Args:
+            advice(str): The string that indicates the function in the subclass
+        """
+
+        if not hasattr(self, advice):
+            return
+        with self.viz_tracing.instrumentation.time(
+                VizTracing.METRIC_ADVICE_PREFIX + advice):
+            super().advise(advice, *args, **kwargs)
+
     def visit_vertex(self, directed_graph: DirectedGraph, vertex: Vertex):
         """ Function that is used to tag vertices with the state "VISITED",
         if these vertices have been visited once. So next time, when another
@@ -1,12 +1,19 @@
 from pythonvizalgos.graph.viz_tracing import VizTracing
-from graphviz import Digraph
+from pythonvizalgos.graph.state_store import StateStore
+from graphviz import Digraph, Source
 from pythonalgos.graph.vertex import Vertex
 from pythonalgos.graph.edge import Edge
 from pythonalgos.util.advisor import Advisor
 from os import path
 from pythonalgos.util import path_tools as pt
 from pythonalgos.graph.directed_graph import DirectedGraph
-from typing import List, Mapping, Union, Any
+from pythonvizalgos.util.instrumentation import Instrumentation, time_block
+from pythonvizalgos.util.frame_cache import FrameCache
+from typing import List, Mapping, Union, Any, Dict, Tuple, FrozenSet
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import BoundedSemaphore
+import json
+import os
 
 """ Module that defines a tracing class to be used for tracing of all sorts
 of algorithms in relation to directed graphs """
@@ -17,10 +24,26 @@ class VizTracingGraphviz(VizTracing):
     IMAGE_NAME_PREFIX: str = "VIZ_TRACING_"
     IMAGE_TYPE: str = "png"
 
+    PENDING_FRAMES_PER_WORKER: int = 4
+
+    LAYOUT_ENGINE: str = "dot"
+    PINNED_LAYOUT_ENGINE: str = "neato"
+    PINNED_LAYOUT_NO_OP: int = 2
+
+    METRIC_SNAPSHOT_WAIT: str = "snapshot.wait"
+
+    FOCUS_SUMMARY_STYLE: Mapping[str, str] = {"shape": "box",
+                                              "style": "dashed"}
+    FOCUS_BOUNDARY_STYLE: Mapping[str, str] = {"style": "dashed"}
+    OVERVIEW_SIZE: str = "2,2"
+    OVERVIEW_COLOR: str = "gray"
+    OVERVIEW_FOCUS_COLOR: str = "red"
+
     def __init__(self, path: str, directed_graph: DirectedGraph,
                  vertex_states: List[Mapping[str, Mapping[str, str]]],
-                 edge_states: List[Mapping[str, Mapping[str, str]]]) \
-            -> None:
+                 edge_states: List[Mapping[str, Mapping[str, str]]],
+                 parallel: bool = False, max_workers: int = None,
+                 pinned_layout: bool = False, **kwargs: Any) -> None:
         """ Method that initialises the tracing functionality
 
         Args:
@@ -29,59 +52,509 @@ class VizTracingGraphviz(VizTracing):
             vertex_states(list): a list of stated definitions (see class) for
                 the vertices
             edge_states(list): a list of stated definitions (see class) for
-                the edges"""
+                the edges
+            parallel(bool): if True, the DOT source of each frame is
+                captured and the dot invocations run on a pool of workers
+            max_workers(int): the number of render workers, defaults to the
+                number of cores
+            pinned_layout(bool): if True, the layout is computed once and
+                the frames are rendered with the node and edge positions
+                pinned, so that no layout work is repeated per frame. It
+                can't be combined with the focus mode
+            **kwargs: the tracing options of VizTracing"""
 
         super().__init__(path=path, directed_graph=directed_graph,
-                         vertex_states=vertex_states, edge_states=edge_states)
-        self.snapshot_no = 1
+                         vertex_states=vertex_states, edge_states=edge_states,
+                         **kwargs)
+        if pinned_layout and self.focus_hops is not None:
+            raise Exception(
+                "A pinned layout can't be combined with the focus mode")
+        self.parallel = parallel
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor: Union[ThreadPoolExecutor, None] = None
+        self.pending_frames: BoundedSemaphore = BoundedSemaphore(
+            self.max_workers * VizTracingGraphviz.PENDING_FRAMES_PER_WORKER)
+        self.rendered_frames: List[Tuple[int, Future]] = []
+        self.render_failures: Dict[int, BaseException] = {}
+        self.pinned_layout = pinned_layout
+        self.line_graph = Digraph()
+        self.reset_rendering(topology=True)
 
-    def snapshot(self, directed_graph: DirectedGraph):
-        """ Take a snapshot of the current directed graph
+    def render_snapshot(self, directed_graph: DirectedGraph):
+        """ Render a snapshot of the current directed graph
 
         Args:
             directed_graph (DirectedGraph): The directed graph
         """
 
-        graph = Digraph(format=VizTracingGraphviz.IMAGE_TYPE)
+        if self.pinned_layout and self.node_positions is None:
+            with self.instrumentation.time(
+                    VizTracing.METRIC_SNAPSHOT_LAYOUT):
+                self.compute_layout(directed_graph)
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_BUILD):
+            graph = self.create_digraph(directed_graph)
+        if self.focus_overview:
+            self.render_overview(directed_graph)
+        key = self.get_frame_key(graph.source) \
+            if self.frame_cache is not None else None
+        if key is not None and self.restore_cached_frame(key):
+            pass
+        elif self.parallel:
+            self.submit_frame(graph.source, self.snapshot_no, key)
+        else:
+            with self.instrumentation.time(
+                    VizTracing.METRIC_SNAPSHOT_RASTERIZE):
+                image = graph.pipe(format=VizTracingGraphviz.IMAGE_TYPE,
+                                   **self.get_render_options())
+            if self.write_images:
+                self.write_image(self.snapshot_no, image)
+            if self.stream_video:
+                self.stream_frame(self.snapshot_no, image)
+            if key is not None:
+                self.cache_frame(key, image)
+        self.snapshot_no += 1
+
+    def get_frame_key(self, source: str) -> str:
+        """ Returns the key of a frame in the frame cache: the hash of its
+        DOT source and of the options with which it's rendered
+
+        Args:
+            source(str): the DOT source of the frame
+        """
+
+        return FrameCache.create_key(
+            VizTracingGraphviz.__name__, source, self.get_render_options(),
+            VizTracingGraphviz.IMAGE_TYPE)
+
+    def get_render_options(self) -> Mapping[str, Any]:
+        """ Returns the options with which the frames are rendered """
+
+        if self.node_positions is None:
+            return {"engine": VizTracingGraphviz.LAYOUT_ENGINE}
+        else:
+            return {"engine": VizTracingGraphviz.PINNED_LAYOUT_ENGINE,
+                    "neato_no_op": VizTracingGraphviz.PINNED_LAYOUT_NO_OP}
+
+    def compute_layout(self, directed_graph: DirectedGraph):
+        """ Runs the layout of the directed graph once and keeps the
+        positions of the vertices and edges for the frames that follow
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
+
+        layout = json.loads(self.create_digraph(directed_graph).pipe(
+            format="json", engine=VizTracingGraphviz.LAYOUT_ENGINE))
+        names = {obj["_gvid"]: obj["name"]
+                 for obj in layout.get("objects", [])}
+        node_positions = {obj["name"]: obj["pos"] + "!"
+                          for obj in layout.get("objects", [])
+                          if "pos" in obj}
+        edge_positions: Dict[Tuple[str, str], List[str]] = {}
+        for obj in layout.get("edges", []):
+            edge_positions.setdefault(
+                (names[obj["tail"]], names[obj["head"]]), []).append(
+                    obj["pos"])
+
+        self.edge_positions = {}
         for vertex in directed_graph.get_vertices():
-            found = False
-            default_state: Union[Mapping[str, str], None] = {}
-            for state in self.vertex_states:
-                attr_name, attr_values = next(iter(state.items()))
-                if attr_name != VizTracing.DEFAULT and\
-                        vertex.get_attr(attr_name):
-                    graph.node(name=str(vertex.get_label()),
-                               label=self.get_extended_label(vertex),
-                               _attributes=None, **attr_values)
-                    found = True
-                    break
-                elif attr_name == VizTracing.DEFAULT:
-                    default_state = attr_values
-            if not found:
-                graph.node(name=str(vertex.get_label()),
-                           label=self.get_extended_label(vertex),
-                           _attributes=None, **default_state or {})
+            for edge in vertex.get_edges():
+                positions = edge_positions.get(
+                    (str(edge.get_tail().get_label()),
+                     str(edge.get_head().get_label())))
+                if positions:
+                    self.edge_positions[edge] = positions.pop(0)
+        self.node_positions = node_positions
+        self.reset_rendering()
+
+    def submit_frame(self, source: str, snapshot_no: int, key: str = None):
+        """ Hands the DOT source of a frame over to the render workers. When
+        too many frames are pending, it waits for a worker to finish.
+
+        Args:
+            source(str): the DOT source of the frame
+            snapshot_no(int): the number of the snapshot
+            key(str): if given, the rendered frame is added to the frame
+                cache with this key
+        """
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        with self.instrumentation.time(
+                VizTracingGraphviz.METRIC_SNAPSHOT_WAIT):
+            self.pending_frames.acquire()
+        if self.write_images:
+            self.remove_cached_image(self.get_image_name(snapshot_no) + "." +
+                                     VizTracingGraphviz.IMAGE_TYPE)
+        if self.stream_video:
+            future = self.executor.submit(
+                pipe_source, source,
+                self.get_image_name(snapshot_no)
+                if self.write_images else None,
+                VizTracingGraphviz.IMAGE_TYPE,
+                instrumentation=self.instrumentation,
+                **self.get_render_options())
+            self.stream_frame(snapshot_no, future)
+        else:
+            future = self.executor.submit(
+                render_source, source, self.get_image_name(snapshot_no),
+                VizTracingGraphviz.IMAGE_TYPE,
+                instrumentation=self.instrumentation,
+                **self.get_render_options())
+        future.add_done_callback(lambda _: self.pending_frames.release())
+        if key is not None:
+            def cache_rendered_frame(done: Future):
+                if done.exception() is None:
+                    self.cache_frame(key, done.result())
+            future.add_done_callback(cache_rendered_frame)
+        self.rendered_frames.append((snapshot_no, future))
+
+    def flush(self):
+        """ Waits until the render workers have rendered all submitted
+        frames. The frames that failed are kept in render_failures.
+
+        Raises:
+            Exception: if one or more frames could not be rendered
+        """
+
+        self.join_renderer()
+        self.render_failures = {}
+        for snapshot_no, future in self.rendered_frames:
+            exception = future.exception()
+            if exception is not None:
+                self.render_failures[snapshot_no] = exception
+        self.rendered_frames = []
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        super().flush()
+
+        if self.render_failures:
+            raise Exception(
+                "Rendering failed for frame(s): " + ", ".join(
+                    "{:04d} ({})".format(snapshot_no, exception)
+                    for snapshot_no, exception in
+                    sorted(self.render_failures.items())))
+
+    def get_render_fields(self) -> List[str]:
+        """ Adds the pinned layout and the frames that are pending with the
+        render workers, which flush waits for """
+
+        return super().get_render_fields() + [
+            "node_positions", "edge_positions", "executor",
+            "rendered_frames"]
+
+    def reset_rendering(self, topology: bool = False):
+        """ Drops the DOT lines that are kept between frames, so that the
+        next frame is generated from scratch. The pinned layout is dropped
+        as well when the topology changed
+
+        Args:
+            topology(bool): True if the topology of the directed graph
+                changed
+        """
+
+        super().reset_rendering(topology)
+        if topology:
+            self.node_positions: Union[Mapping[str, str], None] = None
+            self.edge_positions: Mapping[Edge, str] = {}
+        self.vertex_style_table = StyleTable(self.vertex_states,
+                                             self.state_store)
+        self.edge_style_table = StyleTable(self.edge_states,
+                                           self.state_store)
+        self.body_lines: List[str] = []
+        self.line_idx: Dict[Union[Vertex, Edge], int] = {}
+        self.focus_lines: Dict[Union[Vertex, Edge], str] = {}
+        self.overview_focus: Union[FrozenSet[Vertex], None] = None
+        self.overview_image: Union[bytes, None] = None
+        self.pop_changed_elements()
+
+    def create_digraph(self, directed_graph: DirectedGraph) -> Digraph:
+        """ Creates the graphviz representation of the current state of the
+        directed graph. The DOT lines are kept between frames and only the
+        lines of the vertices and edges that changed are regenerated
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
 
+        Returns:
+            The graphviz digraph
+        """
+
+        focus = self.get_focus(directed_graph)
+        if focus is not None:
+            return self.create_focus_digraph(directed_graph, focus)
+
+        changed_elements = self.pop_changed_elements()
+        if not self.line_idx:
+            for vertex in directed_graph.get_vertices():
+                self.line_idx[vertex] = len(self.body_lines)
+                self.body_lines.append(self.create_node_line(vertex))
+                for edge in vertex.get_edges():
+                    self.line_idx[edge] = len(self.body_lines)
+                    self.body_lines.append(self.create_edge_line(edge))
+        else:
+            for element in changed_elements:
+                idx = self.line_idx.get(element)
+                if idx is None:
+                    continue
+                self.body_lines[idx] = \
+                    self.create_node_line(element) \
+                    if isinstance(element, Vertex) \
+                    else self.create_edge_line(element)
+
+        return Digraph(format=VizTracingGraphviz.IMAGE_TYPE,
+                       body=list(self.body_lines))
+
+    def create_focus_digraph(self, directed_graph: DirectedGraph,
+                             focus: Mapping[Vertex, int]) -> Digraph:
+        """ Creates the graphviz representation of the vertices in focus,
+        the edges between them and a summary node for the rest of the
+        directed graph. The DOT lines of the vertices and edges are kept
+        until they change, so a frame costs in the size of the focus
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+            focus(dict): the vertices in focus
+
+        Returns:
+            The graphviz digraph
+        """
+
+        for element in self.pop_changed_elements():
+            self.focus_lines.pop(element, None)
+
+        lines: List[str] = []
+        for vertex in focus:
+            line = self.focus_lines.get(vertex)
+            if line is None:
+                line = self.focus_lines[vertex] = \
+                    self.create_node_line(vertex)
+            lines.append(line)
             for edge in vertex.get_edges():
-                found = False
-                default_state: Union[Mapping[str, str], None] = {}
-                for state in self.edge_states:
-                    attr_name, attr_values = next(iter(state.items()))
-                    if attr_name != VizTracing.DEFAULT and \
-                            edge.get_attr(attr_name):
-                        graph.edge(
-                            str(edge.get_tail().get_label()),
-                            str(edge.get_head().get_label()),
-                            label=None, _attributes=None, **attr_values)
-                        found = True
-                        break
-                    elif attr_name == VizTracing.DEFAULT:
-                        default_state = attr_values
-                if not found:
-                    graph.edge(
+                if edge.get_head() in focus:
+                    line = self.focus_lines.get(edge)
+                    if line is None:
+                        line = self.focus_lines[edge] = \
+                            self.create_edge_line(edge)
+                    lines.append(line)
+
+        summary_label = self.get_focus_summary_label(directed_graph, focus)
+        if summary_label is not None:
+            outgoing, incoming = self.get_focus_boundary(directed_graph,
+                                                         focus)
+            self.line_graph.node(
+                VizTracing.FOCUS_SUMMARY, label=summary_label,
+                **VizTracingGraphviz.FOCUS_SUMMARY_STYLE)
+            for vertex in outgoing:
+                self.line_graph.edge(
+                    str(vertex.get_label()), VizTracing.FOCUS_SUMMARY,
+                    **VizTracingGraphviz.FOCUS_BOUNDARY_STYLE)
+            for vertex in incoming:
+                self.line_graph.edge(
+                    VizTracing.FOCUS_SUMMARY, str(vertex.get_label()),
+                    **VizTracingGraphviz.FOCUS_BOUNDARY_STYLE)
+            lines.extend(self.line_graph.body)
+            self.line_graph.body.clear()
+
+        return Digraph(format=VizTracingGraphviz.IMAGE_TYPE, body=lines)
+
+    def render_overview(self, directed_graph: DirectedGraph):
+        """ Writes the overview image of the snapshot: the whole directed
+        graph at a small size, with the vertices in focus highlighted. The
+        overview is only rendered again when the focus moved
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
+
+        focus = frozenset(self.get_focus(directed_graph))
+        if focus != self.overview_focus:
+            for vertex in directed_graph.get_vertices():
+                self.line_graph.node(
+                    str(vertex.get_label()), label="", shape="point",
+                    color=VizTracingGraphviz.OVERVIEW_FOCUS_COLOR
+                    if vertex in focus else VizTracingGraphviz.OVERVIEW_COLOR)
+                for edge in vertex.get_edges():
+                    self.line_graph.edge(
                         str(edge.get_tail().get_label()),
-                        str(edge.get_head().get_label()))
-        graph.render(path.join(
-            self.path, VizTracingGraphviz.IMAGE_NAME_PREFIX +
-            ("{:04d}".format(self.snapshot_no))))
-        self.snapshot_no += 1
+                        str(edge.get_head().get_label()), arrowhead="none",
+                        color=VizTracingGraphviz.OVERVIEW_COLOR)
+            graph = Digraph(body=list(self.line_graph.body),
+                            graph_attr={
+                                "size": VizTracingGraphviz.OVERVIEW_SIZE})
+            self.line_graph.body.clear()
+            with self.instrumentation.time(
+                    VizTracing.METRIC_SNAPSHOT_RASTERIZE):
+                self.overview_image = graph.pipe(
+                    format=VizTracingGraphviz.IMAGE_TYPE,
+                    engine=VizTracingGraphviz.LAYOUT_ENGINE)
+            self.overview_focus = focus
+
+        with open(self.get_overview_image_name(self.snapshot_no) + "." +
+                  VizTracingGraphviz.IMAGE_TYPE, "wb") as image_file:
+            image_file.write(self.overview_image)
+        self.instrumentation.add_bytes(VizTracing.METRIC_IMAGE_BYTES,
+                                       len(self.overview_image))
+
+    def create_node_line(self, vertex: Vertex) -> str:
+        """ Creates the DOT line of a vertex in its current state
+
+        Args:
+            vertex(Vertex): the vertex
+
+        Returns:
+            The DOT line
+        """
+
+        name = str(vertex.get_label())
+        self.line_graph.node(
+            name=name, label=self.get_extended_label(vertex),
+            _attributes=None, pos=self.node_positions.get(name)
+            if self.node_positions else None,
+            **self.vertex_style_table.get_style(vertex))
+        return self.line_graph.body.pop()
+
+    def create_edge_line(self, edge: Edge) -> str:
+        """ Creates the DOT line of an edge in its current state
+
+        Args:
+            edge(Edge): the edge
+
+        Returns:
+            The DOT line
+        """
+
+        self.line_graph.edge(
+            str(edge.get_tail().get_label()),
+            str(edge.get_head().get_label()),
+            label=None, _attributes=None, pos=self.edge_positions.get(edge),
+            **self.edge_style_table.get_style(edge))
+        return self.line_graph.body.pop()
+
+
+class StyleTable:
+    """ Class that compiles a list of state definitions (see VizCyclicTracing)
+    into a lookup of graphviz attributes. The first state in the list that is
+    active for an element takes precedence, the default state applies when
+    none is active. The lookup is keyed on the set of active states of the
+    element """
+
+    def __init__(self, states: List[Mapping[str, Mapping[str, str]]],
+                 state_store: StateStore):
+        """ Compiles the state definitions
+
+        Args:
+            states(list): the state definitions
+            state_store(StateStore): the store that holds the statuses of
+                the elements
+        """
+
+        self.state_store = state_store
+        self.priority: List[Tuple[str, Mapping[str, str]]] = []
+        self.default_style: Mapping[str, str] = {}
+        for state in states or []:
+            attr_name, attr_values = next(iter(state.items()))
+            if attr_name == VizTracing.DEFAULT:
+                self.default_style = attr_values
+            else:
+                self.priority.append((attr_name, attr_values))
+        self.styles: Dict[FrozenSet[str], Mapping[str, str]] = {}
+
+    def get_active_states(self, element: Union[Vertex, Edge]) ->\
+            FrozenSet[str]:
+        """ Returns the states of the table that are active for the element
+
+        Args:
+            element: the vertex or edge
+        """
+
+        return frozenset(attr_name for attr_name, _ in self.priority
+                         if self.state_store.has(element, attr_name))
+
+    def get_state(self, element: Union[Vertex, Edge]) -> Union[str, None]:
+        """ Returns the state of the table that takes precedence for the
+        element, or None when the default state applies
+
+        Args:
+            element: the vertex or edge
+        """
+
+        return next((attr_name for attr_name, _ in self.priority
+                     if self.state_store.has(element, attr_name)), None)
+
+    def get_style(self, element: Union[Vertex, Edge]) -> Mapping[str, str]:
+        """ Returns the graphviz attributes of the element in its current
+        state
+
+        Args:
+            element: the vertex or edge
+        """
+
+        active_states = self.get_active_states(element)
+        style = self.styles.get(active_states)
+        if style is None:
+            style = next((attr_values
+                          for attr_name, attr_values in self.priority
+                          if attr_name in active_states), self.default_style)
+            self.styles[active_states] = style
+        return style
+
+
+def render_source(source: str, filename: str, image_type: str,
+                  engine: str = VizTracingGraphviz.LAYOUT_ENGINE,
+                  neato_no_op: int = None,
+                  instrumentation: Instrumentation = None) -> str:
+    """ Renders the DOT source of a frame to an image. It runs on a render
+    worker.
+
+    Args:
+        source(str): the DOT source
+        filename(str): the path of the image, without the extension
+        image_type(str): the format of the image
+        engine(str): the graphviz layout engine
+        neato_no_op(int): the no-op mode of neato for pinned layouts
+        instrumentation(Instrumentation): optionally, the instrumentation
+            that times the rasterizing and the writing of the image
+
+    Returns:
+        The path of the rendered image
+    """
+
+    pipe_source(source, filename, image_type, engine, neato_no_op,
+                instrumentation)
+    return filename + "." + image_type
+
+
+def pipe_source(source: str, filename: Union[str, None], image_type: str,
+                engine: str = VizTracingGraphviz.LAYOUT_ENGINE,
+                neato_no_op: int = None,
+                instrumentation: Instrumentation = None) -> bytes:
+    """ Renders the DOT source of a frame to an image in memory. It runs on
+    a render worker.
+
+    Args:
+        source(str): the DOT source
+        filename(str): if given, the image is also written to this path,
+            without the extension
+        image_type(str): the format of the image
+        engine(str): the graphviz layout engine
+        neato_no_op(int): the no-op mode of neato for pinned layouts
+        instrumentation(Instrumentation): optionally, the instrumentation
+            that times the rasterizing and the writing of the image
+
+    Returns:
+        The encoded image
+    """
+
+    with time_block(instrumentation, VizTracing.METRIC_SNAPSHOT_RASTERIZE):
+        image = Source(source, engine=engine).pipe(
+            format=image_type, neato_no_op=neato_no_op)
+    if filename is not None:
+        with time_block(instrumentation, VizTracing.METRIC_SNAPSHOT_WRITE):
+            with open(filename + "." + image_type, "wb") as image_file:
+                image_file.write(image)
+        if instrumentation is not None:
+            instrumentation.add_bytes(VizTracing.METRIC_IMAGE_BYTES,
+                                      len(image))
+    return image
@@ -0,0 +1,409 @@
+from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonvizalgos.graph.viz_tracing_graphviz import VizTracingGraphviz
+from pythonalgos.graph.vertex import Vertex
+from pythonalgos.graph.edge import Edge
+from pythonalgos.graph.directed_graph import DirectedGraph
+from graphviz import Digraph
+from os import path
+from typing import List, Mapping, Union, Any, Dict
+import json
+import re
+
+""" Module that defines a tracing class that generates a self-contained HTML
+player instead of images and a video. The directed graph is laid out and
+rendered to SVG once, every snapshot only records the CSS classes and labels
+of the vertices and edges that changed.
+
+Usage:
+    viz_tracing = VizTracingHtml(path, directed_graph, vertex_states,
+                                 edge_states)
+    directed_graph.is_cyclic(VizCyclicTracingAdvisor(viz_tracing))
+    viz_tracing.create_video(resource_path)
+"""
+
+
+class VizTracingHtml(VizTracingGraphviz):
+
+    HTML_NAME: str = "trace.html"
+    FRAME_INTERVAL_MS: int = 500
+
+    VERTEX_ID_PREFIX: str = "v"
+    EDGE_ID_PREFIX: str = "e"
+    VERTEX_CLASS_PREFIX: str = "vertex-"
+    EDGE_CLASS_PREFIX: str = "edge-"
+
+    SHAPES: str = "ellipse, polygon, path"
+    DASH_ARRAYS: Mapping[str, str] = {"dashed": "5,2", "dotted": "1,5"}
+
+    def __init__(self, path: str, directed_graph: DirectedGraph,
+                 vertex_states: List[Mapping[str, Mapping[str, str]]],
+                 edge_states: List[Mapping[str, Mapping[str, str]]],
+                 **kwargs: Any) -> None:
+        """ Method that initialises the tracing functionality
+
+        Args:
+            path: the path that will contain the HTML player
+            directed_graph(DirectedGraph): the directed graph, its topology
+                must not change during the tracing
+            vertex_states(list): a list of stated definitions (see class) for
+                the vertices
+            edge_states(list): a list of stated definitions (see class) for
+                the edges
+            **kwargs: the tracing options of VizTracingGraphviz, except for
+                the focus mode"""
+
+        self.svg: Union[str, None] = None
+        self.frames: List[List[List[str]]] = []
+        super().__init__(path=path, directed_graph=directed_graph,
+                         vertex_states=vertex_states, edge_states=edge_states,
+                         **kwargs)
+        if self.focus_hops is not None:
+            raise Exception("An HTML tracing can't be combined with the "
+                            "focus mode")
+
+    def get_render_fields(self) -> List[str]:
+        """ Adds the SVG and the recorded frames, which the player is
+        written from """
+
+        return super().get_render_fields() + [
+            "svg", "frames", "element_ids", "labels"]
+
+    def reset_rendering(self, topology: bool = False):
+        """ Makes the next frame record the state of every vertex and edge,
+        as the changes since the previous frame are dropped. The topology
+        can't change once frames were recorded, as all frames share the
+        layout of the SVG
+
+        Args:
+            topology(bool): True if the topology of the directed graph
+                changed
+
+        Raises:
+            Exception: if the topology changed after the first frame
+        """
+
+        if topology and self.frames:
+            raise Exception("The topology of the directed graph can't "
+                            "change in an HTML tracing")
+        super().reset_rendering(topology)
+        if topology:
+            self.svg = None
+            self.element_ids: Dict[Union[Vertex, Edge], str] = {}
+            self.labels: Dict[Vertex, str] = {}
+        self.complete_frame = True
+
+    def render_snapshot(self, directed_graph: DirectedGraph):
+        """ Records the changes of a snapshot. The SVG of the directed graph
+        is rendered at the first snapshot
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
+
+        if self.svg is None:
+            with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_LAYOUT):
+                self.svg = self.create_svg(directed_graph)
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_BUILD):
+            changes: List[List[str]] = []
+            elements = self.pop_changed_elements()
+            changed_labels = self.pop_changed_labels()
+            if self.complete_frame:
+                elements = set(self.element_ids)
+                changed_labels = elements
+                self.complete_frame = False
+            for element in elements:
+                element_id = self.element_ids[element]
+                change = [element_id, self.get_style_class(element)]
+                if isinstance(element, Vertex) and \
+                        element in changed_labels:
+                    label = self.get_extended_label(element)
+                    if label != self.labels.get(element,
+                                                str(element.get_label())):
+                        self.labels[element] = label
+                        change.append(label)
+                changes.append(change)
+            self.frames.append(sorted(changes))
+        self.snapshot_no += 1
+
+    def create_svg(self, directed_graph: DirectedGraph) -> str:
+        """ Lays out and renders the directed graph, with every vertex and
+        edge in its default state, to an SVG in which every vertex and edge
+        has an id
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+
+        Returns:
+            The SVG, without the XML prolog and with a scalable size
+        """
+
+        vertex_style = self.vertex_style_table.default_style
+        edge_style = self.edge_style_table.default_style
+        for vertex in directed_graph.get_vertices():
+            self.element_ids[vertex] = VizTracingHtml.VERTEX_ID_PREFIX + \
+                str(len(self.element_ids))
+            self.line_graph.node(
+                str(vertex.get_label()), label=str(vertex.get_label()),
+                id=self.element_ids[vertex], **vertex_style)
+            for edge in vertex.get_edges():
+                self.element_ids[edge] = VizTracingHtml.EDGE_ID_PREFIX + \
+                    str(len(self.element_ids))
+                self.line_graph.edge(
+                    str(edge.get_tail().get_label()),
+                    str(edge.get_head().get_label()),
+                    id=self.element_ids[edge], **edge_style)
+        graph = Digraph(body=list(self.line_graph.body))
+        self.line_graph.body.clear()
+
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_RASTERIZE):
+            svg = graph.pipe(format="svg",
+                             engine=VizTracingGraphviz.LAYOUT_ENGINE).decode(
+                                 "utf-8")
+        svg = svg[svg.find("<svg"):]
+        return re.sub(r'<svg width="[^"]*" height="[^"]*"', "<svg", svg,
+                      count=1)
+
+    def get_style_class(self, element: Union[Vertex, Edge]) -> str:
+        """ Returns the CSS class of the state of the element, or an empty
+        string when the default state applies
+
+        Args:
+            element: the vertex or edge
+        """
+
+        if isinstance(element, Vertex):
+            state = self.vertex_style_table.get_state(element)
+            prefix = VizTracingHtml.VERTEX_CLASS_PREFIX
+        else:
+            state = self.edge_style_table.get_state(element)
+            prefix = VizTracingHtml.EDGE_CLASS_PREFIX
+        return "" if state is None else prefix + get_css_name(state)
+
+    def create_css(self) -> str:
+        """ Creates the CSS rules of the states of the vertices and edges """
+
+        rules: List[str] = []
+        for prefix, style_table in [
+                (VizTracingHtml.VERTEX_CLASS_PREFIX, self.vertex_style_table),
+                (VizTracingHtml.EDGE_CLASS_PREFIX, self.edge_style_table)]:
+            for state, style in style_table.priority:
+                rules.extend(create_css_rules(
+                    "." + prefix + get_css_name(state), style))
+        return "\n".join(rules)
+
+    def create_video(self, resource_path: str):
+        """ Writes the HTML player, instead of a video
+
+        Args:
+            resource_path: the path that contains the generated resources
+        """
+
+        self.write_html(path.join(self.path, VizTracingHtml.HTML_NAME))
+
+    def write_html(self, html_path: str):
+        """ Writes the self-contained HTML player of the recorded frames
+
+        Args:
+            html_path(str): the path of the HTML file
+
+        Raises:
+            Exception: if no frames were recorded
+        """
+
+        if self.svg is None or not self.frames:
+            raise Exception("No frames to write to " + html_path)
+        html = HTML_TEMPLATE \
+            .replace("/*CSS*/", self.create_css()) \
+            .replace("<!--SVG-->", self.svg) \
+            .replace("/*FRAMES*/[]", dump_script_json(self.frames)) \
+            .replace("/*DURATIONS*/[]",
+                     dump_script_json(self.get_frame_durations())) \
+            .replace("/*INTERVAL*/0", str(VizTracingHtml.FRAME_INTERVAL_MS))
+        with open(html_path, "w", encoding="utf-8") as html_file:
+            html_file.write(html)
+        self.instrumentation.add_bytes(VizTracing.METRIC_IMAGE_BYTES,
+                                       len(html.encode("utf-8")))
+
+
+def dump_script_json(value: Any) -> str:
+    """ Function that serializes a value to JSON that can be embedded in a
+    script element: <, > and & are escaped, so that a label such as
+    </script> can't end the script
+
+    Args:
+        value: the value to be serialized
+    """
+
+    return json.dumps(value, separators=(",", ":")) \
+        .replace("<", "\\u003c").replace(">", "\\u003e") \
+        .replace("&", "\\u0026")
+
+
+def get_css_name(state: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", state)
+
+
+def create_css_rules(selector: str, style: Mapping[str, str]) -> List[str]:
+    """ Function that translates the graphviz attributes of a state into
+    CSS rules for the SVG shapes and texts of an element
+
+    Args:
+        selector(str): the selector of the element
+        style(dict): the graphviz attributes
+
+    Returns:
+        The CSS rules
+    """
+
+    shapes = ", ".join(selector + " " + shape for shape in
+                       VizTracingHtml.SHAPES.split(", "))
+    styles = [name.strip() for name in style.get("style", "").split(",")]
+    shape_properties: List[str] = []
+    if "fillcolor" in style:
+        shape_properties.append("fill: " + style["fillcolor"])
+    elif "filled" in styles:
+        shape_properties.append("fill: " + style.get("color", "lightgrey"))
+    if "color" in style:
+        shape_properties.append("stroke: " + style["color"])
+    if "penwidth" in style:
+        shape_properties.append("stroke-width: " + style["penwidth"])
+    elif "bold" in styles:
+        shape_properties.append("stroke-width: 2")
+    for name, dash_array in VizTracingHtml.DASH_ARRAYS.items():
+        if name in styles:
+            shape_properties.append("stroke-dasharray: " + dash_array)
+    if "invis" in styles:
+        shape_properties.append("visibility: hidden")
+
+    rules = [shapes + " { " + "; ".join(shape_properties) + " }"] \
+        if shape_properties else []
+    if "fontcolor" in style:
+        rules.append(selector + " text { fill: " + style["fontcolor"] + " }")
+    return rules
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Tracing</title>
+<style>
+body { font-family: sans-serif; margin: 0; }
+#controls { padding: 8px; }
+#controls input[type=range] { width: 50%; vertical-align: middle; }
+#graph svg { width: 100%; height: auto; }
+/*CSS*/
+</style>
+</head>
+<body>
+<div id="controls">
+<button id="play">Play</button>
+<button id="previous">&lt;</button>
+<button id="next">&gt;</button>
+<input id="slider" type="range" min="0" value="0">
+<span id="counter"></span>
+</div>
+<div id="graph"><!--SVG--></div>
+<script>
+var frames = /*FRAMES*/[];
+var durations = /*DURATIONS*/[];
+var interval = /*INTERVAL*/0;
+var initial = {};
+var current = -1;
+var timer = null;
+var slider = document.getElementById("slider");
+var counter = document.getElementById("counter");
+var play = document.getElementById("play");
+slider.max = frames.length - 1;
+
+frames.forEach(function (changes) {
+  changes.forEach(function (change) {
+    if (initial[change[0]] === undefined) {
+      var element = document.getElementById(change[0]);
+      var text = element ? element.querySelector("text") : null;
+      initial[change[0]] = {
+        element: element, text: text,
+        classes: element ? element.getAttribute("class") : "",
+        label: text ? text.textContent : null};
+    }
+  });
+});
+
+function applyFrame(no) {
+  frames[no].forEach(function (change) {
+    var state = initial[change[0]];
+    if (!state.element) {
+      return;
+    }
+    state.element.setAttribute(
+      "class", state.classes + (change[1] ? " " + change[1] : ""));
+    if (change.length > 2 && state.text) {
+      state.text.textContent = change[2];
+    }
+  });
+}
+
+function show(no) {
+  if (no < current) {
+    Object.keys(initial).forEach(function (id) {
+      var state = initial[id];
+      if (state.element) {
+        state.element.setAttribute("class", state.classes);
+      }
+      if (state.text) {
+        state.text.textContent = state.label;
+      }
+    });
+    current = -1;
+  }
+  while (current < no) {
+    current += 1;
+    applyFrame(current);
+  }
+  slider.value = current;
+  counter.textContent = (current + 1) + " / " + frames.length;
+}
+
+function stop() {
+  clearTimeout(timer);
+  timer = null;
+  play.textContent = "Play";
+}
+
+function step() {
+  if (current + 1 >= frames.length) {
+    stop();
+    return;
+  }
+  show(current + 1);
+  timer = setTimeout(step, (durations[current] || 1) * interval);
+}
+
+play.onclick = function () {
+  if (timer) {
+    stop();
+  } else {
+    play.textContent = "Pause";
+    if (current + 1 >= frames.length) {
+      show(0);
+    }
+    timer = setTimeout(step, (durations[current] || 1) * interval);
+  }
+};
+document.getElementById("previous").onclick = function () {
+  stop();
+  show(Math.max(0, current - 1));
+};
+document.getElementById("next").onclick = function () {
+  stop();
+  show(Math.min(frames.length - 1, current + 1));
+};
+slider.oninput = function () {
+  stop();
+  show(parseInt(slider.value, 10));
+};
+show(0);
+</script>
+</body>
+</html>
+"""
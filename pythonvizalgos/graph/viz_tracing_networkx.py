@@ -1,10 +1,18 @@
 from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonvizalgos.util.frame_cache import FrameCache
 from pythonalgos.graph.vertex import Vertex
 from pythonalgos.graph.edge import Edge
 from pythonalgos.graph.directed_graph import DirectedGraph
-from typing import List, Mapping, Dict, Any, Set
-import matplotlib.pyplot as plt
+from typing import List, Mapping, Dict, Any, Set, Union
+from collections import Counter
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba, to_rgba_array
+from matplotlib import image as mpimg
 import networkx as nx
+import numpy as np
+import os
 
 """ Module that defines a tracing class to be used for tracing of all sorts
 of algorithms in relation to directed graphs """
@@ -29,11 +37,29 @@ class VizTracingNetworkx(VizTracing):
     NODE_FONT_FAMILY: str = "sans-serif"
 
     FILL_COLOR = "fillcolor"
+    EDGE_COLOR_ATTR = "color"
+    EDGE_WIDTH_ATTR = "penwidth"
+    EDGE_STYLE_ATTR = "style"
+    EDGE_LINE_STYLES: Mapping[str, str] = {
+        "solid": "solid", "dashed": "dashed", "dotted": "dotted",
+        "bold": "solid"}
+    EDGE_INVISIBLE = "invis"
+    TRANSPARENT = (0.0, 0.0, 0.0, 0.0)
+
+    FIGURE_SIZE = (8.0, 6.0)
+    FIGURE_DPI: int = 100
+
+    OVERVIEW_FIGURE_SIZE = (2.0, 2.0)
+    OVERVIEW_NODE_SIZE: int = 4
+    OVERVIEW_COLOR: str = 'gray'
+    OVERVIEW_FOCUS_COLOR: str = 'red'
+
+    LAYOUT_SEED: int = 0
 
     def __init__(self, path: str, directed_graph: DirectedGraph,
                  vertex_states: Mapping[str, Mapping[str, str]],
-                 edge_states: Mapping[str, Mapping[str, str]]) \
-            -> None:
+                 edge_states: Mapping[str, Mapping[str, str]],
+                 **kwargs: Any) -> None:
         """ Method that initialises the tracing functionality
 
         Args:
@@ -42,11 +68,14 @@ class VizTracingNetworkx(VizTracing):
             vertex_states(list): a list of stated definitions (see class) for
                 the vertices
             edge_states(list): a list of stated definitions (see class) for
-                the edges"""
+                the edges
+            **kwargs: the tracing options of VizTracing"""
 
         super().__init__(path=path, directed_graph=directed_graph,
-                         vertex_states=vertex_states, edge_states=edge_states)
+                         vertex_states=vertex_states, edge_states=edge_states,
+                         **kwargs)
         self.check_states(vertex_states, edge_states)
+        self.reset_rendering(topology=True)
 
     def check_states(self,
                      vertex_states: Mapping[str, Mapping[str, str]],
@@ -72,104 +101,461 @@ class VizTracingNetworkx(VizTracing):
                 VizTracingNetworkx.FILL_COLOR + " not found in vertex state" +
                 VizTracing.DEFAULT)
 
-    def snapshot(self, directed_graph: DirectedGraph):
-        """ Take a snapshot of the current directed graph
+    def get_render_fields(self) -> List[str]:
+        """ Adds the layout, so that the vertices stay in place when the
+        figure is created again """
+
+        return super().get_render_fields() + ["positions"]
+
+    def reset_rendering(self, topology: bool = False):
+        """ Drops the figure that is kept between frames, so that the next
+        frame builds it again, and creates the style lookups of the states.
+        The layout is dropped as well when the topology changed
 
         Args:
-            directed_graph (DirectedGraph): The directed graph
+            topology(bool): True if the topology of the directed graph
+                changed
         """
 
-        dg = nx.DiGraph()
-        vertex: Vertex
-        for vertex in directed_graph.get_vertices():
-            dg.add_node(
-                vertex.get_label())
+        super().reset_rendering(topology)
+        if topology:
+            self.positions: Union[Mapping[Any, Any], None] = None
+            self.overview_figure: Union[Figure, None] = None
+        self.figure: Union[Figure, None] = None
+        self.focus: Union[Mapping[Vertex, int], None] = None
+        self.condensation: Mapping[Vertex, Any] = {}
+        self.create_style_lookups()
+        self.pop_changed_elements()
+        self.pop_changed_labels()
+
+    def create_style_lookups(self):
+        """ Creates the lookup arrays that are indexed with the state codes
+        of the vertices and edges (see get_state_code). A vertex state
+        defines the fill color, an edge state the color, width and style of
+        the edge. As in the graphviz tracings, the states take precedence
+        in the order in which they are defined. An edge in its default state
+        is only drawn as part of the background, an edge in a state is drawn
+        over it
+        """
+
+        vertex_states = self.get_vertex_states()
+        self.vertex_state_names: List[str] = [
+            state for state in vertex_states if state != VizTracing.DEFAULT
+            and VizTracingNetworkx.FILL_COLOR in vertex_states[state]]
+        self.vertex_color_lookup = to_rgba_array(
+            [vertex_states[state][VizTracingNetworkx.FILL_COLOR]
+             for state in self.vertex_state_names] +
+            [vertex_states[VizTracing.DEFAULT][VizTracingNetworkx.FILL_COLOR]])
+
+        edge_states = self.get_edge_states() or {}
+        self.edge_state_names: List[str] = [
+            state for state in edge_states if state != VizTracing.DEFAULT]
+        styles = [edge_states[state] for state in self.edge_state_names]
+        self.edge_color_lookup = to_rgba_array(
+            [VizTracingNetworkx.TRANSPARENT
+             if VizTracingNetworkx.EDGE_INVISIBLE in
+             style.get(VizTracingNetworkx.EDGE_STYLE_ATTR, "")
+             else style.get(VizTracingNetworkx.EDGE_COLOR_ATTR,
+                            VizTracingNetworkx.EDGE_COLOR)
+             for style in styles] + [VizTracingNetworkx.TRANSPARENT])
+        self.edge_width_lookup = np.array(
+            [float(style.get(VizTracingNetworkx.EDGE_WIDTH_ATTR,
+                             2 * VizTracingNetworkx.EDGE_WIDTH
+                             if "bold" in style.get(
+                                 VizTracingNetworkx.EDGE_STYLE_ATTR, "")
+                             else VizTracingNetworkx.EDGE_WIDTH))
+             for style in styles] + [VizTracingNetworkx.EDGE_WIDTH])
+        self.edge_style_lookup: List[str] = [
+            VizTracingNetworkx.EDGE_LINE_STYLES.get(
+                style.get(VizTracingNetworkx.EDGE_STYLE_ATTR, "solid"),
+                "solid")
+            for style in styles] + ["solid"]
+
+    def get_state_code(self, element: Union[Vertex, Edge]) -> int:
+        """ Returns the code of the state of the vertex or edge that takes
+        precedence, the index of the state in the vertex or edge states.
+        The code of the default state is the number of states
+
+        Args:
+            element: the vertex or edge
+        """
+
+        return self.state_store.get_code(
+            element, self.vertex_state_names
+            if isinstance(element, Vertex) else self.edge_state_names)
+
+    def get_vertex_codes(self, vertices: List[Vertex]) -> np.ndarray:
+        """ Returns the state codes of the vertices at once (see
+        get_state_code)
+
+        Args:
+            vertices(list): the vertices
+        """
+
+        return self.state_store.get_codes(vertices, self.vertex_state_names)
+
+    def apply_state_codes(self):
+        """ Styles all nodes and edges of the figure at once, from their
+        state codes """
+
+        self.node_collection.set_facecolor(
+            self.vertex_color_lookup[self.node_codes])
+        if self.edge_collection is not None:
+            self.edge_collection.set_color(
+                self.edge_color_lookup[self.edge_codes])
+            self.edge_collection.set_linewidth(
+                self.edge_width_lookup[self.edge_codes])
+            self.edge_collection.set_linestyle(
+                [self.edge_style_lookup[code] for code in self.edge_codes]
+                if len(set(self.edge_style_lookup)) > 1
+                else self.edge_style_lookup[0])
+
+    def render_snapshot(self, directed_graph: DirectedGraph):
+        """ Render a snapshot of the current directed graph. The figure and
+        its artists are created at the first snapshot, later snapshots only
+        update the node colors and the labels of the vertices that changed
+        and blit them onto the background. The figure is created again when
+        the focus moved or more vertices are condensed
+
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
 
-        edge: Edge
-        for edge in directed_graph.get_edges():
-            dg.add_edge(
-                edge.get_tail().get_label(), edge.get_head().get_label())
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_BUILD):
+            focus = self.get_focus(directed_graph)
+            condensation = self.get_condensation(directed_graph)
+            if focus is not None and focus != self.focus or \
+                    len(condensation) != len(self.condensation):
+                self.figure = None
+                self.positions = None
+            if self.figure is None:
+                self.focus = focus
+                self.condensation = condensation
+                self.create_figure(directed_graph)
+            else:
+                for element in self.pop_changed_elements():
+                    if isinstance(element, Vertex):
+                        idx = self.node_idx.get(element)
+                        if idx is not None:
+                            self.node_codes[idx] = \
+                                self.get_state_code(element)
+                    else:
+                        idx = self.edge_idx.get(element)
+                        if idx is not None:
+                            self.edge_codes[idx] = \
+                                self.get_state_code(element)
+                for vertex in self.pop_changed_labels():
+                    if vertex in self.node_idx:
+                        self.label_texts[vertex.get_label()].set_text(
+                            self.get_extended_label(vertex))
+                self.apply_state_codes()
+
+        key = self.get_frame_key() if self.frame_cache is not None else None
+        if key is None or not self.restore_cached_frame(key):
+            self.rasterize_frame(key)
+        if self.focus_overview:
+            self.render_overview(directed_graph)
+        self.snapshot_no += 1
+
+    def rasterize_frame(self, key: str = None):
+        """ Blits the nodes and labels of the current snapshot onto the
+        background and writes or streams the image
 
-        edges = [(u, v) for (u, v, _) in dg.edges(data=True)]
+        Args:
+            key(str): if given, the image is added to the frame cache with
+                this key. Only written images are cached
+        """
 
-        pos = nx.planar_layout(dg)
+        with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_RASTERIZE):
+            self.canvas.restore_region(self.background)
+            if self.edge_collection is not None:
+                self.axes.draw_artist(self.edge_collection)
+            self.axes.draw_artist(self.node_collection)
+            for text in self.label_texts.values():
+                self.axes.draw_artist(text)
+            self.canvas.blit(self.figure.bbox)
+            image = np.asarray(self.canvas.buffer_rgba())
+
+        if self.write_images:
+            image_name = self.get_image_name(self.snapshot_no) + "." + \
+                VizTracingNetworkx.IMAGE_TYPE
+            self.remove_cached_image(image_name)
+            with self.instrumentation.time(VizTracing.METRIC_SNAPSHOT_WRITE):
+                mpimg.imsave(image_name, image)
+            self.instrumentation.add_bytes(VizTracing.METRIC_IMAGE_BYTES,
+                                           os.path.getsize(image_name))
+            if key is not None:
+                self.cache_frame(key, image_name)
+        if self.stream_video:
+            self.stream_frame(self.snapshot_no,
+                              np.ascontiguousarray(image[:, :, 2::-1]))
+
+    def get_frame_key(self) -> str:
+        """ Returns the key of the current frame in the frame cache: the
+        hash of the figure and of the colors and labels of its nodes """
+
+        return FrameCache.create_key(
+            self.figure_key, self.node_codes.tolist(),
+            self.edge_codes.tolist(),
+            [text.get_text() for text in self.label_texts.values()])
+
+    def create_figure(self, directed_graph: DirectedGraph):
+        """ Creates the figure with its artists on a non-interactive canvas
+        and keeps the background (everything except the nodes and labels)
+        for blitting. In focus mode, the figure only holds the vertices in
+        focus and the summary node. Condensed vertices are drawn as their
+        supernode. The summary node and the supernodes are part of the
+        background
 
-        activated_nodes = self.get_nodes_by_state(directed_graph,
-                                                  VizTracing.ACTIVATED)
-        visisted_nodes =\
-            self.get_nodes_by_state(directed_graph,
-                                    VizTracing.VISITED) -\
-            activated_nodes
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
 
-        default_nodes = {vertex.get_label()
-                         for vertex in directed_graph.get_vertices()} -\
-            visisted_nodes - activated_nodes
+        self.pop_changed_elements()
+        self.pop_changed_labels()
+        visible = list(self.focus) if self.focus is not None \
+            else list(directed_graph.get_vertices())
+        vertices = [vertex for vertex in visible
+                    if vertex not in self.condensation]
+        sizes = Counter(self.condensation.values())
+        static_labels: Dict[Any, str] = {
+            self.condensation[vertex]: self.get_supernode_label(
+                self.condensation[vertex], sizes[self.condensation[vertex]])
+            for vertex in visible if vertex in self.condensation}
 
-        self.draw_nodes(dg, pos, list(activated_nodes), directed_graph,
-                        VizTracing.ACTIVATED)
-        self.draw_nodes(dg, pos, list(visisted_nodes), directed_graph,
-                        VizTracing.VISITED)
-        self.draw_nodes(dg, pos, list(default_nodes), directed_graph,
-                        VizTracing.DEFAULT)
+        dg = nx.DiGraph()
+        vertex: Vertex
+        for vertex in visible:
+            tail_node = self.get_node(vertex)
+            dg.add_node(tail_node)
+            edge: Edge
+            for edge in vertex.get_edges():
+                if self.focus is None or edge.get_head() in self.focus:
+                    head_node = self.get_node(edge.get_head())
+                    if tail_node != head_node or \
+                            vertex not in self.condensation:
+                        dg.add_edge(tail_node, head_node)
+        summary_label = None
+        if self.focus is not None:
+            summary_label = self.get_focus_summary_label(directed_graph,
+                                                         self.focus)
+        if summary_label is not None:
+            static_labels[VizTracing.FOCUS_SUMMARY] = summary_label
+            dg.add_node(VizTracing.FOCUS_SUMMARY)
+            outgoing, incoming = self.get_focus_boundary(directed_graph,
+                                                         self.focus)
+            for vertex in outgoing:
+                dg.add_edge(self.get_node(vertex), VizTracing.FOCUS_SUMMARY)
+            for vertex in incoming:
+                dg.add_edge(VizTracing.FOCUS_SUMMARY, self.get_node(vertex))
+        if self.positions is None:
+            with self.instrumentation.time(
+                    VizTracing.METRIC_SNAPSHOT_LAYOUT):
+                self.positions = create_layout(dg)
+
+        self.node_idx: Dict[Vertex, int] = {
+            vertex: idx for idx, vertex in enumerate(vertices)}
+        self.node_codes = self.get_vertex_codes(vertices)
+        edges = [edge for vertex in vertices for edge in vertex.get_edges()
+                 if edge.get_head() in self.node_idx]
+        self.edge_idx: Dict[Edge, int] = {
+            edge: idx for idx, edge in enumerate(edges)}
+        self.edge_codes = self.state_store.get_codes(
+            edges, self.edge_state_names)
+
+        self.figure = Figure(figsize=VizTracingNetworkx.FIGURE_SIZE,
+                             dpi=VizTracingNetworkx.FIGURE_DPI)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.axes.axis('off')
+
+        self.node_collection = nx.draw_networkx_nodes(
+            G=dg, pos=self.positions,
+            nodelist=[vertex.get_label() for vertex in vertices],
+            node_size=VizTracingNetworkx.NODE_SIZE,
+            node_color=self.vertex_color_lookup[self.node_codes],
+            linewidths=VizTracingNetworkx.NODE_LINE_WITH,
+            edgecolors=VizTracingNetworkx.NODE_LINE_COLOR,
+            ax=self.axes)
 
         nx.draw_networkx_edges(
-            G=dg, pos=pos, edgelist=edges,
+            G=dg, pos=self.positions, edgelist=list(dg.edges()),
             width=VizTracingNetworkx.EDGE_WIDTH,
             edge_color=VizTracingNetworkx.EDGE_COLOR,
             style=VizTracingNetworkx.EDGE_STYLE,
-            arrowsize=VizTracingNetworkx.EDGE_ARROW_SIZE)
+            arrowsize=VizTracingNetworkx.EDGE_ARROW_SIZE,
+            node_size=VizTracingNetworkx.NODE_SIZE, ax=self.axes)
 
-        nx.draw_networkx_labels(
-            G=dg, pos=pos,
+        self.label_texts = nx.draw_networkx_labels(
+            G=dg, pos=self.positions,
+            labels={vertex.get_label(): self.get_extended_label(vertex)
+                    for vertex in vertices},
             font_size=VizTracingNetworkx.NODE_FONT_SIZE,
-            font_family=VizTracingNetworkx.NODE_FONT_FAMILY)
+            font_family=VizTracingNetworkx.NODE_FONT_FAMILY, ax=self.axes)
+
+        if static_labels:
+            nx.draw_networkx_nodes(
+                G=dg, pos=self.positions,
+                nodelist=list(static_labels), node_shape='s',
+                node_size=VizTracingNetworkx.NODE_SIZE,
+                node_color=VizTracingNetworkx.NODE_FILL_COLOR,
+                linewidths=VizTracingNetworkx.NODE_LINE_WITH,
+                edgecolors=VizTracingNetworkx.NODE_LINE_COLOR, ax=self.axes)
+            nx.draw_networkx_labels(
+                G=dg, pos=self.positions, labels=static_labels,
+                font_size=VizTracingNetworkx.NODE_FONT_SIZE,
+                font_family=VizTracingNetworkx.NODE_FONT_FAMILY,
+                ax=self.axes)
+
+        self.edge_collection: Union[LineCollection, None] = None
+        if edges and self.edge_state_names:
+            self.edge_collection = LineCollection(
+                [(self.positions[edge.get_tail().get_label()],
+                  self.positions[edge.get_head().get_label()])
+                 for edge in edges])
+            self.axes.add_collection(self.edge_collection)
+            self.edge_collection.set_animated(True)
+        self.apply_state_codes()
+
+        self.node_collection.set_animated(True)
+        for text in self.label_texts.values():
+            text.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        if self.frame_cache is not None:
+            self.figure_key = FrameCache.create_key(
+                type(self).__name__, self.get_figure_settings(),
+                self.vertex_color_lookup.tolist(),
+                self.edge_color_lookup.tolist(),
+                self.edge_width_lookup.tolist(), self.edge_style_lookup,
+                [[str(node), [float(c) for c in self.positions[node]]]
+                 for node in dg.nodes],
+                [[str(tail), str(head)] for tail, head in dg.edges],
+                {str(node): label for node, label in static_labels.items()})
+
+    def get_figure_settings(self) -> List[Any]:
+        """ Returns the settings with which the figures are drawn """
+
+        return [VizTracingNetworkx.FIGURE_SIZE, VizTracingNetworkx.FIGURE_DPI,
+                VizTracingNetworkx.IMAGE_TYPE, VizTracingNetworkx.NODE_SIZE,
+                VizTracingNetworkx.NODE_FILL_COLOR,
+                VizTracingNetworkx.NODE_LINE_WITH,
+                VizTracingNetworkx.NODE_LINE_COLOR,
+                VizTracingNetworkx.NODE_FONT_SIZE,
+                VizTracingNetworkx.NODE_FONT_FAMILY,
+                VizTracingNetworkx.EDGE_WIDTH, VizTracingNetworkx.EDGE_COLOR,
+                VizTracingNetworkx.EDGE_STYLE,
+                VizTracingNetworkx.EDGE_ARROW_SIZE]
+
+    def get_condensation(self, directed_graph: DirectedGraph) ->\
+            Mapping[Vertex, Any]:
+        """ Returns the vertices that are drawn as part of a supernode,
+        with the key of their supernode. Child classes can condense the
+        directed graph this way, by default nothing is condensed
 
-        plt.axis('off')
-        plt.show()
-        a = 100
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
 
-    def create_node_buckets(self, directed_graph: DirectedGraph) ->\
-            Dict[str, List[Vertex]]:
-        """ Create different buckets that fit nodes with the
-        same characteristics
+        return {}
 
-        Args:
-            directed_graph: The directed graph
+    def get_supernode_label(self, key: Any, size: int) -> str:
+        """ Returns the label of a supernode
 
-        Returns:
-            A dictionary that contains lists of vertices per
-            characteristic
+        Args:
+            key: the key of the supernode
+            size(int): the number of vertices in the supernode
         """
 
-        mapping: Dict[str, List[Vertex]] = dict()
-        for vertex in directed_graph.get_vertices():
-            if VizTracing.ACTIVATED in vertex.get_attrs():
-                mapping[VizTracing.ACTIVATED].append(vertex)
-            elif VizTracing.VISITED in vertex.get_attrs():
-                mapping[VizTracing.VISITED].append(vertex)
-            else:
-                mapping[VizTracing.DEFAULT].append(vertex)
+        return str(size)
 
-        return mapping
+    def get_node(self, vertex: Vertex) -> Any:
+        """ Returns the node of the figure that shows the vertex: its
+        supernode when the vertex is condensed, or else its label
 
-    def draw_nodes(self, dg: nx.DiGraph, pos, node_list: List[Any],
-                   directed_graph: DirectedGraph,
-                   state: str) -> None:
-        """ Method that draws the nodes """
+        Args:
+            vertex(Vertex): the vertex
+        """
 
-        fill_color =\
-            self.get_vertex_states()[state][VizTracingNetworkx.FILL_COLOR]
+        return self.condensation.get(vertex, vertex.get_label())
 
-        nx.draw_networkx_nodes(
-            G=dg, pos=pos, nodelist=node_list,
-            node_size=VizTracingNetworkx.NODE_SIZE,
-            node_color=fill_color,
-            linewidths=VizTracingNetworkx.NODE_LINE_WITH,
-            edgecolors=VizTracingNetworkx.NODE_LINE_COLOR
-        )
+    def render_overview(self, directed_graph: DirectedGraph):
+        """ Writes the overview image of the snapshot: the whole directed
+        graph at a small size, with the vertices in focus highlighted. The
+        overview figure is created once, later snapshots only recolor the
+        vertices that entered or left the focus
 
-    def get_nodes_by_state(self, directed_graph: DirectedGraph,
-                           state: str) -> Set[str]:
+        Args:
+            directed_graph (DirectedGraph): The directed graph
+        """
 
-        return {vertex.get_label() for vertex in directed_graph.get_vertices()
-                if vertex.has_enabled_attr(state)}
+        focus = set(self.focus or [])
+        if self.overview_figure is None:
+            vertices = list(directed_graph.get_vertices())
+            dg = nx.DiGraph()
+            for vertex in vertices:
+                dg.add_node(vertex.get_label())
+                for edge in vertex.get_edges():
+                    dg.add_edge(edge.get_tail().get_label(),
+                                edge.get_head().get_label())
+            positions = create_layout(dg)
+            self.overview_idx: Dict[Vertex, int] = {
+                vertex: idx for idx, vertex in enumerate(vertices)}
+            self.overview_colors = to_rgba_array(
+                [VizTracingNetworkx.OVERVIEW_COLOR] * len(vertices))
+            self.overview_focus: Set[Vertex] = set()
+
+            self.overview_figure = Figure(
+                figsize=VizTracingNetworkx.OVERVIEW_FIGURE_SIZE,
+                dpi=VizTracingNetworkx.FIGURE_DPI)
+            self.overview_canvas = FigureCanvasAgg(self.overview_figure)
+            self.overview_axes = self.overview_figure.add_subplot()
+            self.overview_axes.axis('off')
+            self.overview_nodes = nx.draw_networkx_nodes(
+                G=dg, pos=positions,
+                nodelist=[vertex.get_label() for vertex in vertices],
+                node_size=VizTracingNetworkx.OVERVIEW_NODE_SIZE,
+                node_color=self.overview_colors, ax=self.overview_axes)
+            nx.draw_networkx_edges(
+                G=dg, pos=positions, edgelist=list(dg.edges()),
+                edge_color=VizTracingNetworkx.OVERVIEW_COLOR,
+                arrows=False, ax=self.overview_axes)
+            self.overview_nodes.set_animated(True)
+            self.overview_canvas.draw()
+            self.overview_background = self.overview_canvas.copy_from_bbox(
+                self.overview_figure.bbox)
+
+        for vertex in focus ^ self.overview_focus:
+            self.overview_colors[self.overview_idx[vertex]] = to_rgba(
+                VizTracingNetworkx.OVERVIEW_FOCUS_COLOR if vertex in focus
+                else VizTracingNetworkx.OVERVIEW_COLOR)
+        self.overview_focus = focus
+        self.overview_nodes.set_facecolor(self.overview_colors)
+        self.overview_canvas.restore_region(self.overview_background)
+        self.overview_axes.draw_artist(self.overview_nodes)
+        self.overview_canvas.blit(self.overview_figure.bbox)
+
+        image_name = self.get_overview_image_name(self.snapshot_no) + "." + \
+            VizTracingNetworkx.IMAGE_TYPE
+        mpimg.imsave(image_name,
+                     np.asarray(self.overview_canvas.buffer_rgba()))
+        self.instrumentation.add_bytes(VizTracing.METRIC_IMAGE_BYTES,
+                                       os.path.getsize(image_name))
+
+
+def create_layout(dg: nx.DiGraph) -> Mapping[Any, Any]:
+    """ Function that lays the directed graph out without crossing edges,
+    if it's planar, otherwise with a spring layout. The spring layout is
+    seeded, so that a directed graph is always laid out the same way
+
+    Args:
+        dg(DiGraph): the networkx directed graph
+
+    Returns:
+        The positions of the nodes
+    """
+
+    try:
+        return nx.planar_layout(dg)
+    except nx.NetworkXException:
+        return nx.spring_layout(dg, seed=VizTracingNetworkx.LAYOUT_SEED)
@@ -0,0 +1,219 @@
+from threading import Lock
+from typing import Any, Dict, Mapping, Optional, Union
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+""" Module that contains a persistent, content-addressed cache of rendered
+frames. A frame is keyed on a hash of what determines its image, e.g. its
+DOT source and the renderer settings, so that a frame that was rendered
+before, in any run, is copied or linked instead of rendered again """
+
+
+class FrameCache:
+    """ Class that keeps rendered frames in a directory, one file per key.
+    The size of the directory is capped, the least recently used frames are
+    evicted first. The time of last use is the modification time of the
+    file, so that it's kept across runs.
+
+    With link, a cached frame is hardlinked to its target, which costs
+    nothing but requires that the target is removed, not overwritten, when
+    another image is written to its path (see remove_target). A frame is
+    copied when the target is on another device. It can be used from more
+    than one thread """
+
+    MAX_BYTES: int = 1024 * 1024 * 1024
+    SUFFIX: str = ".frame"
+
+    def __init__(self, path: str, max_bytes: int = MAX_BYTES,
+                 link: bool = True):
+        """ Opens the cache, creating its directory when needed
+
+        Args:
+            path(str): the directory of the cache
+            max_bytes(int): the maximum size of the cached frames
+            link(bool): if True, cached frames are hardlinked to their
+                targets, else they are copied
+        """
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+        os.makedirs(path, exist_ok=True)
+        self.entries: Dict[str, int] = {}
+        self.last_used: Dict[str, float] = {}
+        for name in os.listdir(path):
+            if name.endswith(FrameCache.SUFFIX):
+                stat = os.stat(os.path.join(path, name))
+                key = name[:-len(FrameCache.SUFFIX)]
+                self.entries[key] = stat.st_size
+                self.last_used[key] = stat.st_mtime
+        self.size = sum(self.entries.values())
+
+    @staticmethod
+    def create_key(*parts: Any) -> str:
+        """ Returns the key of a frame: a hash of the parts that determine
+        its image
+
+        Args:
+            *parts: JSON values, e.g. the DOT source and the settings of the
+                renderer
+        """
+
+        return hashlib.sha256(
+            json.dumps(parts, separators=(",", ":"),
+                       default=str).encode("utf-8")).hexdigest()
+
+    def get_file_name(self, key: str) -> str:
+        return os.path.join(self.path, key + FrameCache.SUFFIX)
+
+    def get(self, key: str, target: str) -> bool:
+        """ Copies or links the cached frame of the key to the target
+
+        Args:
+            key(str): the key of the frame
+            target(str): the path of the image
+
+        Returns:
+            True if the frame was cached
+        """
+
+        if not self.lookup(key):
+            return False
+        remove_target(target)
+        try:
+            if self.link:
+                try:
+                    os.link(self.get_file_name(key), target)
+                    return True
+                except OSError:
+                    pass
+            shutil.copyfile(self.get_file_name(key), target)
+        except FileNotFoundError:
+            self.forget(key)
+            return False
+        return True
+
+    def read(self, key: str) -> Optional[bytes]:
+        """ Returns the cached frame of the key
+
+        Args:
+            key(str): the key of the frame
+
+        Returns:
+            The encoded image, or None if the frame is not cached
+        """
+
+        if not self.lookup(key):
+            return None
+        try:
+            with open(self.get_file_name(key), "rb") as frame_file:
+                return frame_file.read()
+        except FileNotFoundError:
+            self.forget(key)
+            return None
+
+    def lookup(self, key: str) -> bool:
+        """ Checks whether the frame of the key is cached, counts the hit
+        or miss and marks the frame as used
+
+        Args:
+            key(str): the key of the frame
+        """
+
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return False
+            self.hits += 1
+            self.last_used[key] = self.touch(key)
+        return True
+
+    def put(self, key: str, image: Union[bytes, str]):
+        """ Adds a frame to the cache and evicts the least recently used
+        frames when the cache is too large. The frame is written to a
+        temporary file first, so that no reader sees a partial frame
+
+        Args:
+            key(str): the key of the frame
+            image: the encoded image, or the path of the image file
+        """
+
+        with self.lock:
+            if key in self.entries:
+                return
+        file_descriptor, temp_name = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(file_descriptor, "wb") as temp_file:
+                if isinstance(image, bytes):
+                    temp_file.write(image)
+                else:
+                    with open(image, "rb") as image_file:
+                        shutil.copyfileobj(image_file, temp_file)
+            os.replace(temp_name, self.get_file_name(key))
+        except BaseException:
+            remove_target(temp_name)
+            raise
+        with self.lock:
+            size = os.path.getsize(self.get_file_name(key))
+            self.size += size - self.entries.get(key, 0)
+            self.entries[key] = size
+            self.last_used[key] = self.touch(key)
+            self.evict()
+
+    def touch(self, key: str) -> float:
+        now = time.time()
+        try:
+            os.utime(self.get_file_name(key), (now, now))
+        except FileNotFoundError:
+            pass
+        return now
+
+    def forget(self, key: str):
+        with self.lock:
+            self.size -= self.entries.pop(key, 0)
+            self.last_used.pop(key, None)
+
+    def evict(self):
+        """ Removes the least recently used frames until the cache fits in
+        its maximum size. It's called with the lock held """
+
+        if self.size <= self.max_bytes:
+            return
+        for key in sorted(self.entries, key=self.last_used.__getitem__):
+            remove_target(self.get_file_name(key))
+            self.size -= self.entries.pop(key)
+            del self.last_used[key]
+            if self.size <= self.max_bytes:
+                break
+
+    def get_stats(self) -> Mapping[str, Union[int, float]]:
+        """ Returns the statistics of the cache: the hits and misses of
+        this process, the hit rate, the number of frames and their size """
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "frames": len(self.entries), "bytes": self.size}
+
+
+def remove_target(file_path: str):
+    """ Function that removes a file if it exists. An image that may be a
+    link to a cached frame is removed before another image is written to
+    its path, so that the cached frame stays intact
+
+    Args:
+        file_path(str): the path of the file
+    """
+
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
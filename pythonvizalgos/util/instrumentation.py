@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Mapping
+import json
+import time
+
+""" Module that contains the instrumentation of the tracing pipeline: counters,
+cumulative timers and byte counts per stage """
+
+
+class Instrumentation:
+    """ Class that collects the metrics of the stages of the tracing
+    pipeline. Every metric has a name, e.g. "advice.visit_vertex",
+    "snapshot.build" or "video.write". A timer also counts how often it ran.
+
+    The metrics can be retrieved with as_dict() or to_json(). Optionally,
+    sinks are called for every metric as it's recorded, with the type of the
+    metric ("count", "time" or "bytes"), its name and the value. It can be
+    used from more than one thread """
+
+    COUNT: str = "count"
+    TIME: str = "time"
+    BYTES: str = "bytes"
+
+    def __init__(self,
+                 sinks: List[Callable[[str, str, float], None]] = None):
+        """ Initialises the instrumentation
+
+        Args:
+            sinks(list): the callables that receive every recorded metric
+        """
+
+        self.sinks = list(sinks or [])
+        self.counters: Dict[str, int] = {}
+        self.timers: Dict[str, float] = {}
+        self.bytes: Dict[str, int] = {}
+        self.lock = Lock()
+
+    def add_sink(self, sink: Callable[[str, str, float], None]):
+        """ Adds a sink that receives every recorded metric
+
+        Args:
+            sink: callable with the type, the name and the value of a metric
+        """
+
+        self.sinks.append(sink)
+
+    def count(self, name: str, increment: int = 1):
+        """ Increments a counter
+
+        Args:
+            name(str): the name of the counter
+            increment(int): the increment
+        """
+
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + increment
+        self._emit(Instrumentation.COUNT, name, increment)
+
+    def add_time(self, name: str, seconds: float):
+        """ Adds the duration to a timer and counts it
+
+        Args:
+            name(str): the name of the timer
+            seconds(float): the duration in seconds
+        """
+
+        with self.lock:
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+            self.counters[name] = self.counters.get(name, 0) + 1
+        self._emit(Instrumentation.TIME, name, seconds)
+
+    def add_bytes(self, name: str, size: int):
+        """ Adds a number of bytes written
+
+        Args:
+            name(str): the name of the byte count
+            size(int): the number of bytes
+        """
+
+        with self.lock:
+            self.bytes[name] = self.bytes.get(name, 0) + size
+        self._emit(Instrumentation.BYTES, name, size)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        """ Context manager that adds the duration of its block to a timer
+
+        Args:
+            name(str): the name of the timer
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def as_dict(self) -> Mapping[str, Mapping[str, float]]:
+        """ Returns the metrics collected so far """
+
+        with self.lock:
+            return {"counters": dict(self.counters),
+                    "timers": dict(self.timers),
+                    "bytes": dict(self.bytes)}
+
+    def to_json(self) -> str:
+        """ Returns the metrics collected so far as JSON """
+
+        return json.dumps(self.as_dict(), indent=2, sort_keys=True)
+
+    def _emit(self, metric_type: str, name: str, value: float):
+        for sink in self.sinks:
+            sink(metric_type, name, value)
+
+
+def time_block(instrumentation: Instrumentation, name: str):
+    """ Function that returns a timer of the instrumentation, or a block that
+    measures nothing when there is no instrumentation
+
+    Args:
+        instrumentation(Instrumentation): the instrumentation or None
+        name(str): the name of the timer
+    """
+
+    if instrumentation is None:
+        return _no_timer()
+    return instrumentation.time(name)
+
+
+@contextmanager
+def _no_timer() -> Iterator[None]:
+    yield
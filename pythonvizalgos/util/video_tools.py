@@ -1,34 +1,610 @@
 import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+import warnings
 import cv2
+import numpy as np
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Thread
+from typing import NamedTuple, Optional
+from pythonvizalgos.util.instrumentation import time_block
 
 """ Module that contains tools for handling videos """
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PREFETCH_IMAGES_PER_WORKER = 2
+
+METRIC_VIDEO_HEADER = "video.header"
+METRIC_VIDEO_DECODE = "video.decode"
+METRIC_VIDEO_DECODE_WAIT = "video.decode_wait"
+METRIC_VIDEO_WRITE = "video.write"
+METRIC_VIDEO_BYTES = "video"
+
+TITLE_SECONDS = 2.0
+TITLE_FONT_SCALE = 1.0
+TITLE_MARGIN = 0.9
+
+FFMPEG = "ffmpeg"
+FFMPEG_FPS_MODE_VERSION = (5, 1)
+FFMPEG_ERROR_LINES = 10
+
+BACKEND_FFMPEG = "ffmpeg"
+BACKEND_OPENCV = "opencv"
+
+VIDEO_NAME = "video.avi"
+
+
+class EncoderSettings(NamedTuple):
+    """ The settings of the ffmpeg encoder backend. A video is encoded with
+    the codec at a constant quality (crf) or at a target bitrate, e.g.
+    "500k", with a keyframe every gop frames. With vfr, a frame that is
+    held is stored once instead of repeatedly, so the frame rate of the
+    video varies, which needs an ffmpeg that knows -fps_mode (5.1) or
+    -vsync. The container is the extension of the videos, as AVI doesn't
+    suit most modern codecs. The encoder falls back to the OpenCV writer,
+    with a warning, when ffmpeg is not found """
+
+    codec: str = "libx264"
+    crf: Optional[int] = 23
+    bitrate: Optional[str] = None
+    gop: Optional[int] = 250
+    vfr: bool = False
+    preset: Optional[str] = None
+    pixel_format: str = "yuv420p"
+    executable: str = FFMPEG
+    container: str = "mp4"
+
+
+def get_video_name(video_name=VIDEO_NAME, encoder=None):
+    """ Function that returns the name of a video with the extension of the
+    container of the encoder, the name itself without encoder settings
+
+    Args:
+        video_name(str): the name of the video
+        encoder(EncoderSettings): optionally, the settings of the ffmpeg
+        encoder
+    """
+
+    if encoder is None:
+        return video_name
+    return os.path.splitext(video_name)[0] + "." + encoder.container
+
+
+@lru_cache(maxsize=None)
+def get_ffmpeg_version(executable=FFMPEG):
+    """ Function that returns the major and minor version of ffmpeg, read
+    from the output of ffmpeg -version
+
+    Args:
+        executable(str): the ffmpeg executable
+
+    Returns:
+        The version as a tuple, None if it can't be read, e.g. for a
+        development build
+    """
+
+    try:
+        output = subprocess.run([executable, "-version"],
+                                stdin=subprocess.DEVNULL,
+                                capture_output=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(rb"version n?(\d+)\.(\d+)", output)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def create_video_writer(video_path, size, video_type="mp4v", fps=2.0,
+                        encoder=None):
+    """ Function that opens the writer of a video: an ffmpeg process when
+    encoder settings are given and ffmpeg is found, otherwise an OpenCV
+    video writer. Falling back to OpenCV when ffmpeg is not found is
+    reported by a warning. The backend of the writer is given by
+    get_video_backend
+
+    Args:
+        video_path(str): the path of the video
+        size(tuple): the width and height of the video
+        video_type(str): the video type of the OpenCV writer
+        fps: the frame rate per second
+        encoder(EncoderSettings): optionally, the settings of the ffmpeg
+        encoder
+
+    Returns:
+        A writer with the write and release methods of cv2.VideoWriter
+    """
+
+    if encoder is not None:
+        if shutil.which(encoder.executable) is not None:
+            return FfmpegWriter(video_path, size, fps, encoder)
+        warnings.warn(encoder.executable + " not found, writing " +
+                      video_path + " with OpenCV", RuntimeWarning)
+    return cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*video_type),
+                           fps, size)
+
+
+def get_video_backend(writer):
+    """ Function that returns the backend of a video writer
+
+    Args:
+        writer: the writer, see create_video_writer
+
+    Returns:
+        BACKEND_FFMPEG or BACKEND_OPENCV
+    """
+
+    return BACKEND_FFMPEG if isinstance(writer, FfmpegWriter) \
+        else BACKEND_OPENCV
+
+
+def create_ffmpeg_command(video_path, size, fps, encoder, version=None):
+    """ Function that returns the command line of an ffmpeg process that
+    reads raw BGR frames of the given size from its standard input and
+    encodes them to the video
+
+    Args:
+        video_path(str): the path of the video
+        size(tuple): the width and height of the frames
+        fps: the frame rate per second
+        encoder(EncoderSettings): the settings of the encoder
+        version(tuple): the version of ffmpeg, read from the executable by
+        default when vfr is set. Before 5.1, -vsync is used instead of
+        -fps_mode
+    """
+
+    filters = ["pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+    if encoder.vfr:
+        filters.append("mpdecimate=hi=0:lo=0:frac=0:max=0")
+    command = [encoder.executable, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "bgr24",
+               "-s", "{}x{}".format(*size), "-r", str(fps), "-i", "-",
+               "-vf", ",".join(filters), "-c:v", encoder.codec,
+               "-pix_fmt", encoder.pixel_format]
+    if encoder.bitrate is not None:
+        command += ["-b:v", str(encoder.bitrate)]
+    elif encoder.crf is not None:
+        command += ["-crf", str(encoder.crf)]
+    if encoder.gop is not None:
+        command += ["-g", str(encoder.gop)]
+    if encoder.preset is not None:
+        command += ["-preset", encoder.preset]
+    if encoder.vfr:
+        version = version or get_ffmpeg_version(encoder.executable)
+        if version is not None and version < FFMPEG_FPS_MODE_VERSION:
+            command += ["-vsync", "vfr"]
+        else:
+            command += ["-fps_mode", "vfr"]
+    return command + [video_path]
+
+
+class FfmpegWriter:
+    """ Class that encodes a video with an ffmpeg process, to which the
+    decoded frames are piped as raw video. It has the write and release
+    methods of cv2.VideoWriter. The output of ffmpeg goes to a temporary
+    file rather than a pipe, which would block ffmpeg once full """
+
+    def __init__(self, video_path, size, fps, encoder):
+        """ Starts the ffmpeg process
+
+        Args:
+            video_path(str): the path of the video
+            size(tuple): the width and height of the frames
+            fps: the frame rate per second
+            encoder(EncoderSettings): the settings of the encoder
+        """
+
+        self.video_path = video_path
+        self.size = size
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            create_ffmpeg_command(video_path, size, fps, encoder),
+            stdin=subprocess.PIPE, stderr=self.log)
+
+    def write(self, frame):
+        """ Pipes a frame to ffmpeg
+
+        Args:
+            frame: the decoded BGR frame, of the size of the video
+
+        Raises:
+            Exception: if ffmpeg stopped
+        """
+
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except (BrokenPipeError, ValueError):
+            self.release()
+            raise Exception("Encoding video " + self.video_path +
+                            " stopped")
+
+    def release(self):
+        """ Waits until ffmpeg has written the video
+
+        Raises:
+            Exception: if ffmpeg failed, with the last lines of its output
+        """
+
+        if self.process.stdin.closed:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        exit_code = self.process.wait()
+        self.log.seek(0)
+        output = self.log.read().decode(errors="replace")
+        self.log.close()
+        if exit_code != 0:
+            raise Exception(
+                "Encoding video " + self.video_path + " failed: " +
+                "\n".join(output.splitlines()[-FFMPEG_ERROR_LINES:]))
+
 
 def convert_images_to_video(
         resource_path,
-        video_name="video.avi", image_type="png", video_type="mp4v", fps=2.0):
-    """ Function that converts a list of images to a video
+        video_name=None, image_type="png", video_type="mp4v", fps=2.0,
+        durations=None, workers=None, instrumentation=None, encoder=None):
+    """ Function that converts a list of images to a video. The size of the
+    video is the largest width and height of the images, read from the image
+    headers. Every image is centered on a canvas of that size. The images
+    are decoded ahead on a pool of threads, so the video writer doesn't wait
 
     Args:
         resource_path(str): the path to the images and also where the video
         will be generated
-        video_name(str): the name of the video
+        video_name(str): the name of the video, by default VIDEO_NAME with
+        the extension of the container of the encoder (see get_video_name)
         video_type(str): the video type
         fps: the frame rate per second
+        durations(list): optionally, for every image the number of frames
+        it's held in the video
+        workers(int): the number of decoding threads, defaults to the
+        number of cores
+        instrumentation(Instrumentation): optionally, the instrumentation
+        that receives the times of the phases and the size of the video
+        encoder(EncoderSettings): optionally, the settings of the ffmpeg
+        encoder backend, see create_video_writer
 
+    Returns:
+        A dict with the statistics of the conversion: the path of the video,
+        the backend that wrote it, the number of images and written frames,
+        the size of the video and the time spent on reading the sizes,
+        waiting for decoded images, writing frames and in total
     """
 
-    images = [img for img in sorted(os.listdir(resource_path))
+    start = time.perf_counter()
+    images = [os.path.join(resource_path, img)
+              for img in sorted(os.listdir(resource_path))
               if img.endswith(image_type)]
-    frame = cv2.imread(os.path.join(resource_path, images[0]))
-    fourcc = cv2.VideoWriter_fourcc(*video_type)
-    height, width, channels = frame.shape
-    out = cv2.VideoWriter(
-        os.path.join(resource_path, video_name), fourcc, fps, (width, height))
+    if not images:
+        raise Exception("No " + image_type + " images found in " +
+                        resource_path)
+
+    sizes = [read_image_size(image) for image in images]
+    width = max(size[0] for size in sizes)
+    height = max(size[1] for size in sizes)
+    header_seconds = time.perf_counter() - start
+
+    video_path = os.path.join(resource_path,
+                              video_name or get_video_name(encoder=encoder))
+    out = create_video_writer(video_path, (width, height), video_type, fps,
+                              encoder)
+
+    workers = workers or os.cpu_count() or 1
+    decode_wait_seconds = 0.0
+    write_seconds = 0.0
+    frame_count = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        decoded = deque()
+        next_image = 0
+        for idx in range(len(images)):
+            while next_image < len(images) and \
+                    len(decoded) < PREFETCH_IMAGES_PER_WORKER * workers:
+                decoded.append(executor.submit(cv2.imread, images[next_image]))
+                next_image += 1
+            wait_start = time.perf_counter()
+            frame = decoded.popleft().result()
+            if frame is None:
+                raise Exception("Could not decode image " + images[idx])
+            write_start = time.perf_counter()
+            decode_wait_seconds += write_start - wait_start
 
-    for image in images:
-        out.write(cv2.imread(os.path.join(resource_path, image)))
+            frame = fit_frame(frame, width, height)
+            for _ in range(durations[idx]
+                           if durations and idx < len(durations) else 1):
+                out.write(frame)
+                frame_count += 1
+            write_seconds += time.perf_counter() - write_start
 
     out.release()
     cv2.destroyAllWindows()
-    print("Generated video: " + os.path.join(resource_path, video_name))
+    print("Generated video: " + video_path)
+
+    if instrumentation is not None:
+        instrumentation.add_time(METRIC_VIDEO_HEADER, header_seconds)
+        instrumentation.add_time(METRIC_VIDEO_DECODE_WAIT,
+                                 decode_wait_seconds)
+        instrumentation.add_time(METRIC_VIDEO_WRITE, write_seconds)
+        if os.path.exists(video_path):
+            instrumentation.add_bytes(METRIC_VIDEO_BYTES,
+                                      os.path.getsize(video_path))
+
+    return {"video": video_path,
+            "backend": get_video_backend(out),
+            "images": len(images),
+            "frames": frame_count,
+            "width": width,
+            "height": height,
+            "header_seconds": header_seconds,
+            "decode_wait_seconds": decode_wait_seconds,
+            "write_seconds": write_seconds,
+            "total_seconds": time.perf_counter() - start}
+
+
+def read_image_size(image_path):
+    """ Function that reads the size of an image. For PNG images only the
+    header is read, other images are decoded
+
+    Args:
+        image_path(str): the path of the image
+
+    Returns:
+        The width and height of the image
+    """
+
+    with open(image_path, "rb") as image_file:
+        header = image_file.read(24)
+    if header[:8] == PNG_SIGNATURE and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    height, width = cv2.imread(image_path).shape[:2]
+    return width, height
+
+
+def fit_frame(frame, width, height):
+    """ Function that fits a frame onto a canvas of the given size. A larger
+    frame is scaled down, keeping its aspect ratio, and the frame is
+    centered on a white canvas
+
+    Args:
+        frame: the decoded frame
+        width(int): the width of the canvas
+        height(int): the height of the canvas
+
+    Returns:
+        The frame with the size of the canvas
+    """
+
+    frame_height, frame_width = frame.shape[:2]
+    if (frame_width, frame_height) == (width, height):
+        return frame
+    scale = min(1.0, width / frame_width, height / frame_height)
+    if scale < 1.0:
+        frame = cv2.resize(frame, (max(1, int(frame_width * scale)),
+                                   max(1, int(frame_height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        frame_height, frame_width = frame.shape[:2]
+    top = (height - frame_height) // 2
+    left = (width - frame_width) // 2
+    return cv2.copyMakeBorder(
+        frame, top, height - frame_height - top, left,
+        width - frame_width - left, cv2.BORDER_CONSTANT,
+        value=(255, 255, 255))
+
+
+def concatenate_videos(
+        videos, video_path, titles=None, video_type="mp4v", fps=2.0,
+        title_seconds=TITLE_SECONDS, instrumentation=None, encoder=None):
+    """ Function that joins videos into one video, each clip optionally
+    preceded by a title card. The size of the video is the largest width
+    and height of the clips, every frame is centered on a canvas of that
+    size
+
+    Args:
+        videos(list): the paths of the clips, in order
+        video_path(str): the path of the joined video
+        titles(list): optionally, for every clip the text of its title
+        card, no card for a clip whose title is None
+        video_type(str): the video type
+        fps: the frame rate per second
+        title_seconds(float): the number of seconds a title card is held
+        instrumentation(Instrumentation): optionally, the instrumentation
+        that receives the time of the writing and the size of the video
+        encoder(EncoderSettings): optionally, the settings of the ffmpeg
+        encoder backend, see create_video_writer
+
+    Returns:
+        A dict with the path of the video, the backend that wrote it, the
+        number of clips, the number of written frames and the size of the
+        video
+    """
+
+    if not videos:
+        raise Exception("No videos to concatenate into " + video_path)
+    sizes = []
+    for video in videos:
+        capture = cv2.VideoCapture(video)
+        if not capture.isOpened():
+            raise Exception("Could not open video " + video)
+        sizes.append((int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                      int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))))
+        capture.release()
+    width = max(size[0] for size in sizes)
+    height = max(size[1] for size in sizes)
+
+    out = create_video_writer(video_path, (width, height), video_type, fps,
+                              encoder)
+    title_frames = max(1, int(round(title_seconds * fps)))
+    frame_count = 0
+    with time_block(instrumentation, METRIC_VIDEO_WRITE):
+        for idx, video in enumerate(videos):
+            title = titles[idx] if titles and idx < len(titles) else None
+            if title is not None:
+                card = create_title_card(title, width, height)
+                for _ in range(title_frames):
+                    out.write(card)
+                frame_count += title_frames
+            capture = cv2.VideoCapture(video)
+            while True:
+                read, frame = capture.read()
+                if not read:
+                    break
+                out.write(fit_frame(frame, width, height))
+                frame_count += 1
+            capture.release()
+    out.release()
+    print("Generated video: " + video_path)
+
+    if instrumentation is not None and os.path.exists(video_path):
+        instrumentation.add_bytes(METRIC_VIDEO_BYTES,
+                                  os.path.getsize(video_path))
+    return {"video": video_path,
+            "backend": get_video_backend(out),
+            "clips": len(videos),
+            "frames": frame_count,
+            "width": width,
+            "height": height}
+
+
+def create_title_card(title, width, height):
+    """ Function that creates a frame with a title, centered in black on a
+    white canvas. The text is scaled down to fit the width
+
+    Args:
+        title(str): the text of the title
+        width(int): the width of the frame
+        height(int): the height of the frame
+
+    Returns:
+        The BGR frame
+    """
+
+    card = np.full((height, width, 3), 255, dtype=np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (text_width, text_height), _ = cv2.getTextSize(
+        title, font, TITLE_FONT_SCALE, 1)
+    scale = min(TITLE_FONT_SCALE,
+                TITLE_FONT_SCALE * TITLE_MARGIN * width / max(1, text_width))
+    thickness = max(1, int(round(2 * scale)))
+    (text_width, text_height), _ = cv2.getTextSize(title, font, scale,
+                                                   thickness)
+    cv2.putText(card, title, ((width - text_width) // 2,
+                              (height + text_height) // 2),
+                font, scale, (0, 0, 0), thickness, cv2.LINE_AA)
+    return card
+
+
+class VideoStream:
+    """ Class that writes frames straight into a video, without intermediate
+    image files. The frames are passed through a bounded queue to a thread
+    that decodes them and feeds a running video writer. As the frames are
+    not known in advance, the size of the video, the canvas, can be given:
+    every frame is centered on it, as convert_images_to_video does.
+    Without a canvas, the size of the video is the size of the first
+    frame. A frame that is larger than the canvas is scaled down to fit it
+    (see fit_frame). The backend that writes the video is known once the
+    first frame is written """
+
+    def __init__(self, video_path, video_type="mp4v", fps=2.0,
+                 max_pending=64, instrumentation=None, encoder=None,
+                 size=None):
+        """ Initialises the stream and starts the writer thread
+
+        Args:
+            video_path(str): the path of the video
+            video_type(str): the video type
+            fps: the frame rate per second
+            max_pending(int): the number of frames that can be queued before
+            write() waits for the writer thread
+            instrumentation(Instrumentation): optionally, the
+            instrumentation that receives the times of the decoding and the
+            writing and the size of the video
+            encoder(EncoderSettings): optionally, the settings of the ffmpeg
+            encoder backend, see create_video_writer
+            size(tuple): optionally, the width and height of the canvas,
+            by default the size of the first frame
+        """
+
+        self.video_path = video_path
+        self.size = size
+        self.video_type = video_type
+        self.fps = fps
+        self.encoder = encoder
+        self.frames = Queue(maxsize=max_pending)
+        self.frame_count = 0
+        self.backend = None
+        self.error = None
+        self.instrumentation = instrumentation
+        self.thread = Thread(target=self._write_frames, daemon=True)
+        self.thread.start()
+
+    def write(self, frame, duration=1):
+        """ Queues a frame for the video
+
+        Args:
+            frame: the encoded image (bytes) or the decoded BGR frame
+            duration(int): the number of video frames it's held
+        """
+
+        self.frames.put((frame, duration))
+
+    def close(self):
+        """ Waits until all queued frames are written and releases the
+        video
+
+        Raises:
+            Exception: if the writer thread failed
+        """
+
+        self.frames.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise Exception("Writing video " + self.video_path +
+                            " failed: " + str(self.error))
+        if self.instrumentation is not None and \
+                os.path.exists(self.video_path):
+            self.instrumentation.add_bytes(
+                METRIC_VIDEO_BYTES, os.path.getsize(self.video_path))
+        print("Generated video: " + self.video_path)
+
+    def _write_frames(self):
+        out = None
+        size = self.size
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                frame, duration = item
+                if isinstance(frame, (bytes, bytearray)):
+                    with time_block(self.instrumentation,
+                                    METRIC_VIDEO_DECODE):
+                        frame = cv2.imdecode(np.frombuffer(frame, np.uint8),
+                                             cv2.IMREAD_COLOR)
+                if out is None:
+                    if size is None:
+                        height, width = frame.shape[:2]
+                        size = (width, height)
+                    out = create_video_writer(self.video_path, size,
+                                              self.video_type, self.fps,
+                                              self.encoder)
+                    self.backend = get_video_backend(out)
+                with time_block(self.instrumentation, METRIC_VIDEO_WRITE):
+                    frame = fit_frame(frame, *size)
+                    for _ in range(duration):
+                        out.write(frame)
+                self.frame_count += duration
+            except Exception as e:
+                self.error = e
+        if out is not None:
+            try:
+                out.release()
+            except Exception as e:
+                self.error = self.error or e
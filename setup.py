@@ -17,7 +17,7 @@ setup(name="python-viz-algos",
       url="https://github.com/evowilliamson/python-viz-algos",
       packages=find_packages(),
       install_requires=[
-          "graphviz", "graphviz", "opencv-python", "python-algos"
+          "graphviz", "graphviz", "opencv-python", "python-algos", "numpy"
       ],
       test_suite="tests",
       classifiers=[
@@ -0,0 +1,134 @@
+import unittest
+from pythonvizalgos.graph import batch_runner
+from pythonvizalgos.graph.batch_runner import TraceJob
+from pythonvizalgos.graph.viz_tracing import VizTracing
+import cv2
+import json
+import numpy as np
+import os
+import shutil
+import tempfile
+import time
+
+
+def count_vertices(job, options):
+    if job.name == "failing":
+        raise ValueError("no video for " + job.name)
+    if job.name == "slow":
+        time.sleep(10)
+    return {"frames": len(job.vertices),
+            "metrics": {"timers": {"execute.algorithm": 1.0}}}
+
+
+def write_clip(job, options):
+    """ Creates the directory of the job as VizTracing.execute does, without
+    its parents, and writes a frame per vertex to its video """
+
+    os.mkdir(job.output_path)
+    out = cv2.VideoWriter(
+        os.path.join(job.output_path, VizTracing.VIDEO_NAME),
+        cv2.VideoWriter_fourcc(*"mp4v"), 2.0, (64, 48))
+    for _ in job.vertices:
+        out.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    out.release()
+    return {"frames": len(job.vertices)}
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write_json(self, name, content):
+        with open(os.path.join(self.dir, name), "w") as json_file:
+            json.dump(content, json_file)
+        return os.path.join(self.dir, name)
+
+    def test_load_jobs_from_directory(self):
+        self.write_json("b.json", {"1": [2], "2": [1]})
+        self.write_json("a.json", {"x": ["y"], "y": []})
+        self.write_json("notes.txt", {})
+        jobs = batch_runner.load_jobs(self.dir, "out")
+        self.assertEqual([job.name for job in jobs], ["a", "b"])
+        self.assertEqual(jobs[1].vertices, {1: [2], 2: [1]})
+        self.assertEqual(jobs[0].vertices, {"x": ["y"], "y": []})
+        self.assertEqual(jobs[0].output_path, os.path.join("out", "a"))
+
+    def test_load_jobs_from_manifest(self):
+        self.write_json("chain.json", {"0": [1], "1": []})
+        manifest = self.write_json("manifest.json", [
+            "chain.json",
+            {"name": "loop", "vertices": {"0": [0]}}])
+        jobs = batch_runner.load_jobs(manifest, "out")
+        self.assertEqual([(job.name, job.vertices) for job in jobs],
+                         [("chain", {0: [1], 1: []}), ("loop", {0: [0]})])
+
+        manifest = self.write_json("manifest.json", [
+            "chain.json", {"name": "chain", "path": "chain.json"}])
+        with self.assertRaises(Exception):
+            batch_runner.load_jobs(manifest, "out")
+        with self.assertRaises(Exception):
+            batch_runner.to_vertices([1, 2], "list")
+
+    def test_run_jobs(self):
+        jobs = [TraceJob(name, {0: [1], 1: []}, self.dir)
+                for name in ["first", "failing", "slow", "last"]]
+        results = batch_runner.run_jobs(jobs, {}, workers=2, timeout=2.0,
+                                        run=count_vertices)
+        self.assertEqual([(result["name"], result["status"])
+                          for result in results],
+                         [("first", batch_runner.STATUS_OK),
+                          ("failing", batch_runner.STATUS_FAILED),
+                          ("slow", batch_runner.STATUS_TIMEOUT),
+                          ("last", batch_runner.STATUS_OK)])
+        self.assertIn("ValueError", results[1]["error"])
+        self.assertLess(results[2]["seconds"], 10)
+
+        report = batch_runner.create_report(results, 3.0)
+        self.assertEqual(report["statuses"],
+                         {batch_runner.STATUS_OK: 2,
+                          batch_runner.STATUS_FAILED: 1,
+                          batch_runner.STATUS_TIMEOUT: 1})
+        self.assertEqual(report["frames"], 4)
+        self.assertEqual(report["timers"], {"execute.algorithm": 2.0})
+        self.assertEqual([failure["name"] for failure in report["failures"]],
+                         ["failing", "slow"])
+        summary = batch_runner.format_summary(report)
+        self.assertIn("4 jobs: 2 ok, 1 failed, 1 timed out", summary)
+        self.assertIn("FAILED slow (timeout)", summary)
+
+    def test_split_components(self):
+        components = batch_runner.split_components(
+            {1: [2], 2: [], 3: [3], 4: [], 5: [4, 6], 6: [], 7: [1]})
+        self.assertEqual(components, [{1: [2], 2: [], 7: [1]}, {3: [3]},
+                                      {4: [], 5: [4, 6], 6: []}])
+        self.assertEqual(batch_runner.split_components({}), [])
+
+    def test_trace_components(self):
+        job = TraceJob("graph", {0: [1], 1: [], 2: [2]},
+                       os.path.join(self.dir, "out", "graph"))
+        traced = batch_runner.trace_components(job, {}, workers=2,
+                                               run=write_clip)
+        self.assertEqual([(result["name"], result["status"])
+                          for result in traced["results"]],
+                         [("graph/component_001", batch_runner.STATUS_OK),
+                          ("graph/component_002", batch_runner.STATUS_OK)])
+        capture = cv2.VideoCapture(traced["video"])
+        frames = 0
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+        self.assertEqual(frames, 2 * 4 + 2 + 1)
+
+        separate = batch_runner.trace_components(
+            job._replace(output_path=os.path.join(self.dir, "separate")),
+            {}, separate=True, run=write_clip)
+        self.assertIsNone(separate["video"])
+        self.assertEqual(sorted(os.listdir(
+            os.path.join(self.dir, "separate"))),
+            ["component_001", "component_002"])
+
+
+if __name__ == '__main__':
+    unittest.main()
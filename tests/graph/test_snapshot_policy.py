@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+from pythonvizalgos.graph.snapshot_policy import EveryNthSnapshotPolicy, \
+    MaxFramesSnapshotPolicy, MilestoneSnapshotPolicy, \
+    TimeSamplingSnapshotPolicy
+
+
+class TestSnapshotPolicy(unittest.TestCase):
+
+    def take(self, policy, milestones):
+        taken = []
+        for milestone in milestones:
+            if policy.accept(milestone):
+                policy.taken(milestone)
+                taken.append(milestone)
+        return taken
+
+    def test_every_nth(self):
+        self.assertEqual(
+            self.take(EveryNthSnapshotPolicy(2),
+                      ["a", None, "b", "c", None, None]),
+            ["a", "b", "c", None])
+        self.assertEqual(
+            self.take(EveryNthSnapshotPolicy(2, keep_milestones=False),
+                      ["a", None, "b", "c", None, None]),
+            ["a", "b", None])
+        with self.assertRaises(Exception):
+            EveryNthSnapshotPolicy(0)
+
+    def test_max_frames(self):
+        self.assertEqual(
+            self.take(MaxFramesSnapshotPolicy(2), ["a", None, "b"]),
+            ["a", None])
+
+    def test_milestones(self):
+        self.assertEqual(
+            self.take(MilestoneSnapshotPolicy(), ["a", None, "b"]),
+            ["a", "b"])
+        self.assertEqual(
+            self.take(MilestoneSnapshotPolicy({"b"}), ["a", None, "b"]),
+            ["b"])
+
+    def take_at(self, policy, snapshots):
+        """ Offers the snapshots, given as (time, milestone) pairs, to the
+        policy at their time and returns the times of the taken ones """
+
+        now = [0.0]
+        taken = []
+        with mock.patch("time.monotonic", lambda: now[0]):
+            for now[0], milestone in snapshots:
+                if policy.accept(milestone):
+                    policy.taken(milestone)
+                    taken.append(now[0])
+        return taken
+
+    def test_time_sampling(self):
+        snapshots = [(0.0, None), (0.5, None), (0.75, "a"), (1.25, None),
+                     (1.75, None), (2.5, None)]
+        self.assertEqual(
+            self.take_at(TimeSamplingSnapshotPolicy(1.0), snapshots),
+            [0.0, 0.75, 1.75])
+        self.assertEqual(
+            self.take_at(TimeSamplingSnapshotPolicy(
+                1.0, keep_milestones=False), snapshots),
+            [0.0, 1.25, 2.5])
@@ -0,0 +1,86 @@
+import unittest
+from pythonvizalgos.graph.state_store import StateStore
+import numpy as np
+
+
+class TestStateStore(unittest.TestCase):
+
+    def test_set_and_reset(self):
+        state_store = StateStore(capacity=2)
+        for element in range(5):
+            state_store.set(element, "visited")
+        state_store.set(3, "activated")
+        state_store.reset(1, "visited")
+        state_store.reset(7, "visited")
+        self.assertEqual(len(state_store.flags), 8)
+        self.assertEqual([state_store.has(element, "visited")
+                          for element in range(6)],
+                         [True, False, True, True, True, False])
+        self.assertTrue(state_store.get(3, "activated"))
+        self.assertFalse(state_store.get(2, "activated"))
+        self.assertFalse(state_store.get(2, "unknown"))
+        self.assertNotIn("visited", state_store.columns)
+
+    def test_columns(self):
+        state_store = StateStore()
+        state_store.set("a", "S", 0)
+        state_store.set("b", "S", 4)
+        self.assertEqual(state_store.columns["S"].dtype, np.int64)
+        self.assertEqual(state_store.get("a", "S"), 0)
+        self.assertIsInstance(state_store.get("b", "S"), int)
+        state_store.reset("a", "S")
+        self.assertFalse(state_store.get("a", "S"))
+
+        state_store.set("c", "S", "top")
+        self.assertEqual(state_store.columns["S"].dtype, object)
+        self.assertEqual([state_store.get(element, "S")
+                          for element in "abc"], [False, 4, "top"])
+
+        state_store.set("a", "C")
+        state_store.set("b", "C", 2)
+        self.assertEqual([state_store.get(element, "C")
+                          for element in "ab"], [True, 2])
+
+    def test_codes(self):
+        state_store = StateStore()
+        state_store.set(1, "visited")
+        state_store.set(2, "visited")
+        state_store.set(2, "activated")
+        statuses = ["activated", "visited", "disabled"]
+        self.assertEqual(
+            state_store.get_codes([0, 1, 2], statuses).tolist(), [3, 1, 0])
+        self.assertEqual([state_store.get_code(element, statuses)
+                          for element in [0, 1, 2]], [3, 1, 0])
+        self.assertEqual(state_store.get_codes([], statuses).tolist(), [])
+
+    def test_members(self):
+        state_store = StateStore(capacity=1)
+        for element in range(3):
+            state_store.set(element, "visited")
+        state_store.set(1, "activated")
+        state_store.reset(1, "visited")
+        self.assertEqual(state_store.get_members(),
+                         {"visited": {0, 2}, "activated": {1}})
+        self.assertEqual(state_store.get_elements("visited"), {0, 2})
+        self.assertEqual(state_store.get_elements("unknown"), set())
+
+    def test_copy(self):
+        state_store = StateStore()
+        state_store.set("a", "S", 1)
+        copied = state_store.copy()
+        copied.set("a", "S", 2)
+        copied.set("b", "visited")
+        self.assertEqual(state_store.get("a", "S"), 1)
+        self.assertFalse(state_store.has("b", "visited"))
+        self.assertEqual(copied.get("a", "S"), 2)
+
+    def test_max_statuses(self):
+        state_store = StateStore()
+        for status in range(StateStore.MAX_STATUSES):
+            state_store.set(0, str(status))
+        with self.assertRaises(Exception):
+            state_store.set(0, "one too many")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from pythonalgos.graph.directed_graph import DirectedGraph
+from pythonalgos.graph.algorithm_ordering import AlgorithmOrdering
+from pythonvizalgos.graph.viz_tracing import VizTracing, VizTracingAdvisor
+from pythonvizalgos.graph.trace_file import TraceReader, write_trace
+import os
+import shutil
+import tempfile
+
+
+class FrameCollectingVizTracing(VizTracing):
+    """ Tracing class that keeps the state of every frame in memory """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frames = []
+
+    def render_snapshot(self, directed_graph):
+        self.frames.append((
+            self.get_activated_vertex().get_label()
+            if self.get_activated_vertex() else None,
+            {vertex.get_label():
+                (self.get_status(vertex, VizTracing.ACTIVATED),
+                 self.get_status(vertex, VizTracing.VISITED))
+             for vertex in directed_graph.get_vertices()},
+            {(edge.get_tail().get_label(), edge.get_head().get_label())
+             for vertex in directed_graph.get_vertices()
+             for edge in vertex.get_edges()
+             if self.get_status(edge, VizTracing.DISABLED)}))
+
+
+class TestTraceFile(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {v: [head for head in [v + 1, v + 2] if head < 12]
+                         for v in range(12)}
+        self.dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.dir, "trace.pvt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def trace(self, record):
+        directed_graph = DirectedGraph(
+            self.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+        viz_tracing = FrameCollectingVizTracing(
+            path=None, directed_graph=directed_graph, vertex_states=[],
+            edge_states=[], record=record)
+        directed_graph.is_cyclic(VizTracingAdvisor(viz_tracing))
+        return viz_tracing
+
+    def create_tracing(self, reader):
+        return FrameCollectingVizTracing(
+            path=None, directed_graph=reader.create_directed_graph(),
+            vertex_states=[], edge_states=[])
+
+    def test_replay_from_trace_file(self):
+        direct = self.trace(record=False)
+        write_trace(self.trace(record=True), self.file_path,
+                    keyframe_interval=3)
+        with TraceReader(self.file_path) as reader:
+            self.assertEqual(reader.get_frame_count(), len(direct.frames))
+            viz_tracing = self.create_tracing(reader)
+            reader.replay(viz_tracing)
+        self.assertEqual(viz_tracing.frames, direct.frames)
+
+    def test_replay_range(self):
+        direct = self.trace(record=False)
+        write_trace(self.trace(record=True), self.file_path,
+                    keyframe_interval=3)
+        with TraceReader(self.file_path) as reader:
+            frame_count = reader.get_frame_count()
+            self.assertGreater(frame_count, 8)
+            for first, last in [(1, 2), (4, 8), (7, 7), (5, frame_count)]:
+                viz_tracing = self.create_tracing(reader)
+                reader.replay(viz_tracing, first, last)
+                self.assertEqual(viz_tracing.frames,
+                                 direct.frames[first - 1:last])
+            with self.assertRaises(Exception):
+                reader.read_events(reader.create_directed_graph(), 1,
+                                   frame_count + 1)
+
+    def test_state_from_keyframe(self):
+        write_trace(self.trace(record=True), self.file_path,
+                    keyframe_interval=2)
+        with TraceReader(self.file_path) as reader:
+            self.assertTrue(reader.keyframe_nos)
+            state, activated = reader.get_state(5)
+            reader.keyframe_nos = []
+            self.assertEqual(reader.get_state(5), (state, activated))
+            self.assertEqual(reader.get_state(0), ({}, None))
+            with self.assertRaises(Exception):
+                reader.get_state(reader.get_frame_count() + 1)
+
+    def test_not_a_trace_file(self):
+        with open(self.file_path, "wb") as trace_file:
+            trace_file.write(b"VIZ_TRACING_0001.png")
+        with self.assertRaises(Exception):
+            TraceReader(self.file_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,10 +2,14 @@ import unittest
 from pythonalgos.graph.directed_graph import DirectedGraph, Vertex
 from pythonalgos.graph.algorithm_ordering import AlgorithmOrdering
 from pythonvizalgos.graph.viz_scc_kosaraju_tracing\
-    import VizSccsKosarajuTracing
+    import VizSccsKosarajuTracing, VizSccsKosarajuTracingAdvisor
 from pythonvizalgos.graph.viz_tracing import VizTracing
 import pythonalgos.util.path_tools as pt
 import inspect
+import os
+import shutil
+import tempfile
+from unittest import mock
 
 
 class TestVizSccsKosarajuTracing(unittest.TestCase):
@@ -49,6 +53,140 @@ class TestVizSccsKosarajuTracing(unittest.TestCase):
                                           nontrivial=True)
         self.assertTrue(True)
 
+    def test_VizSccTracing_condensed(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        viz_sccs_kosaraju_tracing: VizSccsKosarajuTracing =\
+            VizSccsKosarajuTracing(
+                path=path, directed_graph=self.directed_graph,
+                vertex_states={
+                    VizTracing.ACTIVATED: {"fillcolor": "red"},
+                    VizTracing.VISITED: {"fillcolor": "gray"},
+                    VizTracing.DEFAULT: {"fillcolor": "white"}},
+                edge_states={}, condense_sccs=True)
+        advisor = VizSccsKosarajuTracingAdvisor(viz_sccs_kosaraju_tracing)
+        viz_sccs_kosaraju_tracing.snapshot(self.directed_graph)
+        self.assertEqual(len(viz_sccs_kosaraju_tracing.positions),
+                         len(self.vertices))
+
+        advisor.scc_completed(
+            self.directed_graph,
+            {self.directed_graph.get_vertex(label)
+             for label in [1, 2, 3, 4, 5]}, 0)
+        advisor.scc_completed(
+            self.directed_graph,
+            {self.directed_graph.get_vertex(label)
+             for label in [6, 7, 8, 9]}, 1)
+        supernodes = [(VizSccsKosarajuTracing.SCC_IDX, 0),
+                      (VizSccsKosarajuTracing.SCC_IDX, 1)]
+        self.assertEqual(set(viz_sccs_kosaraju_tracing.positions),
+                         set(supernodes + [10, 11, 12, 13]))
+        self.assertEqual(
+            set(viz_sccs_kosaraju_tracing.label_texts), {10, 11, 12, 13})
+        self.assertEqual(
+            viz_sccs_kosaraju_tracing.get_supernode_label(supernodes[0], 5),
+            "C0 (5)")
+        self.assertEqual(len(os.listdir(path)), 3)
+
+    def test_VizSccTracing_condensed_result(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        viz_sccs_kosaraju_tracing: VizSccsKosarajuTracing =\
+            VizSccsKosarajuTracing(
+                path=path, directed_graph=self.directed_graph,
+                vertex_states={
+                    VizTracing.ACTIVATED: {"fillcolor": "red"},
+                    VizTracing.VISITED: {"fillcolor": "gray"},
+                    VizTracing.DEFAULT: {"fillcolor": "white"}},
+                edge_states={}, condense_sccs=True)
+        sccs = VizSccsKosarajuTracingAdvisor(
+            viz_sccs_kosaraju_tracing).create_sccs(self.directed_graph, True)
+        self.assertEqual(
+            set(viz_sccs_kosaraju_tracing.positions),
+            {(VizSccsKosarajuTracing.SCC_IDX, idx)
+             for idx in range(len(sccs))} | {10, 12, 13})
+
+    def create_revealing_tracing(self, path, vertex_detail=True):
+        return VizSccsKosarajuTracing(
+            path=path, directed_graph=self.directed_graph,
+            vertex_states={
+                VizTracing.ACTIVATED: {"fillcolor": "red"},
+                VizTracing.VISITED: {"fillcolor": "gray"},
+                VizTracing.DEFAULT: {"fillcolor": "white"}},
+            edge_states={}, reveal_sccs=True, vertex_detail=vertex_detail)
+
+    def test_VizSccTracing_reveal_sccs(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        viz_sccs_kosaraju_tracing = self.create_revealing_tracing(path)
+        advisor = VizSccsKosarajuTracingAdvisor(viz_sccs_kosaraju_tracing)
+        vertex_1 = self.directed_graph.get_vertex(1)
+        advisor.visit_vertex(self.directed_graph, vertex_1)
+        advisor.add_vertex_to_stack(self.directed_graph, vertex_1, 0)
+        self.assertEqual(len(os.listdir(path)), 2)
+
+        advisor.reverse_directed_graph(self.directed_graph)
+        for label in [1, 2, 3]:
+            advisor.visit_vertex(self.directed_graph,
+                                 self.directed_graph.get_vertex(label))
+        self.assertEqual(len(os.listdir(path)), 4)
+        scc = [self.directed_graph.get_vertex(label)
+               for label in [1, 2, 3, 4, 5]]
+        advisor.scc_completed(self.directed_graph, set(scc), 0)
+        advisor.scc_completed(
+            self.directed_graph, {self.directed_graph.get_vertex(11)}, 1)
+        self.assertEqual(len(os.listdir(path)), 6)
+
+        node_idx = viz_sccs_kosaraju_tracing.node_idx
+        codes = viz_sccs_kosaraju_tracing.node_codes
+        offset = viz_sccs_kosaraju_tracing.scc_code_offset
+        self.assertEqual({codes[node_idx[vertex]] for vertex in scc},
+                         {offset})
+        self.assertEqual(
+            codes[node_idx[self.directed_graph.get_vertex(11)]], offset + 1)
+        self.assertEqual(
+            codes[node_idx[self.directed_graph.get_vertex(6)]],
+            len(viz_sccs_kosaraju_tracing.vertex_state_names))
+        self.assertEqual(
+            viz_sccs_kosaraju_tracing.label_texts[1].get_text(), "1 C0")
+
+    def test_VizSccTracing_without_join_points(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        viz_sccs_kosaraju_tracing = self.create_revealing_tracing(path)
+        advisor = VizSccsKosarajuTracingAdvisor(viz_sccs_kosaraju_tracing)
+        with mock.patch.object(
+                DirectedGraph, "create_sccs_kosaraju_dfs",
+                lambda directed_graph, nontrivial: [
+                    {directed_graph.get_vertex(label)
+                     for label in [1, 2, 3, 4, 5]},
+                    {directed_graph.get_vertex(11)}]):
+            sccs = advisor.create_sccs(self.directed_graph, True)
+        self.assertEqual(len(sccs), 2)
+        self.assertEqual(
+            {vertex.get_label(): viz_sccs_kosaraju_tracing.get_status(
+                vertex, VizSccsKosarajuTracing.SCC_IDX)
+             for vertex in viz_sccs_kosaraju_tracing.get_status_members(
+                 VizSccsKosarajuTracing.SCC_IDX)},
+            {1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 11: 1})
+        # The graph, its reversal with and without activation, two SCCs
+        self.assertEqual(len(os.listdir(path)), 5)
+
+    def test_VizSccTracing_without_vertex_detail(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        viz_sccs_kosaraju_tracing = self.create_revealing_tracing(
+            path, vertex_detail=False)
+        advisor = VizSccsKosarajuTracingAdvisor(viz_sccs_kosaraju_tracing)
+        vertex_1 = self.directed_graph.get_vertex(1)
+        advisor.visit_vertex(self.directed_graph, vertex_1)
+        advisor.add_vertex_to_stack(self.directed_graph, vertex_1, 0)
+        advisor.vertex_already_visited(
+            self.directed_graph, next(iter(vertex_1.get_edges())))
+        self.assertEqual(os.listdir(path), [])
+        advisor.scc_completed(self.directed_graph, {vertex_1}, 0)
+        self.assertEqual(len(os.listdir(path)), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
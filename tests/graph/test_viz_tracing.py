@@ -1,9 +1,17 @@
 import unittest
 from pythonalgos.graph.directed_graph import DirectedGraph
 from pythonalgos.graph.directed_graph import DirectedGraph
-from pythonvizalgos.graph.viz_cyclic_tracing import VizCyclicTracing
-from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonalgos.graph.algorithm_ordering import AlgorithmOrdering
+from pythonvizalgos.graph.viz_cyclic_tracing import VizCyclicTracing, \
+    VizCyclicTracingAdvisor
+from pythonvizalgos.graph.snapshot_policy import EveryNthSnapshotPolicy, \
+    MaxFramesSnapshotPolicy, MilestoneSnapshotPolicy
+from pythonvizalgos.graph.viz_tracing import VizTracing, VizTracingAdvisor
+from pythonvizalgos.util.frame_cache import FrameCache
 import os
+import shutil
+import tempfile
+from unittest import mock
 import pythonalgos.util.path_tools as pt
 from os import path
 import inspect
@@ -31,9 +39,7 @@ class TestVizTracingGraphviz(unittest.TestCase):
                          3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
         self.directed_graph = DirectedGraph(self.vertices)
         vertex_1 = self.directed_graph.get_vertex(1)
-        vertex_1.set_attr("activated", True)
         vertex_2 = self.directed_graph.get_vertex(2)
-        vertex_2.set_attr("in_cycle", True)
         dir = TestVizTracingGraphviz.RESOURCES_PATH_RECYCLE + "/" + \
             inspect.currentframe().f_code.co_name
         pt.create_dir_in_user_home(dir)
@@ -45,6 +51,8 @@ class TestVizTracingGraphviz(unittest.TestCase):
                         {"fillcolor": "red", "style": "filled"}},
                     {VizCyclicTracing.IN_CYCLE:
                         {"fillcolor": "blue", "style": "filled"}}])
+        viz_cyclic_tracing.set_status(vertex_1, VizTracing.ACTIVATED)
+        viz_cyclic_tracing.set_status(vertex_2, VizCyclicTracing.IN_CYCLE)
         viz_cyclic_tracing.snapshot(self.directed_graph)
         self.assertTrue(True)
 
@@ -68,9 +76,11 @@ class TestVizTracingGraphviz(unittest.TestCase):
                                                    vertex_1)
         for vertex in self.directed_graph.get_vertices():
             if str(vertex_1.get_label()) == str(vertex.get_label()):
-                self.assertTrue(vertex.get_attr(VizTracing.ACTIVATED))
+                self.assertTrue(viz_cyclic_tracing.get_status(
+                    vertex, VizTracing.ACTIVATED))
             else:
-                self.assertFalse(vertex.get_attr(VizTracing.ACTIVATED))
+                self.assertFalse(viz_cyclic_tracing.get_status(
+                    vertex, VizTracing.ACTIVATED))
 
     @unittest.skip
     def test_VizTracingGraphviz_set_status(self):
@@ -94,9 +104,11 @@ class TestVizTracingGraphviz(unittest.TestCase):
         for vertex in self.directed_graph.get_vertices():
             if str(vertex_5.get_label()) == str(vertex.get_label()) or \
                     str(vertex_6.get_label()) == str(vertex.get_label()):
-                self.assertTrue(vertex.get_attr(VizCyclicTracing.IN_CYCLE))
+                self.assertTrue(viz_cyclic_tracing.get_status(
+                    vertex, VizCyclicTracing.IN_CYCLE))
             else:
-                self.assertFalse(vertex.get_attr(VizCyclicTracing.IN_CYCLE))
+                self.assertFalse(viz_cyclic_tracing.get_status(
+                    vertex, VizCyclicTracing.IN_CYCLE))
 
     @unittest.skip
     def test_VizTracingGraphviz_snapshot(self):
@@ -124,5 +136,459 @@ class TestVizTracingGraphviz(unittest.TestCase):
         self.assertFalse(os.path.exists(pt.get_dir_in_user_home(dir)))
 
 
+class TestVizTracingGraphvizSource(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2, 3], 2: [3],
+                         3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
+        self.directed_graph = DirectedGraph(self.vertices)
+        self.viz_cyclic_tracing: VizCyclicTracing = VizCyclicTracing(
+            path=None, directed_graph=self.directed_graph,
+            vertex_states=[
+                    {VizTracing.ACTIVATED:
+                        {"fillcolor": "red", "style": "filled"}},
+                    {VizCyclicTracing.IN_CYCLE:
+                        {"fillcolor": "blue", "style": "filled"}},
+                    {VizTracing.DEFAULT:
+                        {"fillcolor": "white", "style": "filled"}}],
+            edge_states=[
+                    {VizTracing.DISABLED: {"style": "dashed"}}])
+
+    def test_incremental_source_matches_full_source(self):
+        self.viz_cyclic_tracing.create_digraph(self.directed_graph)
+        vertex_1 = self.directed_graph.get_vertex(1)
+        self.viz_cyclic_tracing.set_status(vertex_1, VizTracing.ACTIVATED)
+        self.viz_cyclic_tracing.set_status(vertex_1, VizCyclicTracing.IN_CYCLE)
+        edge = next(iter(vertex_1.get_edges()))
+        self.viz_cyclic_tracing.set_status(edge, VizTracing.DISABLED)
+        incremental = self.viz_cyclic_tracing.create_digraph(
+            self.directed_graph).source
+        self.viz_cyclic_tracing.reset_rendering()
+        full = self.viz_cyclic_tracing.create_digraph(
+            self.directed_graph).source
+        self.assertEqual(incremental, full)
+        self.assertEqual(incremental.count("fillcolor=red"), 1)
+        self.assertEqual(incremental.count("fillcolor=blue"), 0)
+        self.assertEqual(incremental.count("style=dashed"), 1)
+        self.assertEqual(incremental.count("fillcolor=white"),
+                         len(self.vertices) - 1)
+
+    def test_pinned_positions_in_source(self):
+        self.viz_cyclic_tracing.node_positions = {"1": "10,20!"}
+        self.viz_cyclic_tracing.reset_rendering()
+        source = self.viz_cyclic_tracing.create_digraph(
+            self.directed_graph).source
+        self.assertEqual(source.count('pos="10,20!"'), 1)
+        self.assertEqual(
+            self.viz_cyclic_tracing.get_render_options()["engine"],
+            VizCyclicTracing.PINNED_LAYOUT_ENGINE)
+        self.viz_cyclic_tracing.reset_rendering(topology=True)
+        self.assertEqual(
+            self.viz_cyclic_tracing.get_render_options()["engine"],
+            VizCyclicTracing.LAYOUT_ENGINE)
+
+
+class TestVizTracingFocus(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {v: [v + 1] if v + 1 < 10 else [] for v in range(10)}
+        self.directed_graph = DirectedGraph(self.vertices)
+        self.viz_cyclic_tracing: VizCyclicTracing = VizCyclicTracing(
+            path=None, directed_graph=self.directed_graph,
+            vertex_states=[
+                    {VizTracing.ACTIVATED:
+                        {"fillcolor": "red", "style": "filled"}}],
+            edge_states=[], focus_hops=2)
+
+    def test_focus(self):
+        vertex_5 = self.directed_graph.get_vertex(5)
+        self.viz_cyclic_tracing.change_activated_vertex(
+            self.directed_graph, vertex_5)
+        focus = self.viz_cyclic_tracing.get_focus(self.directed_graph)
+        self.assertEqual(
+            {vertex.get_label(): hops for vertex, hops in focus.items()},
+            {5: 0, 6: 1, 4: 1, 7: 2, 3: 2})
+
+        self.viz_cyclic_tracing.deactivate_graph(self.directed_graph)
+        self.assertEqual(
+            self.viz_cyclic_tracing.get_focus(self.directed_graph), focus)
+
+    def test_focus_source(self):
+        self.viz_cyclic_tracing.change_activated_vertex(
+            self.directed_graph, self.directed_graph.get_vertex(0))
+        source = self.viz_cyclic_tracing.create_digraph(
+            self.directed_graph).source
+        self.assertEqual(source.count("->"), 3)
+        self.assertIn('label="+7"', source)
+        self.assertIn("2 -> " + VizTracing.FOCUS_SUMMARY, source)
+
+        self.viz_cyclic_tracing.change_activated_vertex(
+            self.directed_graph, self.directed_graph.get_vertex(8))
+        source = self.viz_cyclic_tracing.create_digraph(
+            self.directed_graph).source
+        self.assertIn('label="+6"', source)
+        self.assertIn(VizTracing.FOCUS_SUMMARY + " -> 6", source)
+        self.assertEqual(source.count("fillcolor=red"), 1)
+
+    def test_focus_without_pinned_layout(self):
+        with self.assertRaises(Exception):
+            VizCyclicTracing(path=None, directed_graph=self.directed_graph,
+                             focus_hops=2, pinned_layout=True)
+
+
+class TestVizTracingGraphvizFrameCache(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2, 3], 2: [3],
+                         3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.frame_cache = FrameCache(os.path.join(self.dir, "cache"))
+
+    def trace(self, run):
+        path = os.path.join(self.dir, "run" + str(run))
+        os.makedirs(path)
+        directed_graph = DirectedGraph(
+            self.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+        viz_cyclic_tracing = VizCyclicTracing(
+            path=path, directed_graph=directed_graph,
+            vertex_states=[
+                    {VizTracing.ACTIVATED:
+                        {"fillcolor": "red", "style": "filled"}}],
+            edge_states=[], frame_cache=self.frame_cache)
+        with mock.patch(
+                "pythonvizalgos.graph.viz_tracing_graphviz.Digraph.pipe",
+                side_effect=lambda **options: b"image") as pipe:
+            directed_graph.is_cyclic(
+                VizCyclicTracingAdvisor(viz_cyclic_tracing))
+            viz_cyclic_tracing.flush()
+        return viz_cyclic_tracing, pipe
+
+    def test_rerun_takes_frames_from_cache(self):
+        first, pipe = self.trace(0)
+        frames = first.snapshot_no - 1
+        self.assertEqual(
+            pipe.call_count,
+            first.get_metrics()["counters"][
+                VizTracing.METRIC_FRAME_CACHE_MISS])
+        self.assertEqual(self.frame_cache.get_stats()["frames"],
+                         pipe.call_count)
+        second, pipe = self.trace(1)
+        self.assertEqual(pipe.call_count, 0)
+        self.assertEqual(
+            second.get_metrics()["counters"][
+                VizTracing.METRIC_FRAME_CACHE_HIT], frames)
+        self.assertEqual(
+            sorted(os.listdir(second.path)), sorted(os.listdir(first.path)))
+
+
+class FrameCollectingVizTracing(VizTracing):
+    """ Tracing class that keeps the state of every frame in memory """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frames = []
+
+    def get_render_fields(self):
+        return super().get_render_fields() + ["frames"]
+
+    def render_snapshot(self, directed_graph):
+        self.frames.append(
+            {vertex.get_label():
+                (self.get_status(vertex, VizTracing.ACTIVATED),
+                 self.get_status(vertex, VizTracing.VISITED))
+             for vertex in directed_graph.get_vertices()})
+
+
+class TestVizTracingRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2, 3], 2: [3],
+                         3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
+
+    def trace(self, record, **kwargs):
+        directed_graph = DirectedGraph(
+            self.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+        viz_tracing = FrameCollectingVizTracing(
+            path=None, directed_graph=directed_graph, vertex_states=[],
+            edge_states=[], record=record, **kwargs)
+        directed_graph.is_cyclic(VizTracingAdvisor(viz_tracing))
+        return viz_tracing
+
+    def test_record_does_not_render(self):
+        viz_tracing = self.trace(record=True)
+        self.assertEqual(viz_tracing.frames, [])
+        self.assertTrue(any(event.kind == VizTracing.EVENT_SNAPSHOT
+                            for event in viz_tracing.events))
+        self.assertFalse(viz_tracing.pop_changed_elements())
+        # The statuses are kept, so that the algorithm can read them
+        self.assertTrue(viz_tracing.get_status_members(VizTracing.VISITED))
+
+    def test_replay_matches_direct_rendering(self):
+        direct = self.trace(record=False)
+        recorded = self.trace(record=True)
+        recorded.replay()
+        self.assertTrue(direct.frames)
+        self.assertEqual(recorded.frames, direct.frames)
+        self.assertTrue(recorded.recording)
+
+    def test_deduplicate(self):
+        direct = self.trace(record=False)
+        directed_graph = DirectedGraph(
+            self.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+        deduplicated = FrameCollectingVizTracing(
+            path=None, directed_graph=directed_graph, vertex_states=[],
+            edge_states=[], deduplicate=True)
+        for _ in range(3):
+            deduplicated.snapshot(directed_graph)
+        directed_graph.is_cyclic(VizTracingAdvisor(deduplicated))
+        durations = deduplicated.get_frame_durations()
+        self.assertEqual(len(durations), len(deduplicated.frames))
+        self.assertEqual(durations[0], 3)
+        self.assertEqual(sum(durations), len(direct.frames) + 3)
+        self.assertEqual(
+            [frame for frame in deduplicated.frames[1:]],
+            [frame for idx, frame in enumerate(direct.frames)
+             if idx == 0 or frame != direct.frames[idx - 1]])
+
+    def test_render_async_matches_direct_rendering(self):
+        direct = self.trace(record=False)
+        rendered_async = self.trace(record=False, render_async=True,
+                                    render_queue_size=1)
+        rendered_async.flush()
+        self.assertEqual(rendered_async.frames, direct.frames)
+        self.assertEqual(rendered_async.get_frame_durations(),
+                         direct.get_frame_durations())
+        self.assertEqual(
+            [(vertex.get_label(),
+              rendered_async.get_status(vertex, VizTracing.VISITED))
+             for vertex in
+             rendered_async.get_directed_graph().get_vertices()],
+            [(vertex.get_label(),
+              direct.get_status(vertex, VizTracing.VISITED))
+             for vertex in direct.get_directed_graph().get_vertices()])
+        self.assertIsNone(rendered_async.renderer)
+        self.assertEqual(
+            rendered_async.get_metrics()["counters"][
+                VizTracing.METRIC_SNAPSHOT_QUEUED], len(direct.frames))
+
+    def test_render_async_restart(self):
+        direct = self.trace(record=False)
+        direct.snapshot(direct.get_directed_graph())
+        rendered_async = self.trace(record=False, render_async=True)
+        rendered_async.flush()
+        self.assertIsNone(rendered_async.renderer)
+        rendered_async.snapshot(rendered_async.get_directed_graph())
+        self.assertIsNone(rendered_async.frames)
+        rendered_async.flush()
+        self.assertEqual(rendered_async.frames, direct.frames)
+        self.assertEqual(rendered_async.get_frame_durations(),
+                         direct.get_frame_durations())
+        self.assertEqual(rendered_async.snapshot_no, direct.snapshot_no)
+
+    def test_render_async_failure(self):
+        directed_graph = DirectedGraph(self.vertices)
+        viz_tracing = FrameCollectingVizTracing(
+            path=None, directed_graph=directed_graph, vertex_states=[],
+            edge_states=[], render_async=True, render_queue_size=1)
+        with mock.patch.object(FrameCollectingVizTracing, "render_snapshot",
+                               side_effect=ValueError("failed")):
+            for _ in range(3):
+                viz_tracing.snapshot(directed_graph)
+            with self.assertRaises(ValueError):
+                viz_tracing.flush()
+        self.assertEqual(viz_tracing.frames, [])
+
+    def test_render_async_not_recorded(self):
+        with self.assertRaises(Exception):
+            self.trace(record=True, render_async=True)
+
+    def test_replay_twice(self):
+        recorded = self.trace(record=True)
+        recorded.replay()
+        frames = list(recorded.frames)
+        recorded.frames = []
+        recorded.replay()
+        self.assertEqual(recorded.frames, frames)
+
+    def test_metrics(self):
+        recorded = self.trace(record=True)
+        recorded.replay()
+        metrics = recorded.get_metrics()
+        snapshots = sum(1 for event in recorded.events
+                        if event.kind == VizTracing.EVENT_SNAPSHOT)
+        self.assertEqual(
+            metrics["counters"][VizTracing.METRIC_SNAPSHOT_RECORDED],
+            snapshots)
+        self.assertEqual(
+            metrics["counters"][VizTracing.METRIC_SNAPSHOT_RENDER],
+            len(recorded.frames))
+        self.assertEqual(
+            metrics["counters"][VizTracing.METRIC_ADVICE_PREFIX +
+                                "visit_vertex"],
+            sum(1 for event in recorded.events
+                if event.kind == VizTracing.EVENT_SET_STATUS and
+                event.status == VizTracing.VISITED))
+        self.assertIn(VizTracing.METRIC_ADVICE_PREFIX + "visit_vertex",
+                      metrics["timers"])
+
+
+class TestVizTracingSnapshotPolicies(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2, 3], 2: [3],
+                         3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
+
+    def trace(self, snapshot_policies=None, record=False,
+              advisor=VizTracingAdvisor):
+        directed_graph = DirectedGraph(
+            self.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+        viz_tracing = FrameCollectingVizTracing(
+            path=None, directed_graph=directed_graph, vertex_states=[],
+            edge_states=[], record=record,
+            snapshot_policies=snapshot_policies)
+        directed_graph.is_cyclic(advisor(viz_tracing))
+        return viz_tracing
+
+    def test_every_nth(self):
+        direct = self.trace()
+        sampled = self.trace([EveryNthSnapshotPolicy(3)])
+        self.assertEqual(sampled.frames, direct.frames[::3])
+
+    def test_max_frames(self):
+        direct = self.trace()
+        limited = self.trace([MaxFramesSnapshotPolicy(2)])
+        self.assertEqual(limited.frames, direct.frames[:2])
+        self.assertEqual(
+            limited.get_metrics()["counters"][
+                VizTracing.METRIC_SNAPSHOT_SKIPPED],
+            len(direct.frames) - 2)
+
+    def test_milestones(self):
+        direct = self.trace(advisor=VizCyclicTracingAdvisor)
+        milestones = self.trace([MilestoneSnapshotPolicy()],
+                                advisor=VizCyclicTracingAdvisor)
+        self.assertEqual(len(milestones.frames), 1)
+        self.assertIn(milestones.frames[0], direct.frames)
+        self.assertTrue(milestones.frames[0][5][0])
+
+    def test_replay_applies_recorded_policy(self):
+        direct = self.trace([EveryNthSnapshotPolicy(2)])
+        recorded = self.trace([EveryNthSnapshotPolicy(2)], record=True)
+        recorded.replay()
+        self.assertEqual(recorded.frames, direct.frames)
+
+
+class TestVizTracingStatusIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2, 3], 2: [3],
+                         3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
+        self.directed_graph = DirectedGraph(self.vertices)
+        self.viz_tracing = VizTracing(
+            path=None, directed_graph=self.directed_graph, vertex_states=[],
+            edge_states=[])
+
+    def test_change_activated_vertex_touches_changed_vertices_only(self):
+        vertex_1 = self.directed_graph.get_vertex(1)
+        vertex_2 = self.directed_graph.get_vertex(2)
+        self.viz_tracing.change_activated_vertex(self.directed_graph,
+                                                 vertex_1)
+        self.viz_tracing.pop_changed_elements()
+        self.viz_tracing.change_activated_vertex(self.directed_graph,
+                                                 vertex_2)
+        self.assertEqual(self.viz_tracing.pop_changed_elements(),
+                         {vertex_1, vertex_2})
+        self.assertEqual(
+            self.viz_tracing.get_status_members(VizTracing.ACTIVATED),
+            {vertex_2})
+        self.assertIs(self.viz_tracing.get_activated_vertex(), vertex_2)
+        self.assertFalse(
+            self.viz_tracing.get_status(vertex_1, VizTracing.ACTIVATED))
+        self.assertTrue(
+            self.viz_tracing.get_status(vertex_2, VizTracing.ACTIVATED))
+
+    def test_deactivate_and_reset(self):
+        self.viz_tracing.activate_graph(self.directed_graph)
+        vertex_5 = self.directed_graph.get_vertex(5)
+        self.viz_tracing.set_status(vertex_5, VizTracing.VISITED)
+        self.viz_tracing.deactivate_graph(self.directed_graph)
+        self.assertFalse(
+            self.viz_tracing.get_status_members(VizTracing.ACTIVATED))
+        self.viz_tracing.pop_changed_elements()
+        self.viz_tracing.reset_attrs(self.directed_graph)
+        self.assertEqual(self.viz_tracing.pop_changed_elements(), {vertex_5})
+        self.assertFalse(
+            self.viz_tracing.get_status(vertex_5, VizTracing.VISITED))
+
+    def test_extended_label_cache(self):
+        self.viz_tracing.get_vertex_label_attributes = lambda: ["S"]
+        vertex_1 = self.directed_graph.get_vertex(1)
+        vertex_2 = self.directed_graph.get_vertex(2)
+        self.assertEqual(self.viz_tracing.get_extended_label(vertex_1), "1")
+        with mock.patch.object(self.viz_tracing, "create_extended_label",
+                               wraps=self.viz_tracing.create_extended_label
+                               ) as create_extended_label:
+            self.viz_tracing.set_status(vertex_1, VizTracing.VISITED)
+            self.viz_tracing.set_status(vertex_2, "S", 0)
+            self.assertEqual(self.viz_tracing.pop_changed_labels(),
+                             {vertex_2})
+            for _ in range(2):
+                self.assertEqual(
+                    self.viz_tracing.get_extended_label(vertex_1), "1")
+                self.assertEqual(
+                    self.viz_tracing.get_extended_label(vertex_2), "2 S0")
+            self.assertEqual(create_extended_label.call_count, 1)
+        self.viz_tracing.reset_status(vertex_2, "S")
+        self.assertEqual(self.viz_tracing.pop_changed_labels(), {vertex_2})
+        self.assertEqual(self.viz_tracing.get_extended_label(vertex_2), "2")
+
+
+class TestVizTracingGraphvizParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2, 3], 2: [3],
+                         3: [4, 6], 4: [5, 6], 5: [5], 6: [6]}
+        self.directed_graph = DirectedGraph(self.vertices)
+        self.dir = tempfile.mkdtemp()
+        self.viz_cyclic_tracing: VizCyclicTracing = VizCyclicTracing(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=[
+                    {VizTracing.ACTIVATED:
+                        {"fillcolor": "red", "style": "filled"}}],
+            edge_states=[], parallel=True, max_workers=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    @unittest.skipUnless(shutil.which("dot"), "dot is not installed")
+    def test_parallel_frames_are_ordered(self):
+        for _ in range(5):
+            self.viz_cyclic_tracing.snapshot(self.directed_graph)
+        self.viz_cyclic_tracing.flush()
+        self.assertEqual(
+            sorted(f for f in os.listdir(self.dir)
+                   if f.endswith(VizCyclicTracing.IMAGE_TYPE)),
+            [VizCyclicTracing.IMAGE_NAME_PREFIX + "{:04d}.".format(no) +
+             VizCyclicTracing.IMAGE_TYPE for no in range(1, 6)])
+
+    def test_parallel_failures_are_reported_per_frame(self):
+
+        def render_source(source, filename, image_type, **options):
+            if filename.endswith("0002"):
+                raise RuntimeError("dot failed")
+            return filename + "." + image_type
+
+        with mock.patch(
+                "pythonvizalgos.graph.viz_tracing_graphviz.render_source",
+                render_source):
+            for _ in range(3):
+                self.viz_cyclic_tracing.snapshot(self.directed_graph)
+            with self.assertRaises(Exception) as context:
+                self.viz_cyclic_tracing.flush()
+        self.assertEqual(list(self.viz_cyclic_tracing.render_failures), [2])
+        self.assertIn("0002", str(context.exception))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from pythonalgos.graph.directed_graph import DirectedGraph
+from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonvizalgos.graph.viz_tracing_html import VizTracingHtml, \
+    create_css_rules, dump_script_json
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+
+SVG = b'<?xml version="1.0"?>\n<svg width="62pt" height="116pt" ' \
+    b'viewBox="0 0 62 116"><g id="v0" class="node"></g></svg>'
+
+
+class TestVizTracingHtml(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {0: [1], 1: [2], 2: []}
+        self.directed_graph = DirectedGraph(self.vertices)
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.viz_tracing = VizTracingHtml(
+            path=self.path, directed_graph=self.directed_graph,
+            vertex_states=[
+                {VizTracing.ACTIVATED:
+                    {"fillcolor": "red", "style": "filled"}},
+                {VizTracing.VISITED: {"fillcolor": "gray"}},
+                {VizTracing.DEFAULT: {"fillcolor": "white"}}],
+            edge_states=[{VizTracing.DISABLED: {"style": "dashed"}}])
+        self.viz_tracing.get_vertex_label_attributes = \
+            lambda: [VizTracing.VISITED]
+        patcher = mock.patch(
+            "pythonvizalgos.graph.viz_tracing_html.Digraph.pipe",
+            return_value=SVG)
+        self.pipe = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_frames(self):
+        vertex_0 = self.directed_graph.get_vertex(0)
+        vertex_1 = self.directed_graph.get_vertex(1)
+        self.viz_tracing.snapshot(self.directed_graph)
+        self.viz_tracing.change_activated_vertex(self.directed_graph,
+                                                 vertex_0)
+        self.viz_tracing.snapshot(self.directed_graph)
+        self.viz_tracing.set_status(vertex_0, VizTracing.VISITED)
+        self.viz_tracing.change_activated_vertex(self.directed_graph,
+                                                 vertex_1)
+        self.viz_tracing.set_status(next(iter(vertex_0.get_edges())),
+                                    VizTracing.DISABLED)
+        self.viz_tracing.snapshot(self.directed_graph)
+
+        self.assertEqual(self.pipe.call_count, 1)
+        self.assertTrue(self.viz_tracing.svg.startswith("<svg viewBox="))
+        ids = self.viz_tracing.element_ids
+        self.assertEqual(len(ids), 5)
+        frames = self.viz_tracing.frames
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[0], sorted([[id, ""] for id in ids.values()]))
+        self.assertEqual(frames[1], [[ids[vertex_0], "vertex-activated"]])
+        self.assertEqual(frames[2], sorted([
+            [ids[vertex_0], "vertex-visited", "0 visitedTrue"],
+            [ids[vertex_1], "vertex-activated"],
+            [ids[next(iter(vertex_0.get_edges()))], "edge-disabled"]]))
+
+    def test_write_html(self):
+        with self.assertRaises(Exception):
+            self.viz_tracing.create_video(self.path)
+        self.viz_tracing.snapshot(self.directed_graph)
+        self.viz_tracing.change_activated_vertex(
+            self.directed_graph, self.directed_graph.get_vertex(2))
+        self.viz_tracing.snapshot(self.directed_graph)
+        self.viz_tracing.create_video(self.path)
+
+        with open(os.path.join(self.path, VizTracingHtml.HTML_NAME),
+                  encoding="utf-8") as html_file:
+            html = html_file.read()
+        self.assertIn(self.viz_tracing.svg, html)
+        self.assertIn("var frames = " + json.dumps(
+            self.viz_tracing.frames, separators=(",", ":")) + ";", html)
+        self.assertIn("var durations = [1,1];", html)
+        self.assertIn(".vertex-activated ellipse", html)
+        self.assertIn(".edge-disabled path", html)
+        self.assertNotIn("<?xml", html)
+
+    def test_dump_script_json(self):
+        frames = [["v0", "vertex-a", "</script><b>&amp;"]]
+        dumped = dump_script_json(frames)
+        self.assertFalse(set("<>&") & set(dumped))
+        self.assertEqual(json.loads(dumped), frames)
+
+    def test_fixed_topology(self):
+        self.viz_tracing.snapshot(self.directed_graph)
+        with self.assertRaises(Exception):
+            self.viz_tracing.reset_rendering(topology=True)
+
+    def test_css_rules(self):
+        rules = create_css_rules(
+            ".vertex-a", {"fillcolor": "red", "color": "blue",
+                          "fontcolor": "white", "style": "filled,dashed"})
+        self.assertEqual(rules, [
+            ".vertex-a ellipse, .vertex-a polygon, .vertex-a path { "
+            "fill: red; stroke: blue; stroke-dasharray: 5,2 }",
+            ".vertex-a text { fill: white }"])
+        self.assertEqual(create_css_rules(".edge-a", {}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
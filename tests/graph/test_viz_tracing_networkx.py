@@ -0,0 +1,169 @@
+import unittest
+from pythonalgos.graph.directed_graph import DirectedGraph
+from pythonalgos.graph.algorithm_ordering import AlgorithmOrdering
+from pythonvizalgos.graph.viz_tracing_networkx import VizTracingNetworkx
+from pythonvizalgos.graph.viz_tracing import VizTracing
+from pythonvizalgos.util.frame_cache import FrameCache
+from matplotlib import image as mpimg
+import numpy as np
+import os
+import shutil
+import tempfile
+
+
+class TestVizTracingNetworkx(unittest.TestCase):
+
+    def setUp(self):
+        self.vertices = {1: [2], 2: [3], 3: [1], 4: []}
+        self.directed_graph = DirectedGraph(self.vertices)
+        self.dir = tempfile.mkdtemp()
+        self.vertex_states = {
+            VizTracing.ACTIVATED: {"fillcolor": "red"},
+            VizTracing.VISITED: {"fillcolor": "gray"},
+            VizTracing.DEFAULT: {"fillcolor": "white"}}
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def create_tracing(self) -> VizTracingNetworkx:
+        return VizTracingNetworkx(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=self.vertex_states, edge_states={})
+
+    def read_image(self, viz_tracing: VizTracingNetworkx, snapshot_no: int):
+        return mpimg.imread(viz_tracing.get_image_name(snapshot_no) + "." +
+                            VizTracingNetworkx.IMAGE_TYPE)
+
+    def test_updated_frame_matches_new_figure(self):
+        viz_tracing = self.create_tracing()
+        viz_tracing.snapshot(self.directed_graph)
+        viz_tracing.set_status(self.directed_graph.get_vertex(1),
+                               VizTracing.ACTIVATED)
+        viz_tracing.snapshot(self.directed_graph)
+        self.assertEqual(len(os.listdir(self.dir)), 2)
+
+        fresh_tracing = self.create_tracing()
+        fresh_tracing.positions = viz_tracing.positions
+        fresh_tracing.state_store = viz_tracing.state_store
+        fresh_tracing.snapshot_no = 3
+        fresh_tracing.snapshot(self.directed_graph)
+
+        first = self.read_image(viz_tracing, 1)
+        updated = self.read_image(viz_tracing, 2)
+        fresh = self.read_image(fresh_tracing, 3)
+        self.assertFalse(np.array_equal(first, updated))
+        self.assertTrue(np.array_equal(updated, fresh))
+
+    def test_edge_states(self):
+        edge_states = {VizTracing.DISABLED: {"color": "red",
+                                             "penwidth": "3"}}
+        viz_tracing = VizTracingNetworkx(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=self.vertex_states, edge_states=edge_states)
+        viz_tracing.snapshot(self.directed_graph)
+        self.assertEqual(viz_tracing.edge_codes.tolist(), [1, 1, 1])
+        edge = next(iter(self.directed_graph.get_vertex(1).get_edges()))
+        viz_tracing.set_status(edge, VizTracing.DISABLED)
+        viz_tracing.set_status(self.directed_graph.get_vertex(2),
+                               VizTracing.VISITED)
+        viz_tracing.snapshot(self.directed_graph)
+        idx = viz_tracing.edge_idx[edge]
+        self.assertEqual(viz_tracing.edge_codes[idx], 0)
+        self.assertEqual(
+            viz_tracing.edge_collection.get_linewidths()[idx], 3.0)
+        self.assertEqual(sorted(
+            colors[3] for colors in viz_tracing.edge_collection.get_colors()),
+            [0.0, 0.0, 1.0])
+
+        fresh_tracing = VizTracingNetworkx(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=self.vertex_states, edge_states=edge_states)
+        fresh_tracing.positions = viz_tracing.positions
+        fresh_tracing.state_store = viz_tracing.state_store
+        fresh_tracing.snapshot_no = 3
+        fresh_tracing.snapshot(self.directed_graph)
+        self.assertFalse(np.array_equal(self.read_image(viz_tracing, 1),
+                                        self.read_image(viz_tracing, 2)))
+        self.assertTrue(np.array_equal(self.read_image(viz_tracing, 2),
+                                       self.read_image(fresh_tracing, 3)))
+
+    def test_stream_video_without_images(self):
+        viz_tracing = VizTracingNetworkx(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=self.vertex_states, edge_states={},
+            deduplicate=True, stream_video=True, write_images=False)
+        viz_tracing.snapshot(self.directed_graph)
+        viz_tracing.snapshot(self.directed_graph)
+        viz_tracing.set_status(self.directed_graph.get_vertex(2),
+                               VizTracing.VISITED)
+        viz_tracing.snapshot(self.directed_graph)
+        viz_tracing.flush()
+        viz_tracing.create_video(self.dir)
+        self.assertEqual(os.listdir(self.dir), [VizTracing.VIDEO_NAME])
+        self.assertEqual(viz_tracing.get_frame_durations(), [2, 1])
+
+    def test_focus_with_overview(self):
+        viz_tracing = VizTracingNetworkx(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=self.vertex_states, edge_states={}, focus_hops=1,
+            focus_overview=True)
+        viz_tracing.change_activated_vertex(
+            self.directed_graph, self.directed_graph.get_vertex(4))
+        viz_tracing.snapshot(self.directed_graph)
+        self.assertEqual(list(viz_tracing.positions),
+                         [4, VizTracing.FOCUS_SUMMARY])
+        viz_tracing.change_activated_vertex(
+            self.directed_graph, self.directed_graph.get_vertex(1))
+        viz_tracing.snapshot(self.directed_graph)
+        self.assertEqual(set(viz_tracing.positions),
+                         {1, 2, 3, VizTracing.FOCUS_SUMMARY})
+        self.assertEqual(len(os.listdir(os.path.join(
+            self.dir, VizTracing.OVERVIEW_PATH))), 2)
+        self.assertEqual(
+            len([name for name in os.listdir(self.dir)
+                 if name.endswith(VizTracing.IMAGE_TYPE)]), 2)
+
+    def test_non_planar_graph(self):
+        self.directed_graph = DirectedGraph(
+            {v: [w for w in range(5) if w != v] for v in range(5)})
+        viz_tracing = VizTracingNetworkx(
+            path=self.dir, directed_graph=self.directed_graph,
+            vertex_states=self.vertex_states, edge_states={}, focus_hops=1,
+            focus_overview=True)
+        viz_tracing.change_activated_vertex(
+            self.directed_graph, self.directed_graph.get_vertex(0))
+        viz_tracing.snapshot(self.directed_graph)
+        self.assertEqual(set(viz_tracing.positions), set(range(5)))
+        self.assertEqual(len(os.listdir(os.path.join(
+            self.dir, VizTracing.OVERVIEW_PATH))), 1)
+
+    def test_frame_cache(self):
+        frame_cache = FrameCache(os.path.join(self.dir, "cache"))
+        runs = []
+        for run in range(2):
+            path = os.path.join(self.dir, "run" + str(run))
+            os.makedirs(path)
+            directed_graph = DirectedGraph(
+                self.vertices, algorithm_ordering=AlgorithmOrdering.ASC)
+            viz_tracing = VizTracingNetworkx(
+                path=path, directed_graph=directed_graph,
+                vertex_states=self.vertex_states, edge_states={},
+                frame_cache=frame_cache)
+            viz_tracing.snapshot(directed_graph)
+            viz_tracing.set_status(directed_graph.get_vertex(1),
+                                   VizTracing.ACTIVATED)
+            viz_tracing.snapshot(directed_graph)
+            runs.append(viz_tracing)
+
+        counters = runs[1].get_metrics()["counters"]
+        self.assertEqual(counters[VizTracing.METRIC_FRAME_CACHE_HIT], 2)
+        self.assertNotIn(VizTracing.METRIC_SNAPSHOT_RASTERIZE, counters)
+        self.assertEqual(frame_cache.get_stats()["frames"], 2)
+        for snapshot_no in [1, 2]:
+            self.assertTrue(np.array_equal(
+                self.read_image(runs[0], snapshot_no),
+                self.read_image(runs[1], snapshot_no)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1 @@
+name = "util"
\ No newline at end of file
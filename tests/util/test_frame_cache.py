@@ -0,0 +1,62 @@
+import unittest
+from pythonvizalgos.util.frame_cache import FrameCache
+import os
+import shutil
+import tempfile
+
+
+class TestFrameCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.cache_path = os.path.join(self.dir, "cache")
+
+    def test_get_and_put(self):
+        frame_cache = FrameCache(self.cache_path)
+        key = FrameCache.create_key("digraph { 1 -> 2 }", {"engine": "dot"})
+        self.assertNotEqual(key, FrameCache.create_key("digraph { 1 -> 2 }",
+                                                       {"engine": "neato"}))
+        target = os.path.join(self.dir, "frame.png")
+        self.assertFalse(frame_cache.get(key, target))
+        self.assertIsNone(frame_cache.read(key))
+
+        frame_cache.put(key, b"image")
+        self.assertTrue(frame_cache.get(key, target))
+        with open(target, "rb") as image_file:
+            self.assertEqual(image_file.read(), b"image")
+        self.assertEqual(frame_cache.read(key), b"image")
+        self.assertEqual(frame_cache.get_stats(),
+                         {"hits": 2, "misses": 2, "hit_rate": 0.5,
+                          "frames": 1, "bytes": 5})
+
+    def test_put_file_and_copy(self):
+        image_name = os.path.join(self.dir, "image.png")
+        with open(image_name, "wb") as image_file:
+            image_file.write(b"image")
+        frame_cache = FrameCache(self.cache_path, link=False)
+        frame_cache.put("key", image_name)
+        target = os.path.join(self.dir, "frame.png")
+        self.assertTrue(frame_cache.get("key", target))
+        self.assertNotEqual(os.stat(target).st_ino,
+                            os.stat(frame_cache.get_file_name("key")).st_ino)
+
+    def test_persistent(self):
+        FrameCache(self.cache_path).put("key", b"image")
+        frame_cache = FrameCache(self.cache_path)
+        self.assertEqual(frame_cache.read("key"), b"image")
+        self.assertEqual(frame_cache.get_stats()["bytes"], 5)
+
+    def test_lru_eviction(self):
+        frame_cache = FrameCache(self.cache_path, max_bytes=10)
+        frame_cache.put("a", b"aaaa")
+        frame_cache.put("b", b"bbbb")
+        frame_cache.last_used["b"] -= 10
+        frame_cache.put("c", b"cccc")
+        self.assertEqual(set(frame_cache.entries), {"a", "c"})
+        self.assertFalse(os.path.exists(frame_cache.get_file_name("b")))
+        self.assertEqual(frame_cache.get_stats()["bytes"], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
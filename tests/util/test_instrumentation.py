@@ -0,0 +1,49 @@
+import unittest
+from pythonvizalgos.util.instrumentation import Instrumentation, time_block
+import json
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = []
+        self.instrumentation = Instrumentation(
+            sinks=[lambda *metric: self.metrics.append(metric)])
+
+    def test_counters_timers_and_bytes(self):
+        self.instrumentation.count("snapshot.recorded")
+        self.instrumentation.count("snapshot.recorded", 2)
+        with self.instrumentation.time("snapshot.build"):
+            pass
+        self.instrumentation.add_time("snapshot.build", 1.5)
+        self.instrumentation.add_bytes("images", 100)
+        self.instrumentation.add_bytes("images", 20)
+
+        metrics = self.instrumentation.as_dict()
+        self.assertEqual(metrics["counters"],
+                         {"snapshot.recorded": 3, "snapshot.build": 2})
+        self.assertGreaterEqual(metrics["timers"]["snapshot.build"], 1.5)
+        self.assertEqual(metrics["bytes"], {"images": 120})
+        self.assertEqual(json.loads(self.instrumentation.to_json()), metrics)
+
+    def test_sinks(self):
+        self.instrumentation.count("snapshot.recorded")
+        self.instrumentation.add_bytes("images", 100)
+        with self.instrumentation.time("snapshot.build"):
+            pass
+        self.assertEqual(
+            [(metric_type, name) for metric_type, name, _ in self.metrics],
+            [(Instrumentation.COUNT, "snapshot.recorded"),
+             (Instrumentation.BYTES, "images"),
+             (Instrumentation.TIME, "snapshot.build")])
+
+    def test_timer_counts_when_failing(self):
+        with self.assertRaises(ValueError):
+            with self.instrumentation.time("snapshot.build"):
+                raise ValueError()
+        self.assertEqual(
+            self.instrumentation.as_dict()["counters"]["snapshot.build"], 1)
+
+    def test_time_block_without_instrumentation(self):
+        with time_block(None, "snapshot.build"):
+            pass
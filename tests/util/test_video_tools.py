@@ -0,0 +1,184 @@
+import unittest
+from pythonvizalgos.util import video_tools as vt
+import cv2
+import numpy as np
+import os
+import shutil
+import sys
+import tempfile
+
+
+class TestVideoTools(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for idx in range(3):
+            frame = np.full((48, 64, 3), idx * 100, dtype=np.uint8)
+            cv2.imwrite(os.path.join(
+                self.dir, "VIZ_TRACING_{:04d}.png".format(idx + 1)), frame)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def count_frames(self, video_name):
+        capture = cv2.VideoCapture(os.path.join(self.dir, video_name))
+        count = 0
+        while capture.read()[0]:
+            count += 1
+        capture.release()
+        return count
+
+    def test_convert_images_to_video_with_durations(self):
+        vt.convert_images_to_video(self.dir, durations=[1, 3, 2])
+        self.assertEqual(self.count_frames("video.avi"), 6)
+
+    def test_convert_images_of_mixed_sizes(self):
+        cv2.imwrite(os.path.join(self.dir, "VIZ_TRACING_0004.png"),
+                    np.zeros((80, 40, 3), dtype=np.uint8))
+        stats = vt.convert_images_to_video(self.dir, workers=2)
+        self.assertEqual((stats["width"], stats["height"]), (64, 80))
+        self.assertEqual(stats["images"], 4)
+        self.assertEqual(stats["frames"], 4)
+        self.assertEqual(self.count_frames("video.avi"), 4)
+
+    def test_read_image_size(self):
+        self.assertEqual(vt.read_image_size(
+            os.path.join(self.dir, "VIZ_TRACING_0001.png")), (64, 48))
+
+    def test_video_stream_fits_frames(self):
+        video_path = os.path.join(self.dir, "stream.avi")
+        stream = vt.VideoStream(video_path, max_pending=1)
+        stream.write(cv2.imencode(
+            ".png", np.zeros((48, 64, 3), dtype=np.uint8))[1].tobytes())
+        stream.write(np.zeros((96, 32, 3), dtype=np.uint8), duration=2)
+        stream.close()
+        self.assertEqual(stream.frame_count, 3)
+        self.assertEqual(stream.backend, vt.BACKEND_OPENCV)
+        self.assertEqual(self.count_frames("stream.avi"), 3)
+
+    def test_video_stream_canvas(self):
+        video_path = os.path.join(self.dir, "canvas.avi")
+        stream = vt.VideoStream(video_path, size=(64, 96))
+        stream.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        stream.write(np.zeros((96, 32, 3), dtype=np.uint8))
+        stream.close()
+        capture = cv2.VideoCapture(video_path)
+        frames = [capture.read()[1] for _ in range(2)]
+        capture.release()
+        self.assertEqual(frames[0].shape, (96, 64, 3))
+        # The tall frame is padded, not scaled down: it spans the height
+        self.assertLess(frames[1][4, 32].max(), 64)
+        self.assertGreater(frames[1][4, 4].min(), 192)
+
+    def test_concatenate_videos(self):
+        vt.convert_images_to_video(self.dir, video_name="first.avi",
+                                   durations=[1, 1, 2])
+        cv2.imwrite(os.path.join(self.dir, "VIZ_TRACING_0004.png"),
+                    np.zeros((80, 40, 3), dtype=np.uint8))
+        vt.convert_images_to_video(self.dir, video_name="second.avi")
+        stats = vt.concatenate_videos(
+            [os.path.join(self.dir, "first.avi"),
+             os.path.join(self.dir, "second.avi")],
+            os.path.join(self.dir, "joined.avi"), titles=["first", None],
+            title_seconds=1.0)
+        self.assertEqual((stats["width"], stats["height"]), (64, 80))
+        self.assertEqual(stats["frames"], 2 + 4 + 4)
+        self.assertEqual(stats["backend"], vt.BACKEND_OPENCV)
+        self.assertEqual(self.count_frames("joined.avi"), 10)
+        with self.assertRaises(Exception):
+            vt.concatenate_videos([], os.path.join(self.dir, "none.avi"))
+
+    def test_create_title_card(self):
+        card = vt.create_title_card("component 1 of 2", 64, 48)
+        self.assertEqual(card.shape, (48, 64, 3))
+        self.assertTrue((card < 255).any())
+        self.assertEqual(card[0, 0].tolist(), [255, 255, 255])
+
+    def write_fake_ffmpeg(self, exit_code=0, error_lines=0):
+        """ Writes an executable that stands in for ffmpeg: it writes
+        numbered error lines, then copies the raw frames from its standard
+        input to the video path """
+
+        executable = os.path.join(self.dir, "fake_ffmpeg")
+        with open(executable, "w") as script:
+            script.write("#!" + sys.executable + "\n"
+                         "import shutil, sys\n"
+                         "for line in range(" + str(error_lines) + "):\n"
+                         "    print('error', line, file=sys.stderr)\n"
+                         "with open(sys.argv[-1], 'wb') as video:\n"
+                         "    shutil.copyfileobj(sys.stdin.buffer, video)\n"
+                         "sys.exit(" + str(exit_code) + ")\n")
+        os.chmod(executable, 0o755)
+        return executable
+
+    def test_create_ffmpeg_command(self):
+        encoder = vt.EncoderSettings(codec="libx265", crf=30, gop=600,
+                                     vfr=True, preset="slow")
+        command = vt.create_ffmpeg_command("video.mp4", (64, 48), 2.0,
+                                           encoder, version=(5, 1))
+        self.assertEqual(command[:3], ["ffmpeg", "-y", "-loglevel"])
+        self.assertIn("64x48", command)
+        self.assertEqual(command[command.index("-c:v") + 1], "libx265")
+        self.assertEqual(command[command.index("-crf") + 1], "30")
+        self.assertEqual(command[command.index("-g") + 1], "600")
+        self.assertEqual(command[command.index("-fps_mode") + 1], "vfr")
+        self.assertIn("mpdecimate", command[command.index("-vf") + 1])
+        self.assertEqual(command[-1], "video.mp4")
+
+        command = vt.create_ffmpeg_command("video.mp4", (64, 48), 2.0,
+                                           encoder, version=(4, 4))
+        self.assertEqual(command[command.index("-vsync") + 1], "vfr")
+        self.assertNotIn("-fps_mode", command)
+
+        command = vt.create_ffmpeg_command(
+            "video.mp4", (64, 48), 2.0, vt.EncoderSettings(bitrate="500k"))
+        self.assertEqual(command[command.index("-b:v") + 1], "500k")
+        self.assertNotIn("-crf", command)
+        self.assertNotIn("-fps_mode", command)
+
+    def test_ffmpeg_writer(self):
+        encoder = vt.EncoderSettings(executable=self.write_fake_ffmpeg())
+        stats = vt.convert_images_to_video(self.dir, video_name="raw.mp4",
+                                           durations=[1, 2, 1],
+                                           encoder=encoder)
+        self.assertEqual(stats["frames"], 4)
+        self.assertEqual(stats["backend"], vt.BACKEND_FFMPEG)
+        self.assertEqual(os.path.getsize(os.path.join(self.dir, "raw.mp4")),
+                         4 * 64 * 48 * 3)
+
+        # More output than a pipe buffer holds, of which the tail is reported
+        stream = vt.VideoStream(os.path.join(self.dir, "failed.mp4"),
+                                encoder=encoder._replace(
+                                    executable=self.write_fake_ffmpeg(
+                                        1, error_lines=10000)))
+        stream.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        with self.assertRaises(Exception) as context:
+            stream.close()
+        self.assertIn("error 9999", str(context.exception))
+        self.assertNotIn("error 9989", str(context.exception))
+
+    def test_get_video_name(self):
+        self.assertEqual(vt.get_video_name(), "video.avi")
+        self.assertEqual(vt.get_video_name("clip.avi", vt.EncoderSettings()),
+                         "clip.mp4")
+        self.assertEqual(vt.get_video_name(
+            encoder=vt.EncoderSettings(container="mkv")), "video.mkv")
+
+    def test_ffmpeg_fallback(self):
+        encoder = vt.EncoderSettings(
+            executable=os.path.join(self.dir, "missing_ffmpeg"))
+        with self.assertWarns(RuntimeWarning):
+            stats = vt.convert_images_to_video(self.dir, durations=[1, 1, 2],
+                                               encoder=encoder)
+        self.assertEqual(stats["backend"], vt.BACKEND_OPENCV)
+        self.assertEqual(self.count_frames("video.mp4"), 4)
+
+    def test_fit_frame(self):
+        frame = vt.fit_frame(np.zeros((96, 32, 3), dtype=np.uint8), 64, 48)
+        self.assertEqual(frame.shape, (48, 64, 3))
+        self.assertEqual(frame[0, 0].tolist(), [255, 255, 255])
+        self.assertEqual(frame[24, 32].tolist(), [0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()